@@ -0,0 +1,165 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This script measures how long bridge finalisation takes with different numbers of workers, using
+both thread pools and process pools. It generates a graph of long unique segments in a chain,
+where each gap between two unique segments is crossed by a tangle of short repeat segments, and
+makes a long read bridge across each gap from a few error-containing copies of the gap's
+sequence. It then finalises all of the bridges with 1, 2, 4, ... 32 workers of each kind and
+prints the times and speedups.
+
+Usage (from the Unicycler repository directory):
+  python3 test/bridge_finalise_benchmark.py [gap count] [max workers]
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import multiprocessing
+
+sys.path.insert(0, os.getcwd())
+import unicycler.alignment
+import unicycler.assembly_graph
+import unicycler.bridge_long_read
+
+TANGLE_SIZE = 6
+READS_PER_BRIDGE = 3
+ERROR_RATE = 0.05
+
+
+class SpanAlignment(object):
+    """
+    Just the parts of an Alignment (of a spanning read to a start or end segment) that bridge
+    finalisation uses.
+    """
+    def __init__(self, aligned_ref_length):
+        self.scaled_score = 90.0
+        self.aligned_ref_length = aligned_ref_length
+
+    def get_read_to_ref_ratio(self):
+        return 1.0
+
+    def get_aligned_ref_length(self):
+        return self.aligned_ref_length
+
+
+def main():
+    gap_count = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    random.seed(0)
+    scoring_scheme = unicycler.alignment.AlignmentScoringScheme('3,-6,-5,-2')
+
+    temp_dir = 'TEST_TEMP_' + str(os.getpid())
+    os.makedirs(temp_dir)
+    try:
+        gfa = os.path.join(temp_dir, 'graph.gfa')
+        gaps = write_graph(gfa, gap_count)
+        graph = unicycler.assembly_graph.AssemblyGraph(gfa, 0)
+        print('Graph: ' + str(len(graph.segments)) + ' segments, ' +
+              str(sum(len(x) for x in graph.forward_links.values())) + ' links')
+        print('CPUs: ' + str(multiprocessing.cpu_count()))
+        reads = [[add_errors(graph.get_path_sequence(path)) for _ in range(READS_PER_BRIDGE)]
+                 for _, _, path in gaps]
+        finalise_args = (scoring_scheme, 50, {20000: 1000}, graph.get_total_length(), False,
+                         0.0)
+
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= max_workers:
+            worker_counts.append(worker_counts[-1] * 2)
+
+        print()
+        print('Workers   Threads (s)   Speedup   Processes (s)   Speedup')
+        single_worker_time = None
+        for workers in worker_counts:
+            times = []
+            for use_processes in (False, True):
+                bridges = make_bridges(graph, gaps, reads)
+                start_time = time.time()
+                for _ in unicycler.bridge_long_read.finalise_long_read_bridges(
+                        bridges, workers, use_processes, finalise_args):
+                    pass
+                times.append(time.time() - start_time)
+            if single_worker_time is None:
+                single_worker_time = times[0]
+            print(str(workers).rjust(7) + '   ' + ('%.2f' % times[0]).rjust(11) + '   ' +
+                  ('%.2f' % (single_worker_time / times[0])).rjust(7) + '   ' +
+                  ('%.2f' % times[1]).rjust(13) + '   ' +
+                  ('%.2f' % (single_worker_time / times[1])).rjust(7))
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def make_bridges(graph, gaps, reads):
+    bridges = []
+    for (start, end, _), gap_reads in zip(gaps, reads):
+        bridge = unicycler.bridge_long_read.LongReadBridge(graph, start, end)
+        start_alignment = SpanAlignment(graph.segments[start].get_length())
+        end_alignment = SpanAlignment(graph.segments[end].get_length())
+        bridge.reads = [(x, '+' * len(x), start_alignment, end_alignment) for x in gap_reads]
+        bridges.append(bridge)
+    return bridges
+
+
+def random_seq(length):
+    return ''.join(random.choice('ACGT') for _ in range(length))
+
+
+def add_errors(sequence):
+    bases = []
+    for base in sequence:
+        if random.random() >= ERROR_RATE:
+            bases.append(base)
+            continue
+        error_type = random.choice(['substitution', 'insertion', 'deletion'])
+        if error_type == 'substitution':
+            bases.append(random.choice([x for x in 'ACGT' if x != base]))
+        elif error_type == 'insertion':
+            bases += [base, random.choice('ACGT')]
+    return ''.join(bases)
+
+
+def write_graph(filename, gap_count):
+    """
+    Writes the graph and returns the (start, end, true path) of each gap.
+    """
+    segments, links, gaps = [], set(), []
+    repeats = [random_seq(random.randint(100, 400)) for _ in range(3)]
+    seg_num = 1
+    segments.append((seg_num, random_seq(1000), 1.0))
+    for _ in range(gap_count):
+        start = seg_num
+        tangle = list(range(seg_num + 1, seg_num + 1 + TANGLE_SIZE))
+        end = tangle[-1] + 1
+        seg_num = end
+        for t in tangle:
+            segments.append((t, random.choice(repeats) + random_seq(random.randint(10, 50)), 2.0))
+        segments.append((end, random_seq(1000), 1.0))
+        links.add((start, tangle[0]))
+        for t_1, t_2 in zip(tangle, tangle[1:]):
+            links.add((t_1, t_2))
+        links.add((tangle[-1], end))
+        for t in tangle:
+            links.add((t, random.choice(tangle)))
+        gaps.append((start, end, tangle))
+
+    with open(filename, 'wt') as gfa:
+        for num, seq, depth in segments:
+            gfa.write('S\t' + str(num) + '\t' + seq + '\tdp:f:' + str(depth) + '\n')
+        for start, end in sorted(links):
+            gfa.write('L\t' + str(start) + '\t+\t' + str(end) + '\t+\t0M\n')
+    return gaps
+
+
+if __name__ == '__main__':
+    main()
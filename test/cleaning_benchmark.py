@@ -0,0 +1,235 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This script measures the work done cleaning up the graph after bridging. It generates a tangled
+graph of short runs of segments, where most segments have been used in bridges (with some of their
+depth taken away), and runs clean_up_after_bridging_1 and clean_up_after_bridging_2 on graphs of
+increasing size. It does this both with the incremental cleaning (which only checks segments near
+each removal again) and with a full rescan of the graph after each removal (as cleaning used to
+work), checks that they give the same graph, and prints the number of passes, the number of
+segments visited and the times. The rescanning is slow, so it is only run on graphs up to the
+second size given.
+
+Usage (from the Unicycler repository directory):
+  python3 test/cleaning_benchmark.py [max segment count] [max rescanning segment count]
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+from collections import defaultdict
+
+sys.path.insert(0, os.getcwd())
+import unicycler.log
+from unicycler.assembly_graph import AssemblyGraph, CleaningStats
+from unicycler.misc import weighted_average_list
+from unicycler import settings
+
+
+class RescanningGraph(AssemblyGraph):
+    """
+    Cleans up after bridging with a full scan of the graph after each removal, as it used to,
+    counting passes and segments visited the same way as the incremental cleaning.
+    """
+    def clean_up_after_bridging_2(self, seg_nums_used_in_bridges, min_component_size,
+                                  min_dead_end_size, unbridged_graph, anchor_segments):
+        stats = CleaningStats()
+        usedupness_scores = defaultdict(float)
+        for seg_num in seg_nums_used_in_bridges:
+            if seg_num in self.segments and seg_num in unbridged_graph.segments:
+                usedupness_scores[seg_num] = self.get_usedupness_score(seg_num, unbridged_graph)
+        while True:
+            while True:
+                stats.passes += 1
+                for seg_num in seg_nums_used_in_bridges:
+                    if seg_num in self.segments:
+                        stats.segments_visited += 1
+                        if self.dead_end_count(seg_num) > 0:
+                            self.remove_segments([seg_num])
+                            break
+                else:
+                    break
+            stats.passes += 1
+            path_groups = []
+            segs_in_path_groups = set()
+            for seg_num in seg_nums_used_in_bridges:
+                if seg_num in self.segments and seg_num not in segs_in_path_groups:
+                    stats.segments_visited += 1
+                    path = self.get_simple_path(seg_num, None, 2)
+                    if all(abs(x) in seg_nums_used_in_bridges for x in path):
+                        path_groups.append(path)
+                        segs_in_path_groups.update(path)
+            scored_path_groups = []
+            for path_group in path_groups:
+                min_score = 100.0
+                for path_seg in path_group:
+                    min_score = min(min_score, usedupness_scores[abs(path_seg)])
+                scored_path_groups.append((min_score, path_group))
+            scored_path_groups = sorted(scored_path_groups, reverse=True, key=lambda x: x[0])
+            for _, path in scored_path_groups:
+                stats.segments_visited += 1
+                if self.dead_end_change_if_path_deleted(path) <= 0:
+                    self.remove_segments([abs(x) for x in path])
+                    break
+            else:
+                break
+        while True:
+            stats.passes += 1
+            potentially_deletable_paths = []
+            for seg_num in self.segments:
+                stats.segments_visited += 1
+                path = self.get_simple_path(seg_num, None, 2)
+                path_lengths = [max(1, self.segments[abs(x)].get_length() - self.overlap)
+                                for x in path]
+                path_usedupness = [usedupness_scores[abs(x)] for x in path]
+                average_usedupness = weighted_average_list(path_usedupness, path_lengths)
+                potentially_deletable_paths.append((average_usedupness, path))
+            for usedupness, path in potentially_deletable_paths:
+                if usedupness > settings.CLEANING_USEDUPNESS_THRESHOLD and \
+                        self.dead_end_change_if_path_deleted(path) <= 0:
+                    self.remove_segments([abs(x) for x in path])
+                    break
+            else:
+                break
+        connected_components = self.get_connected_components()
+        for component_nums in connected_components:
+            component_lengths = [self.segments[abs(x)].get_length() for x in component_nums]
+            component_usedupness = [usedupness_scores[abs(x)] for x in component_nums]
+            average_usedupness = weighted_average_list(component_usedupness, component_lengths)
+            if average_usedupness > settings.CLEANING_USEDUPNESS_THRESHOLD:
+                self.remove_segments(component_nums)
+        for segment in self.segments.values():
+            segment.depth = max(0.0, segment.depth)
+        anchor_seg_nums = set(x.number for x in anchor_segments)
+        self.remove_components_without_anchor_segments(anchor_seg_nums)
+        self.remove_components_entirely_used_in_bridges(seg_nums_used_in_bridges)
+        self.remove_unbridging_segments(anchor_seg_nums)
+        self.remove_small_components(min_component_size)
+        self.remove_small_dead_ends(min_dead_end_size, stats)
+        return stats
+
+    def remove_small_dead_ends(self, min_dead_end_size, stats=None):
+        while True:
+            stats.passes += 1
+            for seg_num, segment in self.segments.items():
+                if segment.get_length() >= min_dead_end_size:
+                    continue
+                stats.segments_visited += 1
+                if self.dead_end_change_if_deleted(seg_num) < 0:
+                    self.remove_segments([seg_num])
+                    break
+            else:
+                break
+
+    def remove_unbridging_segments(self, anchor_seg_nums):
+        segment_nums_to_remove = []
+        for seg_num in self.segments:
+            if seg_num in anchor_seg_nums:
+                continue
+            if not (self.search(seg_num, anchor_seg_nums) and
+                    self.search(-seg_num, anchor_seg_nums)):
+                segment_nums_to_remove.append(seg_num)
+        self.remove_segments(segment_nums_to_remove)
+
+
+def main():
+    max_segment_count = int(sys.argv[1]) if len(sys.argv) > 1 else 16000
+    max_rescanning_count = int(sys.argv[2]) if len(sys.argv) > 2 else 4000
+    unicycler.log.logger = unicycler.log.Log(log_filename=None, stdout_verbosity_level=0)
+
+    temp_dir = 'TEST_TEMP_' + str(os.getpid())
+    os.makedirs(temp_dir)
+    try:
+        print('Segments   Removed   Incremental: passes  visited  time (s)   '
+              'Rescanning: passes    visited  time (s)')
+        segment_count = 1000
+        while segment_count <= max_segment_count:
+            gfa = os.path.join(temp_dir, 'graph.gfa')
+            random.seed(0)
+            write_graph(gfa, segment_count)
+            graph, stats, incremental_time = clean_graph(AssemblyGraph, gfa)
+            removed_count = segment_count - len(graph.segments)
+            line = str(segment_count).rjust(8) + '   ' + str(removed_count).rjust(7) + '   ' + \
+                str(stats.passes).rjust(19) + str(stats.segments_visited).rjust(9) + \
+                ('%.2f' % incremental_time).rjust(10)
+            if segment_count <= max_rescanning_count:
+                rescanning_graph, rescanning_stats, rescanning_time = \
+                    clean_graph(RescanningGraph, gfa)
+                line += '   ' + str(rescanning_stats.passes).rjust(18) + \
+                    str(rescanning_stats.segments_visited).rjust(11) + \
+                    ('%.2f' % rescanning_time).rjust(10)
+                if get_graph_summary(rescanning_graph) != get_graph_summary(graph):
+                    line += ' (different graphs!)'
+            print(line)
+            segment_count *= 2
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def clean_graph(graph_class, gfa):
+    """
+    Loads the graph and cleans it as if most of its segments have been used in bridges.
+    """
+    graph = graph_class(gfa, 0)
+    unbridged_graph = graph_class(gfa, 0)
+    random.seed(1)
+    seg_nums_used_in_bridges = set()
+    for seg_num, segment in graph.segments.items():
+        if random.random() < 0.8:
+            seg_nums_used_in_bridges.add(seg_num)
+            segment.depth *= random.choice([0.0, 0.05, 0.2, 0.6])
+    anchor_segments = [x for x in graph.segments.values() if x.get_length() >= 1000]
+    start_time = time.time()
+    graph.clean_up_after_bridging_1(anchor_segments, seg_nums_used_in_bridges)
+    stats = graph.clean_up_after_bridging_2(seg_nums_used_in_bridges, 1000, 1000,
+                                            unbridged_graph, anchor_segments)
+    return graph, stats, time.time() - start_time
+
+
+def write_graph(filename, segment_count):
+    """
+    Writes a graph of runs of 1 to 5 segments, each run ending at a branch point which leads to
+    two random runs (on either strand).
+    """
+    runs = []
+    seg_num = 0
+    while seg_num < segment_count:
+        run_length = min(random.randint(1, 5), segment_count - seg_num)
+        runs.append(list(range(seg_num + 1, seg_num + run_length + 1)))
+        seg_num += run_length
+    links = set()
+    for run in runs:
+        for i in range(len(run) - 1):
+            links.add((run[i], '+', run[i + 1], '+'))
+        for next_run in random.sample(runs, 2):
+            if random.random() < 0.5:
+                links.add((run[-1], '+', next_run[0], '+'))
+            else:
+                links.add((run[-1], '+', next_run[-1], '-'))
+    with open(filename, 'wt') as gfa:
+        for num in range(1, segment_count + 1):
+            length = random.choice([random.randint(50, 900), random.randint(1000, 5000)])
+            gfa.write('S\t' + str(num) + '\t' + 'A' * length + '\tdp:f:' +
+                      str(random.uniform(0.5, 2.0)) + '\n')
+        for start, start_strand, end, end_strand in sorted(links):
+            gfa.write('L\t' + str(start) + '\t' + start_strand + '\t' + str(end) + '\t' +
+                      end_strand + '\t0M\n')
+
+
+def get_graph_summary(graph):
+    return ([(num, seg.depth) for num, seg in graph.segments.items()], graph.forward_links)
+
+
+if __name__ == '__main__':
+    main()
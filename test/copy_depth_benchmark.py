@@ -0,0 +1,128 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This script measures how long copy depth (multiplicity) determination takes on large graphs. It
+generates a graph of unique segments joined through repeats: each repeat is entered by two or
+three unique segments and leads on to as many, so its copy depth has to be merged from one side
+and redistributed to the other. Some extra random links make parts of the graph harder to
+resolve. It then runs determine_copy_depth on graphs of increasing size, both with the worklist
+propagation and with every segment re-evaluated before each step (as propagation used to work),
+checks that they give the same copy depths and prints the times. The full re-evaluation is slow,
+so it is only run on graphs up to the second size given.
+
+Usage (from the Unicycler repository directory):
+  python3 test/copy_depth_benchmark.py [max segment count] [max full re-evaluation segment count]
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+
+sys.path.insert(0, os.getcwd())
+import unicycler.assembly_graph
+import unicycler.assembly_graph_copy_depth
+import unicycler.log
+from unicycler.assembly_graph_copy_depth import CopyDepthPropagator
+
+
+class FullScanPropagator(CopyDepthPropagator):
+    """
+    Re-evaluates every segment before each propagation step, as copy depth propagation used to.
+    """
+    def merge_copy_depths(self, error_margin, copy_depth_table):
+        self.merges, self.merge_heap = {}, []
+        for num in self.graph.segments:
+            if num not in self.graph.copy_depths:
+                self.update_merge(num)
+        return super().merge_copy_depths(error_margin, copy_depth_table)
+
+    def redistribute_copy_depths(self, error_margin, copy_depth_table):
+        self.redistribution_tolerance = None
+        return super().redistribute_copy_depths(error_margin, copy_depth_table)
+
+
+def main():
+    max_segment_count = int(sys.argv[1]) if len(sys.argv) > 1 else 40000
+    max_full_scan_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    unicycler.log.logger = unicycler.log.Log(log_filename=None, stdout_verbosity_level=0)
+
+    temp_dir = 'TEST_TEMP_' + str(os.getpid())
+    os.makedirs(temp_dir)
+    try:
+        print('Segments   Assigned   Worklist (s)   Full re-evaluation (s)')
+        segment_count = 1250
+        while segment_count <= max_segment_count:
+            random.seed(0)
+            gfa = os.path.join(temp_dir, 'graph.gfa')
+            write_graph(gfa, segment_count)
+            graph = unicycler.assembly_graph.AssemblyGraph(gfa, 0)
+            start_time = time.time()
+            unicycler.assembly_graph_copy_depth.determine_copy_depth(graph)
+            worklist_time = time.time() - start_time
+
+            full_scan_time = '-'
+            if segment_count <= max_full_scan_count:
+                full_scan_graph = unicycler.assembly_graph.AssemblyGraph(gfa, 0)
+                unicycler.assembly_graph_copy_depth.CopyDepthPropagator = FullScanPropagator
+                try:
+                    start_time = time.time()
+                    unicycler.assembly_graph_copy_depth.determine_copy_depth(full_scan_graph)
+                    full_scan_time = '%.2f' % (time.time() - start_time)
+                finally:
+                    unicycler.assembly_graph_copy_depth.CopyDepthPropagator = \
+                        CopyDepthPropagator
+                if full_scan_graph.copy_depths != graph.copy_depths:
+                    full_scan_time += ' (different copy depths!)'
+
+            print(str(len(graph.segments)).rjust(8) + '   ' +
+                  str(len(graph.copy_depths)).rjust(8) + '   ' +
+                  ('%.2f' % worklist_time).rjust(12) + '   ' + full_scan_time.rjust(22))
+            segment_count *= 2
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def write_graph(filename, segment_count):
+    segments, links = [], set()
+
+    def add_segment(length, depth):
+        segments.append((len(segments) + 1, length, depth * random.uniform(0.9, 1.1)))
+        return len(segments)
+
+    previous = [add_segment(random.randint(1000, 5000), 1.0) for _ in range(2)]
+    while len(segments) < segment_count:
+        copies = random.choice([2, 2, 3])
+        if len(previous) != copies:
+            previous = [add_segment(random.randint(1000, 5000), 1.0) for _ in range(copies)]
+        repeat = add_segment(random.randint(50, 900), float(copies))
+        for seg_num in previous:
+            links.add((seg_num, repeat))
+        following = [add_segment(random.choice([random.randint(100, 900),
+                                                random.randint(1000, 5000)]), 1.0)
+                     for _ in range(copies)]
+        for seg_num in following:
+            links.add((repeat, seg_num))
+        if random.random() < 0.2:
+            links.add((random.choice(following), random.randint(1, len(segments))))
+        previous = following
+
+    with open(filename, 'wt') as gfa:
+        for num, length, depth in segments:
+            gfa.write('S\t' + str(num) + '\t' + 'A' * length + '\tdp:f:' + str(depth) + '\n')
+        for start, end in sorted(links):
+            gfa.write('L\t' + str(start) + '\t+\t' + str(end) + '\t+\t0M\n')
+
+
+if __name__ == '__main__':
+    main()
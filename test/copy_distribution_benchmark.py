@@ -0,0 +1,93 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This script measures how long it takes to find the best redistribution of a segment's copy depths
+to its neighbours at high-multiplicity junctions. For each copy count it generates random
+junctions: a repeat with that many copy depths (mostly near 1, as for a repeat between single
+copy segments) which leads on to two to five segments, some of which already have copy depths.
+It then finds the best arrangement for each junction, both with the branch-and-bound search and
+by scoring every arrangement from shuffle_into_bins (as redistribution used to), checks that they
+agree and prints the times. Scoring every arrangement is slow, so it is only done for up to the
+second copy count given.
+
+Usage (from the Unicycler repository directory):
+  python3 test/copy_distribution_benchmark.py [max copy count] [max exhaustive copy count]
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.getcwd())
+from unicycler.assembly_graph_copy_depth import get_best_arrangement, shuffle_into_bins, \
+    get_error
+
+JUNCTION_COUNT = 20
+
+
+def main():
+    max_copy_count = int(sys.argv[1]) if len(sys.argv) > 1 else 14
+    max_exhaustive_copy_count = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    print('Copies   Arrangements   Branch-and-bound (s)   Exhaustive (s)')
+    for copy_count in range(2, max_copy_count + 1, 2):
+        random.seed(copy_count)
+        junctions = [make_junction(copy_count) for _ in range(JUNCTION_COUNT)]
+        arrangement_count = sum(len(bin_depths) ** len(items)
+                                for items, bin_depths, _ in junctions)
+
+        start_time = time.time()
+        results = [get_best_arrangement(*junction) for junction in junctions]
+        branch_and_bound_time = time.time() - start_time
+
+        exhaustive_time = '-'
+        if copy_count <= max_exhaustive_copy_count:
+            start_time = time.time()
+            exhaustive_results = [get_best_arrangement_exhaustively(*junction)
+                                  for junction in junctions]
+            exhaustive_time = '%.2f' % (time.time() - start_time)
+            if exhaustive_results != results:
+                exhaustive_time += ' (different arrangements!)'
+
+        print(str(copy_count).rjust(6) + '   ' + str(arrangement_count).rjust(12) + '   ' +
+              ('%.3f' % branch_and_bound_time).rjust(20) + '   ' + exhaustive_time.rjust(14))
+
+
+def make_junction(copy_count):
+    items = sorted([random.choice([1.0, 1.0, 1.0, 2.0]) * random.uniform(0.9, 1.1)
+                    for _ in range(copy_count)], reverse=True)
+    bin_count = random.randint(2, min(5, copy_count))
+    splits = sorted(random.sample(range(1, copy_count), bin_count - 1))
+    bin_sizes = [b - a for a, b in zip([0] + splits, splits + [copy_count])]
+    shuffled_items = random.sample(items, copy_count)
+    bin_depths, targets, i = [], [], 0
+    for size in bin_sizes:
+        bin_depths.append(sum(shuffled_items[i:i + size]) * random.uniform(0.9, 1.1))
+        targets.append(size if random.random() < 0.3 else None)
+        i += size
+    return items, bin_depths, targets
+
+
+def get_best_arrangement_exhaustively(items, bin_depths, targets):
+    best_arrangement, lowest_error = None, None
+    for arrangement in shuffle_into_bins(items, [[] for _ in bin_depths], targets):
+        error = 0.0
+        for depths, bin_depth in zip(arrangement, bin_depths):
+            error = max(error, get_error(sum(depths), bin_depth))
+        if best_arrangement is None or error < lowest_error:
+            best_arrangement, lowest_error = arrangement, error
+    return best_arrangement, lowest_error
+
+
+if __name__ == '__main__':
+    main()
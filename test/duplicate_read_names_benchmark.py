@@ -0,0 +1,88 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This script measures how long it takes to save the duplicate-free copy of a long read file. It
+builds a synthetic read set where every read name appears many times, loads it (which renames the
+duplicates) and then compares the old way of saving the renamed reads (building a string for each
+read and writing it with default gzip compression) against Unicycler's current batched writer.
+
+Usage (from the Unicycler repository directory):
+  python3 test/duplicate_read_names_benchmark.py [read count]
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+import gzip
+import time
+import random
+import shutil
+
+sys.path.insert(0, os.getcwd())
+import unicycler.read_ref
+import unicycler.log
+
+DISTINCT_NAMES = 10
+READ_LENGTH = 10000
+
+
+def main():
+    read_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    unicycler.log.logger = unicycler.log.Log(log_filename=None, stdout_verbosity_level=0)
+
+    temp_dir = 'TEST_TEMP_' + str(os.getpid())
+    os.makedirs(temp_dir)
+    try:
+        reads = make_duplicate_heavy_read_file(temp_dir, read_count)
+        print('Read file: ' + reads + ' (' + str(os.path.getsize(reads)) + ' bytes, ' +
+              str(read_count) + ' reads, ' + str(DISTINCT_NAMES) + ' distinct names)')
+        read_dict, read_names, _ = unicycler.read_ref.load_long_reads(reads, silent=True,
+                                                                     output_dir=temp_dir)
+
+        old_filename = os.path.join(temp_dir, 'old_no_duplicates.fastq.gz')
+        new_filename = os.path.join(temp_dir, 'new_no_duplicates.fastq.gz')
+        start_time = time.time()
+        save_reads_old(old_filename, read_dict, read_names)
+        old_time = time.time() - start_time
+        start_time = time.time()
+        unicycler.read_ref.save_reads_to_file(new_filename, read_dict, read_names, True)
+        new_time = time.time() - start_time
+
+        print('Old save: ' + '%.2f' % old_time + ' s (' +
+              str(os.path.getsize(old_filename)) + ' bytes)')
+        print('New save: ' + '%.2f' % new_time + ' s (' +
+              str(os.path.getsize(new_filename)) + ' bytes)')
+        print('Speed-up: ' + '%.2f' % (old_time / new_time) + 'x')
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def make_duplicate_heavy_read_file(temp_dir, read_count):
+    reads = os.path.join(temp_dir, 'reads.fastq.gz')
+    with gzip.open(reads, 'wt', compresslevel=1) as f:
+        for i in range(read_count):
+            seq = ''.join(random.choice('ACGT') for _ in range(READ_LENGTH))
+            qual = ''.join(random.choice('+,-./0123456789') for _ in range(READ_LENGTH))
+            f.write('@read_' + str(i % DISTINCT_NAMES) + '\n' + seq + '\n+\n' + qual + '\n')
+    return reads
+
+
+def save_reads_old(filename, read_dict, read_names):
+    """
+    Replicates how the duplicate-free file used to be written.
+    """
+    with gzip.open(filename, 'wb') as f:
+        for read_name in read_names:
+            f.write(read_dict[read_name].get_fastq().encode())
+
+
+if __name__ == '__main__':
+    main()
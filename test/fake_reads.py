@@ -12,7 +12,7 @@ not, see <http://www.gnu.org/licenses/>.
 """
 
 import os
-import unicycler.misc
+import unicycler.seq_utils
 import random
 
 
@@ -31,7 +31,7 @@ def make_fake_reads(seq, read_config_choice=None):
     read_length = 100
     insert_length = 300
     looped_seq_forward = seq + seq[0:insert_length]
-    looped_seq_reverse = unicycler.misc.reverse_complement(looped_seq_forward)
+    looped_seq_reverse = unicycler.seq_utils.reverse_complement(looped_seq_forward)
 
     out_dir = 'TEST_TEMP_' + str(os.getpid())
     os.makedirs(out_dir)
@@ -0,0 +1,102 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This script compares the old line-by-line, string-concatenating FASTA loader with the chunked
+binary parser in unicycler/seq_parse.py, using a multi-megabase line-wrapped FASTA file.
+
+Usage (from the Unicycler repository directory):
+  python3 test/fasta_parsing_benchmark.py [total Mbp]
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+
+sys.path.insert(0, os.getcwd())
+import unicycler.misc
+import unicycler.seq_utils
+import unicycler.seq_parse
+
+
+def main():
+    total_mbp = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    random.seed(0)
+
+    temp_dir = 'TEST_TEMP_' + str(os.getpid())
+    os.makedirs(temp_dir)
+    try:
+        fasta = os.path.join(temp_dir, 'wrapped.fasta')
+        write_wrapped_fasta(fasta, total_mbp)
+
+        start_time = time.time()
+        old_records = load_fasta_concatenating(fasta)
+        old_time = time.time() - start_time
+
+        start_time = time.time()
+        new_records = unicycler.seq_parse.load_fasta_records(fasta)
+        new_time = time.time() - start_time
+
+        assert old_records == new_records
+        print('FASTA size:     ' + str(total_mbp) + ' Mbp (60 bp lines)')
+        print('Concatenating:  ' + '%.2f' % old_time + ' s')
+        print('seq_parse:      ' + '%.2f' % new_time + ' s')
+        print('Per Mbp:        ' + '%.1f' % (1000.0 * old_time / total_mbp) + ' ms -> ' +
+              '%.1f' % (1000.0 * new_time / total_mbp) + ' ms')
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def write_wrapped_fasta(filename, total_mbp):
+    """
+    Writes a FASTA file of 5 Mbp records (similar to bacterial chromosomes) wrapped at 60 bp.
+    """
+    record_size = 5000000
+    chunk = unicycler.seq_utils.get_random_sequence(record_size)
+    with open(filename, 'wt') as fasta:
+        remaining = total_mbp * 1000000
+        i = 1
+        while remaining > 0:
+            seq = chunk[:min(record_size, remaining)]
+            fasta.write('>seq_' + str(i) + '\n')
+            fasta.write(unicycler.misc.add_line_breaks_to_sequence(seq, 60))
+            remaining -= len(seq)
+            i += 1
+
+
+def load_fasta_concatenating(filename):
+    """
+    The old approach: text mode iteration and += for each line.
+    """
+    records = []
+    with open(filename, 'rt') as fasta_file:
+        name = ''
+        sequence = ''
+        for line in fasta_file:
+            line = line.strip()
+            if not line:
+                continue
+            if line[0] == '>':
+                if name:
+                    records.append((name, sequence))
+                    sequence = ''
+                name = line[1:]
+            else:
+                sequence += line
+        if name:
+            records.append((name, sequence))
+    return records
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This script compares the two ways of finding a bridge's graph path for a consensus sequence:
+enumerating the candidate paths and aligning the consensus to each (the default), and aligning the
+consensus directly to the graph. It generates a graph of long unique segments in a chain, where
+each gap between two unique segments is crossed by a tangle of short repeat segments. Each gap's
+consensus is the sequence of the chain through its tangle with some random errors. It then runs
+get_best_paths_for_seq across every gap both ways and reports the time taken, the search types
+used and how often the two ways agree on the best path's score.
+
+Usage (from the Unicycler repository directory):
+  python3 test/graph_alignment_benchmark.py [gap count] [error rate]
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+from collections import Counter
+
+sys.path.insert(0, os.getcwd())
+import unicycler.alignment
+import unicycler.assembly_graph
+import unicycler.path_finding
+
+TANGLE_SIZE = 8
+
+
+def main():
+    gap_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    error_rate = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    random.seed(0)
+    scoring_scheme = unicycler.alignment.AlignmentScoringScheme('3,-6,-5,-2')
+
+    temp_dir = 'TEST_TEMP_' + str(os.getpid())
+    os.makedirs(temp_dir)
+    try:
+        gfa = os.path.join(temp_dir, 'graph.gfa')
+        gaps = write_graph(gfa, gap_count)
+        graph = unicycler.assembly_graph.AssemblyGraph(gfa, 0)
+        print('Graph: ' + str(len(graph.segments)) + ' segments, ' +
+              str(sum(len(x) for x in graph.forward_links.values())) + ' links')
+        consensuses = [add_errors(graph.get_path_sequence(path), error_rate)
+                       for _, _, path in gaps]
+
+        results = {}
+        for use_graph_alignment in (False, True):
+            start_time = time.time()
+            results[use_graph_alignment] = \
+                [unicycler.path_finding.get_best_paths_for_seq(graph, start, end, len(consensus),
+                                                               consensus, scoring_scheme, 90.0,
+                                                               use_graph_alignment)
+                 for (start, end, _), consensus in zip(gaps, consensuses)]
+            elapsed = time.time() - start_time
+            search_types = Counter(x[1] for x in results[use_graph_alignment])
+            print(('graph alignment:   ' if use_graph_alignment else 'enumerate + align: ') +
+                  '%.2f' % elapsed + ' s (' +
+                  ', '.join(str(c) + ' ' + t for t, c in sorted(search_types.items())) + ')')
+
+        same_score = sum(1 for old, new in zip(results[False], results[True])
+                         if get_best_score(old[0]) == get_best_score(new[0]))
+        better_score = sum(1 for old, new in zip(results[False], results[True])
+                           if get_best_score(old[0]) < get_best_score(new[0]))
+        print('Best path score: ' + str(same_score) + ' the same, ' + str(better_score) +
+              ' better with graph alignment, ' + str(len(gaps) - same_score - better_score) +
+              ' worse with graph alignment')
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def get_best_score(paths_and_scores):
+    return paths_and_scores[0][1] if paths_and_scores else float('-inf')
+
+
+def random_seq(length):
+    return ''.join(random.choice('ACGT') for _ in range(length))
+
+
+def add_errors(sequence, error_rate):
+    bases = []
+    for base in sequence:
+        if random.random() >= error_rate:
+            bases.append(base)
+            continue
+        error_type = random.choice(['substitution', 'insertion', 'deletion'])
+        if error_type == 'substitution':
+            bases.append(random.choice([x for x in 'ACGT' if x != base]))
+        elif error_type == 'insertion':
+            bases += [base, random.choice('ACGT')]
+    return ''.join(bases)
+
+
+def write_graph(filename, gap_count):
+    """
+    Writes the graph and returns the (start, end, true path) of each gap. The tangle segments are
+    copies of a few repeat sequences, so different paths through a tangle can share long stretches
+    of sequence.
+    """
+    segments, links, gaps = [], set(), []
+    repeats = [random_seq(random.randint(100, 400)) for _ in range(3)]
+    seg_num = 1
+    segments.append((seg_num, random_seq(1000), 1.0))
+    for _ in range(gap_count):
+        start = seg_num
+        tangle = list(range(seg_num + 1, seg_num + 1 + TANGLE_SIZE))
+        end = tangle[-1] + 1
+        seg_num = end
+        for t in tangle:
+            segments.append((t, random.choice(repeats) + random_seq(random.randint(10, 50)), 2.0))
+        segments.append((end, random_seq(1000), 1.0))
+
+        # The tangle is a chain from start to end with extra links forward and back.
+        links.add((start, tangle[0]))
+        for t_1, t_2 in zip(tangle, tangle[1:]):
+            links.add((t_1, t_2))
+        links.add((tangle[-1], end))
+        for t in tangle:
+            links.add((t, random.choice(tangle)))
+            links.add((random.choice([start] + tangle), t))
+        gaps.append((start, end, tangle))
+
+    with open(filename, 'wt') as gfa:
+        for num, seq, depth in segments:
+            gfa.write('S\t' + str(num) + '\t' + seq + '\tdp:f:' + str(depth) + '\n')
+        for start, end in sorted(links):
+            gfa.write('L\t' + str(start) + '\t+\t' + str(end) + '\t+\t0M\n')
+    return gaps
+
+
+if __name__ == '__main__':
+    main()
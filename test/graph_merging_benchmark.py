@@ -0,0 +1,134 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This script measures how long it takes to merge all simple (unbranching) paths in a fragmented
+graph. It generates a graph of short segments in unbranching runs, joined at random branch
+points, with graph paths running through them (like SPAdes contig paths). It then runs
+merge_all_possible on graphs of increasing size, both with the one-sweep merging and by
+rescanning the graph for a path to merge after each merge (as merging used to work), checks that
+they give the same graph and prints the times. The rescanning is slow, so it is only run on graphs
+up to the second size given.
+
+Usage (from the Unicycler repository directory):
+  python3 test/graph_merging_benchmark.py [max segment count] [max rescanning segment count]
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+
+sys.path.insert(0, os.getcwd())
+import unicycler.assembly_graph
+import unicycler.log
+from unicycler.assembly_graph import AssemblyGraph
+
+
+class RescanningGraph(AssemblyGraph):
+    """
+    Merges one path at a time, rescanning the graph for the next one after each merge, as
+    merge_all_possible used to.
+    """
+    def merge_all_possible(self, anchor_segments, bridging_mode):
+        if anchor_segments is not None:
+            anchor_seg_nums = set(x.number for x in anchor_segments)
+        else:
+            anchor_seg_nums = None
+        while True:
+            for num in sorted(self.segments):
+                path = self.get_simple_path(num, anchor_seg_nums, bridging_mode)
+                if len(path) > 1:
+                    self.merge_simple_path(path)
+                    break
+            else:
+                break
+        self.renumber_segments()
+
+
+def main():
+    max_segment_count = int(sys.argv[1]) if len(sys.argv) > 1 else 80000
+    max_rescanning_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    unicycler.log.logger = unicycler.log.Log(log_filename=None, stdout_verbosity_level=0)
+
+    temp_dir = 'TEST_TEMP_' + str(os.getpid())
+    os.makedirs(temp_dir)
+    try:
+        print('Segments   Merged segments   One sweep (s)   Rescanning (s)')
+        segment_count = 2500
+        while segment_count <= max_segment_count:
+            random.seed(0)
+            gfa = os.path.join(temp_dir, 'graph.gfa')
+            paths_file = os.path.join(temp_dir, 'contigs.paths')
+            write_graph(gfa, paths_file, segment_count)
+            graph = AssemblyGraph(gfa, 0, paths_file=paths_file)
+            start_time = time.time()
+            graph.merge_all_possible(None, 2)
+            one_sweep_time = time.time() - start_time
+
+            rescanning_time = '-'
+            if segment_count <= max_rescanning_count:
+                rescanning_graph = RescanningGraph(gfa, 0, paths_file=paths_file)
+                start_time = time.time()
+                rescanning_graph.merge_all_possible(None, 2)
+                rescanning_time = '%.2f' % (time.time() - start_time)
+                if get_graph_summary(rescanning_graph) != get_graph_summary(graph):
+                    rescanning_time += ' (different graphs!)'
+
+            print(str(segment_count).rjust(8) + '   ' + str(len(graph.segments)).rjust(15) +
+                  '   ' + ('%.2f' % one_sweep_time).rjust(13) + '   ' +
+                  rescanning_time.rjust(14))
+            segment_count *= 2
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def write_graph(gfa_filename, paths_filename, segment_count):
+    """
+    Writes a graph of runs of 1 to 20 segments. Each run ends at a branch point which leads to two
+    random runs.
+    """
+    runs = []
+    seg_num = 0
+    while seg_num < segment_count:
+        run_length = min(random.randint(1, 20), segment_count - seg_num)
+        runs.append(list(range(seg_num + 1, seg_num + run_length + 1)))
+        seg_num += run_length
+    links = set()
+    for run in runs:
+        for i in range(len(run) - 1):
+            links.add((run[i], run[i + 1]))
+        for next_run in random.sample(runs, 2):
+            links.add((run[-1], next_run[0]))
+    with open(gfa_filename, 'wt') as gfa:
+        for num in range(1, segment_count + 1):
+            sequence = ''.join(random.choice('ACGT') for _ in range(random.randint(50, 150)))
+            gfa.write('S\t' + str(num) + '\t' + sequence + '\tdp:f:' +
+                      str(random.uniform(0.5, 2.0)) + '\n')
+        for start, end in sorted(links):
+            gfa.write('L\t' + str(start) + '\t+\t' + str(end) + '\t+\t0M\n')
+
+    # Each graph path covers one run and goes on into the start of one of the runs it leads to.
+    with open(paths_filename, 'wt') as paths_file:
+        for i, run in enumerate(runs):
+            path = run + [random.choice([x for x in links if x[0] == run[-1]])[1]]
+            paths_file.write('NODE_' + str(i + 1) + '_length_0_cov_0\n')
+            paths_file.write(','.join(str(x) + '+' for x in path) + '\n')
+
+
+def get_graph_summary(graph):
+    return ([(num, seg.forward_sequence, seg.depth) for num, seg in graph.segments.items()],
+            graph.forward_links, sorted(graph.paths.items()))
+
+
+if __name__ == '__main__':
+    main()
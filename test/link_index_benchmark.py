@@ -0,0 +1,175 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This script compares graph traversals on the dictionary-based links (the old approach) against the
+array-based LinkIndex. It generates a SPAdes-like GFA graph (long unique segments in a chain, with
+a tangle of short repeat segments every 50 segments), then times connected components and
+all_paths searches across each tangle.
+
+Usage (from the Unicycler repository directory):
+  python3 test/link_index_benchmark.py [segment count]
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+from collections import deque
+
+sys.path.insert(0, os.getcwd())
+import unicycler.assembly_graph
+import unicycler.path_finding
+import unicycler.misc
+import unicycler.settings
+
+OVERLAP = 55
+TANGLE_SPACING = 50
+TANGLE_SIZE = 8
+COMPONENT_REPEATS = 5
+
+
+def main():
+    segment_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    random.seed(0)
+
+    temp_dir = 'TEST_TEMP_' + str(os.getpid())
+    os.makedirs(temp_dir)
+    try:
+        gfa = os.path.join(temp_dir, 'graph.gfa')
+        write_tangled_graph(gfa, segment_count)
+        graph = unicycler.assembly_graph.AssemblyGraph(gfa, OVERLAP)
+        print('Graph: ' + str(len(graph.segments)) + ' segments, ' +
+              str(sum(len(x) for x in graph.forward_links.values())) + ' links')
+
+        start_time = time.time()
+        for _ in range(COMPONENT_REPEATS):
+            old_components = components_old(graph)
+        old_time = time.time() - start_time
+        start_time = time.time()
+        graph.link_index = None  # include the time to build the index
+        for _ in range(COMPONENT_REPEATS):
+            new_components = graph.get_connected_components()
+        new_time = time.time() - start_time
+        assert old_components == new_components
+        print_result('Connected components (x' + str(COMPONENT_REPEATS) + ')', old_time, new_time)
+
+        tangles = [(i - TANGLE_SIZE - 1, i) for i in range(TANGLE_SPACING, segment_count,
+                                                           TANGLE_SPACING)]
+        start_time = time.time()
+        old_paths = [all_paths_or_none(all_paths_old, graph, s, e) for s, e in tangles]
+        old_time = time.time() - start_time
+        start_time = time.time()
+        new_paths = [all_paths_or_none(unicycler.path_finding.all_paths, graph, s, e)
+                     for s, e in tangles]
+        new_time = time.time() - start_time
+
+        # The new search prunes paths which can't reach the end in time, so it can succeed where
+        # the old one gave up with too many paths. Otherwise the results must match.
+        assert all(old is None or old == new for old, new in zip(old_paths, new_paths))
+        print_result('all_paths (' + str(len(tangles)) + ' searches)', old_time, new_time)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def print_result(name, old_time, new_time):
+    print(name.ljust(36) + ' old: ' + '%.2f' % old_time + ' s   new: ' + '%.2f' % new_time +
+          ' s   speed-up: ' + '%.2f' % (old_time / new_time) + 'x')
+
+
+def write_tangled_graph(filename, segment_count):
+    with open(filename, 'wt') as gfa:
+        for i in range(1, segment_count + 1):
+            in_tangle = (i % TANGLE_SPACING) >= TANGLE_SPACING - TANGLE_SIZE
+            length = random.randint(100, 400) if in_tangle else random.randint(1000, 20000)
+            depth = random.uniform(20.0, 30.0) * (3.0 if in_tangle else 1.0)
+            gfa.write('S\t' + str(i) + '\t' + 'A' * length + '\tdp:f:' + str(depth) + '\n')
+        links = set()
+        for i in range(1, segment_count):
+            links.add((i, i + 1))
+            position = i % TANGLE_SPACING
+            if position >= TANGLE_SPACING - TANGLE_SIZE:
+                tangle_start = i - position + TANGLE_SPACING - TANGLE_SIZE
+                for _ in range(2):
+                    links.add((i, tangle_start + random.randint(0, TANGLE_SIZE - 1)))
+        for start, end in sorted(links):
+            gfa.write('L\t' + str(start) + '\t+\t' + str(end) + '\t+\t' + str(OVERLAP) + 'M\n')
+
+
+def all_paths_or_none(function, graph, start, end):
+    try:
+        return function(graph, start, end, 0, 1500)
+    except unicycler.path_finding.TooManyPaths:
+        return None
+
+
+def components_old(graph):
+    """
+    The old connected components search, using the link dictionaries.
+    """
+    visited = set()
+    components = []
+    for v in graph.segments:
+        if v not in visited:
+            component = []
+            q = deque()
+            q.append(v)
+            visited.add(v)
+            while q:
+                w = q.popleft()
+                component.append(w)
+                for k in graph.get_connected_segments(w):
+                    if k not in visited:
+                        visited.add(k)
+                        q.append(k)
+            components.append(sorted(component))
+    return sorted(components)
+
+
+def all_paths_old(graph, start, end, min_length, max_length):
+    """
+    The old all_paths search, using the link dictionaries and lists of signed segment numbers.
+    """
+    if start not in graph.forward_links:
+        return []
+    start_seg = graph.segments[abs(start)]
+    end_seg = graph.segments[abs(end)]
+    start_end_depth = unicycler.misc.weighted_average(start_seg.depth, end_seg.depth,
+                                                      start_seg.get_length(),
+                                                      end_seg.get_length())
+    working_paths = [[x] for x in graph.forward_links[start]]
+    final_paths = []
+    while working_paths:
+        new_working_paths = []
+        for working_path in working_paths:
+            last_seg = working_path[-1]
+            if last_seg == end:
+                potential_result = working_path[:-1]
+                if graph.get_path_length(potential_result) >= min_length:
+                    final_paths.append(potential_result)
+                    if len(final_paths) > unicycler.settings.ALL_PATH_SEARCH_MAX_FINAL_PATHS:
+                        raise unicycler.path_finding.TooManyPaths
+            elif graph.get_path_length(working_path) <= max_length and \
+                    last_seg in graph.forward_links:
+                for next_seg in graph.forward_links[last_seg]:
+                    max_allowed_count = graph.max_path_segment_count(next_seg, start_end_depth)
+                    count_so_far = working_path.count(next_seg) + working_path.count(-next_seg)
+                    if count_so_far < max_allowed_count:
+                        new_working_paths.append(working_path + [next_seg])
+        if len(working_paths) > unicycler.settings.ALL_PATH_SEARCH_MAX_WORKING_PATHS:
+            raise unicycler.path_finding.TooManyPaths
+        working_paths = new_working_paths
+    return final_paths
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This script compares the wall time of loading long reads with the old two-pass approach (one pass
+to count the reads for the progress bar, a second to parse them) against Unicycler's single-pass
+loader. It scales up the sample long reads by concatenating them into a larger gzipped file.
+
+Usage (from the Unicycler repository directory):
+  python3 test/long_read_loading_benchmark.py [scale factor]
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+import gzip
+import time
+import shutil
+
+sys.path.insert(0, os.getcwd())
+import unicycler.read_ref
+import unicycler.log
+
+SAMPLE_READS = os.path.join('sample_data', 'long_reads_low_depth.fastq.gz')
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    unicycler.log.logger = unicycler.log.Log(log_filename=None, stdout_verbosity_level=0)
+
+    temp_dir = 'TEST_TEMP_' + str(os.getpid())
+    os.makedirs(temp_dir)
+    try:
+        reads = make_scaled_read_file(temp_dir, scale)
+        print('Read file: ' + reads + ' (' + str(os.path.getsize(reads)) + ' bytes)')
+
+        old_time = time_function(load_two_pass, reads)
+        new_time = time_function(load_one_pass, reads)
+        print('Two-pass load:    ' + '%.2f' % old_time + ' s')
+        print('Single-pass load: ' + '%.2f' % new_time + ' s')
+        print('Speed-up:         ' + '%.2f' % (old_time / new_time) + 'x')
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def make_scaled_read_file(temp_dir, scale):
+    """
+    Writes the sample reads out many times over, giving each copy unique read names so the
+    duplicate-name handling doesn't affect the timing.
+    """
+    with gzip.open(SAMPLE_READS, 'rt') as f:
+        sample_lines = f.read().splitlines()
+    scaled_reads = os.path.join(temp_dir, 'long_reads.fastq.gz')
+    with gzip.open(scaled_reads, 'wt') as f:
+        for i in range(scale):
+            for j, line in enumerate(sample_lines):
+                if j % 4 == 0:
+                    line = '@' + str(i) + '_' + line[1:]
+                f.write(line)
+                f.write('\n')
+    return scaled_reads
+
+
+def time_function(function, reads):
+    start_time = time.time()
+    function(reads)
+    return time.time() - start_time
+
+
+def load_two_pass(reads):
+    """
+    Replicates the old loader's behaviour: a full decompression to count reads, then the load.
+    """
+    with gzip.open(reads, 'rt') as fastq:
+        read_count = sum(1 for _ in fastq) // 4
+    assert read_count > 0
+    return unicycler.read_ref.load_long_reads(reads, silent=True,
+                                              output_dir=os.path.dirname(reads))
+
+
+def load_one_pass(reads):
+    return unicycler.read_ref.load_long_reads(reads, silent=True,
+                                              output_dir=os.path.dirname(reads))
+
+
+if __name__ == '__main__':
+    main()
@@ -24,6 +24,7 @@ import sys
 sys.path.insert(0, os.getcwd())
 import unicycler.assembly_graph
 import unicycler.misc
+import unicycler.seq_utils
 import unicycler.log
 import test.fake_reads
 
@@ -75,14 +76,14 @@ def test_overlap_removal():
 
 
 def make_repeaty_sequence(length, repeat_count):
-    seq = unicycler.misc.get_random_sequence(length)
+    seq = unicycler.seq_utils.get_random_sequence(length)
     for i in range(repeat_count):
         repeat_length = random.randint(10, 500)
         repeat_instances = random.randint(2, 20)
-        repeat_seq = unicycler.misc.get_random_sequence(repeat_length)
+        repeat_seq = unicycler.seq_utils.get_random_sequence(repeat_length)
         for j in range(repeat_instances):
             if random.randint(0, 1) == 1:
-                repeat_seq = unicycler.misc.reverse_complement(repeat_seq)
+                repeat_seq = unicycler.seq_utils.reverse_complement(repeat_seq)
             repeat_pos = random.randint(0, length-repeat_length)
             seq = seq[:repeat_pos] + repeat_seq + seq[repeat_pos + repeat_length:]
             assert len(seq) == length
@@ -0,0 +1,123 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This script measures the distance-bounded pruning in the bridge path searches. It generates a
+graph of long unique segments in a chain, where each gap between two unique segments is crossed by
+a small tangle of short repeat segments, some of which also lead off into dead-end loops. It then
+runs all_paths across every gap with and without pruning (without pruning is the old behaviour)
+and reports the time taken and how many searches gave up with too many paths.
+
+Usage (from the Unicycler repository directory):
+  python3 test/path_pruning_benchmark.py [gap count]
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+
+sys.path.insert(0, os.getcwd())
+import unicycler.assembly_graph
+import unicycler.path_finding
+
+TANGLE_SIZE = 6
+DEAD_END_SIZE = 4
+MAX_LENGTH = 2000
+
+
+def main():
+    gap_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    random.seed(0)
+
+    temp_dir = 'TEST_TEMP_' + str(os.getpid())
+    os.makedirs(temp_dir)
+    try:
+        gfa = os.path.join(temp_dir, 'graph.gfa')
+        gaps = write_graph(gfa, gap_count)
+        graph = unicycler.assembly_graph.AssemblyGraph(gfa, 0)
+        print('Graph: ' + str(len(graph.segments)) + ' segments, ' +
+              str(sum(len(x) for x in graph.forward_links.values())) + ' links')
+
+        get_min_distances_to = unicycler.path_finding.get_min_distances_to
+        unicycler.path_finding.get_min_distances_to = lambda *args: None
+        start_time = time.time()
+        old_paths = [all_paths_or_none(graph, s, e) for s, e in gaps]
+        old_time = time.time() - start_time
+
+        unicycler.path_finding.get_min_distances_to = get_min_distances_to
+        start_time = time.time()
+        new_paths = [all_paths_or_none(graph, s, e) for s, e in gaps]
+        new_time = time.time() - start_time
+
+        assert all(old is None or old == new for old, new in zip(old_paths, new_paths))
+        print('all_paths (' + str(len(gaps)) + ' searches)')
+        print('  without pruning: ' + '%.2f' % old_time + ' s, ' +
+              str(old_paths.count(None)) + ' with too many paths')
+        print('  with pruning:    ' + '%.2f' % new_time + ' s, ' +
+              str(new_paths.count(None)) + ' with too many paths')
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def all_paths_or_none(graph, start, end):
+    try:
+        return unicycler.path_finding.all_paths(graph, start, end, 0, MAX_LENGTH)
+    except unicycler.path_finding.TooManyPaths:
+        return None
+
+
+def write_graph(filename, gap_count):
+    """
+    Writes the graph and returns the (start, end) unique segments of each gap.
+    """
+    segments, links, gaps = [], set(), []
+    seg_num = 1
+    segments.append((seg_num, random.randint(5000, 20000), 1.0))
+    for _ in range(gap_count):
+        start = seg_num
+        tangle = list(range(seg_num + 1, seg_num + 1 + TANGLE_SIZE))
+        dead_end = list(range(tangle[-1] + 1, tangle[-1] + 1 + DEAD_END_SIZE))
+        end = dead_end[-1] + 1
+        seg_num = end
+        for t in tangle:
+            segments.append((t, random.randint(50, 300), 3.0))
+        for d in dead_end:
+            segments.append((d, random.randint(20, 60), 5.0))
+        segments.append((end, random.randint(5000, 20000), 1.0))
+
+        # The tangle is a chain from start to end with extra random links back and forth.
+        links.add((start, tangle[0]))
+        for t_1, t_2 in zip(tangle, tangle[1:]):
+            links.add((t_1, t_2))
+        links.add((tangle[-1], end))
+        for t in tangle:
+            links.add((t, random.choice(tangle)))
+
+        # Some tangle segments also lead into a loop of short segments which goes nowhere.
+        for t in random.sample(tangle, 2):
+            links.add((t, dead_end[0]))
+        for d in dead_end:
+            links.add((d, random.choice(dead_end)))
+            links.add((d, random.choice(dead_end)))
+        gaps.append((start, end))
+
+    with open(filename, 'wt') as gfa:
+        for num, length, depth in segments:
+            gfa.write('S\t' + str(num) + '\t' + 'A' * length + '\tdp:f:' + str(depth) + '\n')
+        for start, end in sorted(links):
+            gfa.write('L\t' + str(start) + '\t+\t' + str(end) + '\t+\t0M\n')
+    return gaps
+
+
+if __name__ == '__main__':
+    main()
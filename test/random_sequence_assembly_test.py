@@ -25,6 +25,7 @@ sys.path.insert(0, os.getcwd())
 import unicycler.unicycler
 import unicycler.assembly_graph
 import unicycler.misc
+import unicycler.seq_utils
 import test.fake_reads
 
 col_widths = [22, 10, 9, 80]
@@ -109,7 +110,7 @@ def get_assembly_fasta_and_graph(out_dir):
 
 
 def sequence_matches_any_rotation(seq_1, seq_2):
-    seq_1_rev_comp = unicycler.misc.reverse_complement(seq_1)
+    seq_1_rev_comp = unicycler.seq_utils.reverse_complement(seq_1)
     for i in range(len(seq_1)):
         rotated_seq = seq_1[i:] + seq_1[:i]
         if seq_2 == rotated_seq:
@@ -122,7 +123,7 @@ def sequence_matches_any_rotation(seq_1, seq_2):
 
 def test_circular_no_repeat():
     random_seq_length = random.randint(8, 20) ** 4
-    random_seq = unicycler.misc.get_random_sequence(random_seq_length)
+    random_seq = unicycler.seq_utils.get_random_sequence(random_seq_length)
     out_dir = test.fake_reads.make_fake_reads(random_seq)
     stdout, stderr, cmd_string, ms = run_unicycler(out_dir)
     assert bool(stderr) is False, stderr
@@ -145,11 +146,11 @@ def test_circular_no_repeat():
 
 def test_circular_one_repeat():
     random_seq_length = random.randint(9, 20) ** 4
-    repeat = unicycler.misc.get_random_sequence(500)
+    repeat = unicycler.seq_utils.get_random_sequence(500)
     non_repeat_length_1 = (random_seq_length - 1000) // 2
     non_repeat_length_2 = random_seq_length - 1000 - non_repeat_length_1
-    seq_1 = unicycler.misc.get_random_sequence(non_repeat_length_1)
-    seq_2 = unicycler.misc.get_random_sequence(non_repeat_length_2)
+    seq_1 = unicycler.seq_utils.get_random_sequence(non_repeat_length_1)
+    seq_2 = unicycler.seq_utils.get_random_sequence(non_repeat_length_2)
     random_seq = seq_1 + repeat + seq_2 + repeat
     out_dir = test.fake_reads.make_fake_reads(random_seq)
     stdout, stderr, cmd_string, ms = run_unicycler(out_dir)
@@ -178,11 +179,11 @@ def test_circular_one_repeat():
     if 1 in repeat_forward_links:
         s_1 = seq_1
     else:
-        s_1 = unicycler.misc.reverse_complement(seq_1)
+        s_1 = unicycler.seq_utils.reverse_complement(seq_1)
     if 2 in repeat_forward_links:
         s_2 = seq_2
     else:
-        s_2 = unicycler.misc.reverse_complement(seq_2)
+        s_2 = unicycler.seq_utils.reverse_complement(seq_2)
     assembled_seq = s_1 + seq_3 + s_2 + seq_3
 
     assert len(assembled_seq) == random_seq_length
@@ -198,7 +199,7 @@ def test_circular_one_repeat():
 def test_stdout_size():
     stdout_sizes = []
     random_seq_length = random.randint(1000, 5000)
-    random_seq = unicycler.misc.get_random_sequence(random_seq_length)
+    random_seq = unicycler.seq_utils.get_random_sequence(random_seq_length)
 
     read_config_choice = random.randint(0, 2)
     options = get_random_options()
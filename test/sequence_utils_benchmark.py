@@ -0,0 +1,85 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This script compares the speed of the old per-base sequence functions (a dictionary lookup for
+each base) against the str.translate-based functions in unicycler/seq_utils.py. Times are
+reported per megabase.
+
+Usage (from the Unicycler repository directory):
+  python3 test/sequence_utils_benchmark.py [Mbp]
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.getcwd())
+import unicycler.seq_utils
+
+
+def main():
+    mbp = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    random.seed(0)
+    seq = unicycler.seq_utils.get_random_sequence(mbp * 1000000)
+    homopolymer = 'A' * (mbp * 1000000)
+
+    print('Function            Old (ms/Mbp)   New (ms/Mbp)   Speed-up')
+    compare('reverse_complement', old_reverse_complement,
+            unicycler.seq_utils.reverse_complement, seq, mbp)
+    compare('is_homopolymer', old_is_homopolymer, unicycler.seq_utils.is_homopolymer,
+            homopolymer, mbp)
+    compare('get_random_sequence', old_get_random_sequence,
+            unicycler.seq_utils.get_random_sequence, mbp * 1000000, mbp, check_equal=False)
+
+
+def compare(name, old_function, new_function, arg, mbp, check_equal=True):
+    start_time = time.time()
+    old_result = old_function(arg)
+    old_time = (time.time() - start_time) * 1000.0 / mbp
+    start_time = time.time()
+    new_result = new_function(arg)
+    new_time = (time.time() - start_time) * 1000.0 / mbp
+    if check_equal:
+        assert old_result == new_result
+    print(name.ljust(20) + ('%.1f' % old_time).rjust(12) + ('%.1f' % new_time).rjust(15) +
+          ('%.1f' % (old_time / new_time)).rjust(10) + 'x')
+
+
+def old_reverse_complement(seq):
+    return ''.join([old_complement_base(x) for x in seq][::-1])
+
+
+def old_complement_base(base):
+    try:
+        return unicycler.seq_utils.REV_COMP_DICT[base]
+    except KeyError:
+        return 'N'
+
+
+def old_is_homopolymer(seq):
+    if len(seq) == 0:
+        return False
+    first_base = seq[0].lower()
+    for base in seq[1:]:
+        if base.lower() != first_base:
+            return False
+    return True
+
+
+def old_get_random_sequence(length):
+    return ''.join([{0: 'A', 1: 'C', 2: 'G', 3: 'T'}[random.randint(0, 3)]
+                    for _ in range(length)])
+
+
+if __name__ == '__main__':
+    main()
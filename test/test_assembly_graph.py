@@ -14,6 +14,7 @@ not, see <http://www.gnu.org/licenses/>.
 import unittest
 import os
 import unicycler.assembly_graph
+import unicycler.bridge_long_read
 import unicycler.misc
 import unicycler.log
 
@@ -201,6 +202,37 @@ class TestAssemblyGraphFunctionsFastg(unittest.TestCase):
         self.assertEqual(link_count_1, link_count_2)
         os.remove(temp_gfa)
 
+    def test_gfa_cache(self):
+        """
+        Loads a GFA twice with the cache enabled (the first load makes the cache, the second uses
+        it) and makes sure both graphs match an uncached load.
+        """
+        temp_gfa = os.path.join(os.path.dirname(__file__), 'temp_cache.gfa')
+        cache_file = temp_gfa + unicycler.assembly_graph.GFA_CACHE_EXTENSION
+        self.graph.save_to_gfa(temp_gfa, include_insert_size=True)
+        uncached = unicycler.assembly_graph.AssemblyGraph(temp_gfa, None)
+        graph_1 = unicycler.assembly_graph.AssemblyGraph(temp_gfa, None, use_cache=True)
+        self.assertTrue(os.path.isfile(cache_file))
+        graph_2 = unicycler.assembly_graph.AssemblyGraph(temp_gfa, None, use_cache=True)
+        for graph in (graph_1, graph_2):
+            self.assertEqual(graph.overlap, 25)
+            self.assertEqual(graph.insert_size_mean, uncached.insert_size_mean)
+            self.assertEqual(graph.forward_links, uncached.forward_links)
+            self.assertEqual(graph.reverse_links, uncached.reverse_links)
+            self.assertEqual(sorted(graph.segments), sorted(uncached.segments))
+            for seg_num, segment in graph.segments.items():
+                self.assertEqual(segment.forward_sequence,
+                                 uncached.segments[seg_num].forward_sequence)
+                self.assertEqual(segment.depth, uncached.segments[seg_num].depth)
+
+        # If the GFA changes, the cache should be ignored.
+        with open(temp_gfa, 'at') as gfa:
+            gfa.write('S\t9999\tACGT\tdp:f:1.0\n')
+        graph_3 = unicycler.assembly_graph.AssemblyGraph(temp_gfa, None, use_cache=True)
+        self.assertTrue(9999 in graph_3.segments)
+        os.remove(temp_gfa)
+        os.remove(cache_file)
+
     def test_get_all_gfa_link_lines(self):
         gfa_link_lines = self.graph.get_all_gfa_link_lines()
         self.assertEqual(gfa_link_lines.count('\n'), 452)
@@ -393,6 +425,17 @@ class TestAssemblyGraphFunctionsGfa(unittest.TestCase):
         self.assertEqual(sum(len(x) for x in self.graph.forward_links.values()), 38)
         self.assertEqual(sum(len(x) for x in self.graph.reverse_links.values()), 38)
 
+    def test_get_nearby_seg_nums(self):
+        self.assertEqual(self.graph.get_nearby_seg_nums([6], 1), {11, 12})
+        self.assertEqual(self.graph.get_nearby_seg_nums([6], 2), {1, 5, 7, 8, 11, 12, 13})
+        self.assertEqual(self.graph.get_nearby_seg_nums([1, 2], 1), {3, 12})
+        self.assertEqual(self.graph.get_nearby_seg_nums([19], 2), set())
+
+    def test_remove_unbridging_segments(self):
+        self.graph.remove_unbridging_segments({6, 15})
+        self.assertEqual(sorted(self.graph.segments),
+                         [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15])
+
     def test_remove_small_dead_ends(self):
         self.graph.remove_small_dead_ends(19)
         self.assertEqual(len(self.graph.segments), 19)
@@ -493,6 +536,32 @@ class TestAssemblyGraphFunctionsGfa(unittest.TestCase):
                          'ATAGGAGTCTCGGGGATGATCAACTTTACA')
         self.assertEqual(self.graph.segments[7].forward_sequence, 'CAGATCTACTTTATATAG')
 
+    def test_merge_all_possible_paths(self):
+        self.graph.paths = {'a': [1, 2, 3, 4, 5, 6], 'b': [2, 3, 4],
+                            'c': [14, 13, 12, 6], 'd': [7, 9]}
+        self.graph.merge_all_possible(None, 2)
+        merged_1 = self.graph.paths['a'][0]
+        self.assertEqual(self.graph.segments[merged_1].forward_sequence,
+                         'TTCTATTTTGCAACTGAATTGGCTTATCTTGCACGACATGATGACCCGCG')
+        self.assertEqual(len(self.graph.paths['a']), 2)
+        self.assertTrue('b' not in self.graph.paths)
+        self.assertEqual(len(self.graph.paths['c']), 2)
+        self.assertEqual(self.graph.get_path_sequence(self.graph.paths['c'][:1]),
+                         'CAGATCTACTTTATATAG')
+        self.assertTrue('d' not in self.graph.paths)
+
+    def test_merge_segments_in_graph_paths(self):
+        merges = [([1, 2, 3], 20), ([5, 6], 21)]
+        paths = {'a': [8, 1, 2, 3, 4], 'b': [2, 3, 4], 'c': [-3, -2, -1, 9],
+                 'd': [9, 5, 6, 1, 2, 3, 8], 'e': [4, 1, 2, 9, 5, 6], 'f': [7, 8, 1, 9, 10],
+                 'g': [7, 8, 1, 9, 10, 5, 11, 12], 'h': [4]}
+        self.assertEqual(unicycler.assembly_graph.merge_segments_in_graph_paths(paths, merges),
+                         {'a': [8, 20, 4], 'c': [-20, 9], 'd': [9, 21, 20, 8], 'e': [9, 21],
+                          'f_1': [7, 8], 'f_2': [9, 10],
+                          'g_1': [7, 8], 'g_2_1': [9, 10], 'g_2_2': [11, 12]})
+        self.assertEqual(unicycler.assembly_graph.merge_segments_in_graph_paths(paths, []),
+                         paths)
+
     def test_get_simple_path(self):
         self.assertEqual(self.graph.get_simple_path(1, None, 2), [1, 2, 3, 4, 5])
         self.assertEqual(self.graph.get_simple_path(2, None, 2), [1, 2, 3, 4, 5])
@@ -731,6 +800,49 @@ class TestAssemblyGraphFunctionsGfa(unittest.TestCase):
         self.assertEqual(self.graph.dead_end_change_if_path_deleted([12, 13, 14]), 2)
         self.assertEqual(self.graph.dead_end_change_if_path_deleted([-14, -13, -12]), 2)
 
+    def make_long_read_bridge(self, start, end, path, quality):
+        bridge = unicycler.bridge_long_read.LongReadBridge(self.graph, start, end)
+        bridge.graph_path = path
+        bridge.all_paths = [(path, 0.0, 0, 100.0)]
+        bridge.bridge_sequence = ''.join(self.graph.segments[x].forward_sequence for x in path)
+        bridge.quality = quality
+        return bridge
+
+    def test_apply_bridges(self):
+        bridge_1 = self.make_long_read_bridge(1, 15, [2, 3, 4, 5, 11, 8], 90.0)
+
+        # This bridge starts in bridge 1's path and bridge 1 ends in its path, so it can't be used.
+        bridge_2 = self.make_long_read_bridge(4, 18, [15, 17], 80.0)
+
+        # This bridge starts in bridge 1's path, but bridge 1 doesn't start or end in its path.
+        bridge_3 = self.make_long_read_bridge(3, 7, [9], 70.0)
+
+        # This bridge's quality is too low.
+        bridge_4 = self.make_long_read_bridge(12, 14, [13], 5.0)
+
+        seg_nums_used_in_bridges = self.graph.apply_bridges([bridge_4, bridge_3, bridge_2,
+                                                             bridge_1], 1, 10.0)
+        self.assertEqual(seg_nums_used_in_bridges, {2, 3, 4, 5, 8, 9, 11})
+        bridge_segs = [x for x in self.graph.segments.values() if x.bridge is not None]
+        self.assertEqual(sorted(x.bridge.start_segment for x in bridge_segs), [1, 3])
+
+    def test_topology_snapshot(self):
+        snapshot = self.graph.get_topology_snapshot()
+        path = [2, 3, 4, 5, 11, 8]
+        path_sequence = self.graph.get_path_sequence(path)
+        self.assertEqual(snapshot.get_path_sequence(path), path_sequence)
+        self.assertIs(snapshot.segments[1].forward_sequence,
+                      self.graph.segments[1].forward_sequence)
+
+        # Changing the graph doesn't change the snapshot.
+        self.graph.remove_link(4, 5)
+        self.graph.segments[2].depth = 0.5
+        self.graph.segments[3].forward_sequence = 'ACGT'
+        self.assertEqual(snapshot.get_path_sequence(path), path_sequence)
+        self.assertNotEqual(snapshot.segments[2].depth, 0.5)
+        self.assertIn(5, snapshot.forward_links[4])
+        self.assertNotIn(4, self.graph.forward_links)
+
 
 class TestRepairMultiwayJunction(unittest.TestCase):
     """
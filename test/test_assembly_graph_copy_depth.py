@@ -13,8 +13,11 @@ not, see <http://www.gnu.org/licenses/>.
 
 import unittest
 import os
+import random
 import unicycler.assembly_graph
 import unicycler.assembly_graph_copy_depth
+from unicycler.assembly_graph_copy_depth import get_best_arrangement, shuffle_into_bins, \
+    get_error, TooManySteps
 
 
 class TestCopyDepth(unittest.TestCase):
@@ -92,3 +95,52 @@ class TestCopyDepth(unittest.TestCase):
         self.assertEqual(len(self.graph.copy_depths[308]), 3)
         self.assertEqual(len(self.graph.copy_depths[9]), 1)
         self.assertEqual(len(self.graph.copy_depths[10]), 2)
+
+
+def get_best_arrangement_exhaustively(items, bin_depths, targets):
+    best_arrangement, lowest_error = None, None
+    for arrangement in shuffle_into_bins(items, [[] for _ in bin_depths], targets):
+        error = 0.0
+        for depths, bin_depth in zip(arrangement, bin_depths):
+            error = max(error, get_error(sum(depths), bin_depth))
+        if best_arrangement is None or error < lowest_error:
+            best_arrangement, lowest_error = arrangement, error
+    return best_arrangement, lowest_error
+
+
+class TestBestArrangement(unittest.TestCase):
+
+    def test_simple_split(self):
+        arrangement, error = get_best_arrangement([2.0, 1.0], [2.1, 0.9], [None, None])
+        self.assertEqual(arrangement, [[2.0], [1.0]])
+        self.assertAlmostEqual(error, 0.1 / 0.9)
+
+    def test_no_arrangements(self):
+        self.assertEqual(get_best_arrangement([1.0], [1.0, 1.0], [None, None]), (None, None))
+        self.assertEqual(get_best_arrangement([1.0, 1.0], [2.0], [1]), (None, None))
+
+    def test_matches_exhaustive_search(self):
+        """
+        The branch-and-bound search should give the same arrangement (including which of any
+        equally good arrangements) as scoring every arrangement from shuffle_into_bins.
+        """
+        random.seed(0)
+        for _ in range(2000):
+            items = sorted([random.choice([1.0, 1.0, 2.0, random.uniform(0.5, 3.0)])
+                            for _ in range(random.randint(0, 6))], reverse=True)
+            bin_depths = [random.uniform(0.5, 6.0) for _ in range(random.randint(1, 4))]
+            targets = [random.choice([None, None, 1, 2]) for _ in bin_depths]
+            self.assertEqual(get_best_arrangement(items, bin_depths, targets),
+                             get_best_arrangement_exhaustively(items, bin_depths, targets))
+
+    def test_many_copies(self):
+        items = [1.0] * 12
+        bin_depths = [3.0, 2.0, 4.0, 1.0, 2.0]
+        arrangement, error = get_best_arrangement(items, bin_depths, [None] * 5, max_steps=1000)
+        self.assertEqual([len(x) for x in arrangement], [3, 2, 4, 1, 2])
+        self.assertEqual(error, 0.0)
+
+    def test_too_many_steps(self):
+        items = [3.0, 2.9, 2.8, 2.7, 2.6, 2.5, 2.4, 2.3, 2.2, 2.1]
+        with self.assertRaises(TooManySteps):
+            get_best_arrangement(items, [1.0] * 9 + [100.0], [None] * 10, max_steps=100)
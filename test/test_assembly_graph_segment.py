@@ -0,0 +1,84 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import copy
+import pickle
+import unittest
+from unicycler.assembly_graph_segment import Segment
+from unicycler.seq_utils import reverse_complement
+
+
+class TestSegmentStrands(unittest.TestCase):
+
+    def setUp(self):
+        self.segment = Segment(1, 1.0, 'AACGTTGCA', True)
+
+    def check_strands(self, expected_forward):
+        self.assertEqual(self.segment.forward_sequence, expected_forward)
+        self.assertEqual(self.segment.reverse_sequence, reverse_complement(expected_forward))
+        self.assertEqual(self.segment.get_length(), len(expected_forward))
+
+    def test_reverse_strand_is_lazy(self):
+        self.assertIsNone(self.segment._reverse_sequence)
+        self.check_strands('AACGTTGCA')
+        self.assertIsNotNone(self.segment._reverse_sequence)
+
+    def test_negative_strand_only(self):
+        self.segment = Segment(1, 1.0, 'TGCAACGTT', False)
+        self.check_strands('AACGTTGCA')
+
+    def test_add_sequence(self):
+        self.segment = Segment(1, 1.0, 'TGCAACGTT', False)
+        self.segment.add_sequence('AACGTTGCA', True)
+        self.assertIsNone(self.segment._reverse_sequence)
+        self.check_strands('AACGTTGCA')
+
+    def test_trim_from_end(self):
+        self.segment.reverse_sequence  # build the cache so it must be invalidated
+        self.segment.trim_from_end(2)
+        self.check_strands('AACGTTG')
+
+    def test_trim_from_start(self):
+        self.segment.reverse_sequence
+        self.segment.trim_from_start(3)
+        self.check_strands('GTTGCA')
+
+    def test_append_and_prepend(self):
+        self.segment.reverse_sequence
+        self.segment.append_to_forward_sequence('GG')
+        self.check_strands('AACGTTGCAGG')
+        self.segment.append_to_reverse_sequence('TT')
+        self.check_strands('AAAACGTTGCAGG')
+        self.segment.prepend_to_forward_sequence('C')
+        self.check_strands('CAAAACGTTGCAGG')
+        self.segment.prepend_to_reverse_sequence('A')
+        self.check_strands('CAAAACGTTGCAGGT')
+
+    def test_remove_sequence(self):
+        self.segment.reverse_sequence
+        self.segment.remove_sequence()
+        self.check_strands('')
+
+    def test_rotate_sequence(self):
+        self.segment.reverse_sequence
+        self.segment.rotate_sequence(3, False)
+        self.check_strands('GTTGCAAAC')
+        self.segment.rotate_sequence(3, True)
+        self.check_strands(reverse_complement('GCAAACGTT'))
+
+    def test_copies_only_hold_one_strand(self):
+        self.segment.reverse_sequence
+        for segment_copy in [copy.deepcopy(self.segment),
+                             pickle.loads(pickle.dumps(self.segment))]:
+            self.assertIsNone(segment_copy._reverse_sequence)
+            self.assertEqual(segment_copy.reverse_sequence, self.segment.reverse_sequence)
@@ -0,0 +1,212 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import shutil
+import unittest
+import unicycler.alignment
+import unicycler.assembly_graph
+import unicycler.bridge_long_read
+from unicycler.bridge_long_read import LongReadBridge, finalise_long_read_bridges
+from unicycler.bridge_cache import BridgeCache
+from unicycler.bridge_time_model import BridgeTimeModel
+
+
+class SpanAlignment(object):
+    """
+    Just the parts of an Alignment (of a spanning read to a start or end segment) that bridge
+    finalisation uses.
+    """
+    def __init__(self, aligned_ref_length):
+        self.scaled_score = 95.0
+        self.aligned_ref_length = aligned_ref_length
+
+    def get_read_to_ref_ratio(self):
+        return 1.0
+
+    def get_aligned_ref_length(self):
+        return self.aligned_ref_length
+
+
+class BridgeTestCase(unittest.TestCase):
+    """
+    Makes a few long read bridges in the test graph, each with two reads matching its true path.
+    """
+    def setUp(self):
+        test_gfa = os.path.join(os.path.dirname(__file__), 'test_assembly_graph.gfa')
+        self.graph = unicycler.assembly_graph.AssemblyGraph(test_gfa, 0)
+        scoring_scheme = unicycler.alignment.AlignmentScoringScheme('3,-6,-5,-2')
+        self.finalise_args = (scoring_scheme, 50, {5000: 100},
+                              self.graph.get_total_length(), False, 0.0)
+        self.bridge_paths = {(1, 12): [2, 3, 4, 5, 11, 7, 9, 10, 15, 14, 13],
+                             (1, 15): [2, 3, 4, 5, 11, 8],
+                             (1, 18): [2, 3, 4, 5, 11, 8, 15]}
+
+    def make_bridges(self):
+        bridges = []
+        for (start, end), path in sorted(self.bridge_paths.items()):
+            bridge = LongReadBridge(self.graph, start, end)
+            sequence = self.graph.get_path_sequence(path)
+            start_alignment = SpanAlignment(self.graph.segments[start].get_length())
+            end_alignment = SpanAlignment(self.graph.segments[end].get_length())
+            bridge.reads = [(sequence, '+' * len(sequence), start_alignment, end_alignment)] * 2
+            bridges.append(bridge)
+        return bridges
+
+    def finalise(self, threads, use_processes):
+        bridges = self.make_bridges()
+        outputs = list(finalise_long_read_bridges(bridges, threads, use_processes,
+                                                  self.finalise_args))
+        self.assertEqual(len(outputs), len(bridges))
+        return bridges
+
+    def check_bridges(self, bridges):
+        for bridge in bridges:
+            path = self.bridge_paths[(bridge.start_segment, bridge.end_segment)]
+            self.assertEqual(bridge.graph_path, path)
+            self.assertEqual(bridge.all_paths[0][0], path)
+            self.assertEqual(bridge.bridge_sequence, self.graph.get_path_sequence(path))
+            self.assertGreater(bridge.quality, 0.0)
+            self.assertFalse(bridge.timed_out)
+
+
+class TestFinaliseLongReadBridges(BridgeTestCase):
+
+    def test_one_thread(self):
+        self.check_bridges(self.finalise(1, False))
+
+    def test_threads(self):
+        self.check_bridges(self.finalise(2, False))
+
+    def test_processes(self):
+        bridges = self.finalise(2, True)
+        self.check_bridges(bridges)
+        for bridge, thread_bridge in zip(bridges, self.finalise(1, False)):
+            self.assertEqual(bridge.get_finalised_state(), thread_bridge.get_finalised_state())
+            self.assertTrue(bridge.consensus_sequence)
+            self.assertEqual(bridge.consensus_sequence, thread_bridge.consensus_sequence)
+            self.assertIsNotNone(bridge.finalise_times)
+        self.assertIsNone(unicycler.bridge_long_read.FORKED_BRIDGES)
+
+    def test_complexity_only_when_used(self):
+        bridge = self.make_bridges()[0]
+        bridge.predicted_time_to_finalise()
+        self.assertIsNone(bridge.complexity)
+        time_model = BridgeTimeModel(path_coefficients=[0.0, 0.0, 1.0])
+        self.assertGreater(bridge.predicted_time_to_finalise(time_model), 0.0)
+        self.assertGreater(bridge.complexity, 0)
+        self.assertEqual(bridge.get_time_features()[3], bridge.complexity)
+
+
+class TestBridgeCache(BridgeTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.temp_dir = 'TEST_TEMP_' + str(os.getpid())
+        os.makedirs(self.temp_dir)
+        self.cache_filename = os.path.join(self.temp_dir, 'long_read_bridges.cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def fill_cache(self):
+        cache = BridgeCache(self.cache_filename, self.graph, self.finalise_args)
+        bridges = self.make_bridges()
+        for bridge, output in finalise_long_read_bridges(bridges, 1, False, self.finalise_args):
+            cache.add(bridge, output)
+        return bridges
+
+    def test_load_from_cache(self):
+        finalised_bridges = self.fill_cache()
+        cache = BridgeCache(self.cache_filename, self.graph, self.finalise_args)
+        for finalised_bridge, bridge in zip(finalised_bridges, self.make_bridges()):
+            state, output = cache.get(bridge)
+            self.assertEqual(state, finalised_bridge.get_finalised_state())
+            bridge.set_finalised_state(state)
+            self.assertEqual(bridge.consensus_sequence, finalised_bridge.consensus_sequence)
+            self.check_bridges([bridge])
+
+    def test_cache_from_processes(self):
+        cache = BridgeCache(self.cache_filename, self.graph, self.finalise_args)
+        for bridge, output in finalise_long_read_bridges(self.make_bridges(), 2, True,
+                                                         self.finalise_args):
+            cache.add(bridge, output)
+        cache = BridgeCache(self.cache_filename, self.graph, self.finalise_args)
+        for bridge in self.make_bridges():
+            state, output = cache.get(bridge)
+            bridge.set_finalised_state(state)
+            self.assertTrue(bridge.consensus_sequence)
+            self.check_bridges([bridge])
+
+    def test_different_reads_not_in_cache(self):
+        self.fill_cache()
+        cache = BridgeCache(self.cache_filename, self.graph, self.finalise_args)
+        bridge = self.make_bridges()[0]
+        bridge.reads = bridge.reads[:1]
+        self.assertIsNone(cache.get(bridge))
+
+    def test_different_settings_not_in_cache(self):
+        self.fill_cache()
+        finalise_args = (self.finalise_args[0], 100) + self.finalise_args[2:]
+        cache = BridgeCache(self.cache_filename, self.graph, finalise_args)
+        self.assertTrue(all(cache.get(x) is None for x in self.make_bridges()))
+
+    def test_different_copy_depths_not_in_cache(self):
+        self.fill_cache()
+        self.graph.copy_depths[1] = [self.graph.segments[1].depth]
+        cache = BridgeCache(self.cache_filename, self.graph, self.finalise_args)
+        self.assertTrue(all(cache.get(x) is None for x in self.make_bridges()))
+
+    def test_save_drops_other_runs(self):
+        self.fill_cache()
+        finalise_args = (self.finalise_args[0], 100) + self.finalise_args[2:]
+        cache = BridgeCache(self.cache_filename, self.graph, finalise_args)
+        bridges = self.make_bridges()
+        cache.get(bridges[0])
+        bridge = bridges[1]
+        cache.add(bridge, bridge.finalise(*finalise_args))
+        cache.save()
+        cache = BridgeCache(self.cache_filename, self.graph, finalise_args)
+        self.assertEqual(len(cache.results), 1)
+        self.assertIsNotNone(cache.get(bridge))
+        cache = BridgeCache(self.cache_filename, self.graph, self.finalise_args)
+        self.assertTrue(all(cache.get(x) is None for x in self.make_bridges()))
+
+    def test_save_keeps_loaded_results(self):
+        self.fill_cache()
+        cache = BridgeCache(self.cache_filename, self.graph, self.finalise_args)
+        for bridge in self.make_bridges():
+            self.assertIsNotNone(cache.get(bridge))
+        cache.save()
+        cache = BridgeCache(self.cache_filename, self.graph, self.finalise_args)
+        self.assertEqual(len(cache.results), 3)
+        self.assertTrue(all(cache.get(x) is not None for x in self.make_bridges()))
+
+    def test_timed_out_bridge_not_cached(self):
+        cache = BridgeCache(self.cache_filename, self.graph, self.finalise_args)
+        bridge = self.make_bridges()[0]
+        output = bridge.finalise(*self.finalise_args)
+        bridge.timed_out = True
+        cache.add(bridge, output)
+        self.assertIsNone(cache.get(bridge))
+        self.assertFalse(os.path.isfile(self.cache_filename))
+
+    def test_truncated_cache(self):
+        self.fill_cache()
+        with open(self.cache_filename, 'rb') as cache_file:
+            cache_data = cache_file.read()
+        with open(self.cache_filename, 'wb') as cache_file:
+            cache_file.write(cache_data[:-10])
+        cache = BridgeCache(self.cache_filename, self.graph, self.finalise_args)
+        found = [cache.get(x) is not None for x in self.make_bridges()]
+        self.assertEqual(found, [True, True, False])
@@ -0,0 +1,98 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import random
+import shutil
+import unittest
+import unicycler.settings
+from unicycler.bridge_time_model import BridgeTimeModel, load_time_profile, \
+    append_to_time_profile, load_bridge_time_model
+
+
+def make_records(count, consensus_coefficients, path_coefficients):
+    random.seed(0)
+    records = []
+    for _ in range(count):
+        seq_count = random.randint(1, 10)
+        mean_seq_length = random.uniform(100.0, 20000.0)
+        total_seq_length = seq_count * mean_seq_length
+        complexity = random.randint(0, 200)
+        model = BridgeTimeModel(consensus_coefficients, path_coefficients)
+        consensus_time = model.predict((total_seq_length, seq_count, 0.0, 0))
+        path_time = model.predict((0.0, 1, mean_seq_length, complexity))
+        records.append((total_seq_length, seq_count, mean_seq_length, complexity,
+                        consensus_time, path_time))
+    return records
+
+
+class TestBridgeTimeModel(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = 'TEST_TEMP_' + str(os.getpid())
+        os.makedirs(self.temp_dir)
+        self.profile = os.path.join(self.temp_dir, 'bridge_times.tsv')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_default_prediction(self):
+        model = BridgeTimeModel()
+        self.assertAlmostEqual(model.predict((3000, 3, 1000.0, 50)),
+                               1.34e-9 * 3000 ** 2 + 2.76e-5 * 3000 +
+                               1.78e-7 * 1000 ** 2 + 3.75e-3 * 1000)
+
+    def test_single_read_has_no_consensus_time(self):
+        model = BridgeTimeModel()
+        self.assertAlmostEqual(model.predict((1000, 1, 1000.0, 50)),
+                               1.78e-7 * 1000 ** 2 + 3.75e-3 * 1000)
+
+    def test_fit_recovers_coefficients(self):
+        consensus_coefficients = [2.0e-9, 1.0e-5]
+        path_coefficients = [3.0e-7, 1.0e-3, 2.0e-5]
+        model = BridgeTimeModel()
+        model.fit(make_records(100, consensus_coefficients, path_coefficients))
+        self.assertEqual(model.record_count, 100)
+        for fit, actual in zip(model.consensus_coefficients + model.path_coefficients,
+                               consensus_coefficients + path_coefficients):
+            self.assertAlmostEqual(fit / actual, 1.0, places=4)
+
+    def test_fit_needs_enough_records(self):
+        model = BridgeTimeModel()
+        model.fit(make_records(unicycler.settings.BRIDGE_TIME_MODEL_MIN_RECORDS - 1,
+                               [2.0e-9, 1.0e-5], [3.0e-7, 1.0e-3, 2.0e-5]))
+        self.assertEqual(model.record_count, 0)
+        self.assertEqual(model.path_coefficients,
+                         unicycler.settings.DEFAULT_PATH_TIME_COEFFICIENTS)
+
+    def test_fit_has_no_negative_coefficients(self):
+        model = BridgeTimeModel()
+        model.fit([(float(x), 1, float(x), 0, 0.0, 10.0 - 0.001 * x)
+                   for x in range(100, 5100, 100)])
+        self.assertTrue(all(x >= 0.0 for x in model.path_coefficients))
+
+    def test_profile_round_trip(self):
+        self.assertEqual(load_time_profile(self.profile), [])
+        records = make_records(30, [2.0e-9, 1.0e-5], [3.0e-7, 1.0e-3, 2.0e-5])
+        append_to_time_profile(self.profile, records[:10])
+        append_to_time_profile(self.profile, records[10:])
+        loaded = load_time_profile(self.profile)
+        self.assertEqual(len(loaded), 30)
+        for loaded_record, record in zip(loaded, records):
+            for loaded_value, value in zip(loaded_record, record):
+                self.assertAlmostEqual(loaded_value, value)
+        self.assertEqual(load_bridge_time_model(self.profile).record_count, 30)
+
+    def test_no_profile(self):
+        self.assertEqual(load_bridge_time_model(None).record_count, 0)
+        self.assertEqual(load_bridge_time_model(self.profile).record_count, 0)
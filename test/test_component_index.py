@@ -0,0 +1,56 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import unittest
+import os
+import random
+import unicycler.assembly_graph
+from unicycler.assembly_graph_segment import Segment
+from .test_link_index import components_by_search
+
+
+class TestComponentIndex(unittest.TestCase):
+
+    def setUp(self):
+        test_gfa = os.path.join(os.path.dirname(__file__), 'test_assembly_graph.gfa')
+        self.graph = unicycler.assembly_graph.AssemblyGraph(test_gfa, 0)
+
+    def test_components_kept_up_to_date(self):
+        random.seed(0)
+        self.assertEqual(self.graph.get_connected_components(), components_by_search(self.graph))
+        component_index = self.graph.component_index
+        for _ in range(200):
+            seg_nums = sorted(self.graph.segments)
+            choice = random.random()
+            if choice < 0.35 and len(seg_nums) > 5:
+                self.graph.remove_segments(random.sample(seg_nums, random.randint(1, 3)))
+            elif choice < 0.65:
+                start, end = random.choice(seg_nums), random.choice(seg_nums)
+                self.graph.add_link(start * random.choice([1, -1]), end * random.choice([1, -1]))
+            elif choice < 0.9:
+                links = [(s, e) for s, ends in self.graph.forward_links.items() for e in ends]
+                if links:
+                    self.graph.remove_link(*random.choice(links))
+            else:
+                new_num = self.graph.get_next_available_seg_number()
+                self.graph.segments[new_num] = Segment(new_num, 1.0, 'ACGT', True)
+            self.assertEqual(self.graph.get_connected_components(),
+                             components_by_search(self.graph))
+
+        # The same index was updated throughout, rather than being rebuilt.
+        self.assertIs(self.graph.component_index, component_index)
+
+    def test_renumber_segments(self):
+        self.graph.get_connected_components()
+        self.graph.renumber_segments()
+        self.assertEqual(self.graph.get_connected_components(), components_by_search(self.graph))
@@ -129,6 +129,126 @@ class TestPathAlignment(unittest.TestCase):
     pass
 
 
+class TestAlignmentBatch(unittest.TestCase):
+
+    def setUp(self):
+        test_fasta = os.path.join(os.path.dirname(__file__), 'test_cpp_wrappers.fasta')
+        fasta = unicycler.misc.load_fasta(test_fasta)
+        self.seqs = [x[1] for x in fasta]
+        self.scoring_scheme = unicycler.alignment.AlignmentScoringScheme('3,-6,-5,-2')
+
+    @staticmethod
+    def get_raw_and_scaled_scores(result):
+        if not result:
+            return None
+        seqan_parts = result.split(',', 9)
+        return int(seqan_parts[6]), float(seqan_parts[7])
+
+    def test_path_alignment_batch(self):
+        full_seq = self.seqs[0]
+        partial_seqs = [x[:len(x) // 2] for x in self.seqs]
+        expected = [self.get_raw_and_scaled_scores(
+                        unicycler.cpp_wrappers.path_alignment(x, full_seq, self.scoring_scheme,
+                                                              True, 500))
+                    for x in partial_seqs]
+        for threads in (1, 4):
+            scores = unicycler.cpp_wrappers.path_alignment_batch(partial_seqs, full_seq,
+                                                                 self.scoring_scheme, True, 500,
+                                                                 threads)
+            self.assertEqual(len(scores), len(expected))
+            for score, expected_score in zip(scores, expected):
+                self.assertEqual(score[0], expected_score[0])
+                self.assertAlmostEqual(score[1], expected_score[1], places=4)
+
+    def test_fully_global_alignment_batch(self):
+        sequence = self.seqs[0]
+        expected = [self.get_raw_and_scaled_scores(
+                        unicycler.cpp_wrappers.fully_global_alignment(sequence, x,
+                                                                      self.scoring_scheme,
+                                                                      True, 1000))
+                    for x in self.seqs]
+        for threads in (1, 4):
+            scores = unicycler.cpp_wrappers.fully_global_alignment_batch(sequence, self.seqs,
+                                                                         self.scoring_scheme,
+                                                                         True, 1000, threads)
+            self.assertEqual(len(scores), len(expected))
+            for score, expected_score in zip(scores, expected):
+                self.assertEqual(score[0], expected_score[0])
+                self.assertAlmostEqual(score[1], expected_score[1], places=4)
+
+    def test_empty_batch(self):
+        self.assertEqual(unicycler.cpp_wrappers.fully_global_alignment_batch(
+            self.seqs[0], [], self.scoring_scheme, True, 1000, 4), [])
+
+
+class TestGraphAlignment(unittest.TestCase):
+
+    def setUp(self):
+        test_fasta = os.path.join(os.path.dirname(__file__), 'test_cpp_wrappers.fasta')
+        fasta = unicycler.misc.load_fasta(test_fasta)
+        self.seqs = [x[1] for x in fasta]
+        self.scoring_scheme = unicycler.alignment.AlignmentScoringScheme('3,-6,-5,-2')
+        self.columns = []
+
+    def tearDown(self):
+        for column in self.columns:
+            unicycler.cpp_wrappers.delete_graph_alignment_column(column)
+
+    def align_in_pieces(self, sequence, path_seq, piece_count, band_size):
+        column = unicycler.cpp_wrappers.start_graph_alignment(sequence, self.scoring_scheme,
+                                                              -band_size, band_size)
+        self.columns.append(column)
+        piece_size = len(path_seq) // piece_count + 1
+        for i in range(0, len(path_seq), piece_size):
+            column = unicycler.cpp_wrappers.extend_graph_alignment(column,
+                                                                   path_seq[i:i + piece_size])
+            self.columns.append(column)
+        return column
+
+    def test_matches_fully_global_alignment(self):
+        for seq_1, seq_2 in [(0, 1), (0, 2), (3, 4), (11, 12), (12, 11)]:
+            result = unicycler.cpp_wrappers.fully_global_alignment(self.seqs[seq_1],
+                                                                    self.seqs[seq_2],
+                                                                    self.scoring_scheme,
+                                                                    False, 1000)
+            raw_score = int(result.split(',', 9)[6])
+            for piece_count in (1, 3, 10):
+                column = self.align_in_pieces(self.seqs[seq_1], self.seqs[seq_2], piece_count,
+                                              1000)
+                self.assertEqual(unicycler.cpp_wrappers.get_graph_alignment_score(column),
+                                 raw_score)
+
+    def test_bound(self):
+        sequence = self.seqs[0]
+        column = unicycler.cpp_wrappers.start_graph_alignment(sequence, self.scoring_scheme,
+                                                              -100, 100)
+        self.columns.append(column)
+        self.assertEqual(unicycler.cpp_wrappers.get_graph_alignment_bound(column),
+                         3 * len(sequence))
+        for i in range(0, len(sequence), 100):
+            column = unicycler.cpp_wrappers.extend_graph_alignment(column, sequence[i:i + 100])
+            self.columns.append(column)
+            self.assertEqual(unicycler.cpp_wrappers.get_graph_alignment_bound(column),
+                             3 * len(sequence))
+        self.assertEqual(unicycler.cpp_wrappers.get_graph_alignment_score(column),
+                         3 * len(sequence))
+
+    def test_outside_band(self):
+        column = self.align_in_pieces('ACGT' * 100, 'ACGT' * 50, 1, 100)
+        self.assertIsNone(unicycler.cpp_wrappers.get_graph_alignment_score(column))
+        column = self.align_in_pieces('ACGT' * 100, 'ACGT' * 300, 1, 100)
+        self.assertIsNone(unicycler.cpp_wrappers.get_graph_alignment_bound(column))
+
+    def test_dominates(self):
+        column_1 = self.align_in_pieces('ACGTACGTAC', 'ACGTA', 1, 10)
+        column_2 = self.align_in_pieces('ACGTACGTAC', 'ACGTT', 1, 10)
+        column_3 = self.align_in_pieces('ACGTACGTAC', 'ACGTAC', 1, 10)
+        self.assertTrue(unicycler.cpp_wrappers.graph_alignment_dominates(column_1, column_1))
+        self.assertTrue(unicycler.cpp_wrappers.graph_alignment_dominates(column_1, column_2))
+        self.assertFalse(unicycler.cpp_wrappers.graph_alignment_dominates(column_2, column_1))
+        self.assertFalse(unicycler.cpp_wrappers.graph_alignment_dominates(column_1, column_3))
+
+
 class TestMultipleSequenceAlignment(unittest.TestCase):
 
     def setUp(self):
@@ -0,0 +1,63 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import unittest
+import os
+import unicycler.assembly_graph
+import unicycler.assembly_graph_copy_depth
+import unicycler.graph_snapshot
+import unicycler.string_graph
+import unicycler.log
+
+
+class TestGraphSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        unicycler.log.logger = unicycler.log.Log(log_filename=None, stdout_verbosity_level=0)
+        self.temp_snapshot = os.path.join(os.path.dirname(__file__), 'temp.snapshot')
+
+    def tearDown(self):
+        if os.path.isfile(self.temp_snapshot):
+            os.remove(self.temp_snapshot)
+
+    def test_assembly_graph_snapshot(self):
+        test_fastg = os.path.join(os.path.dirname(__file__), 'test_assembly_graph.fastg')
+        graph = unicycler.assembly_graph.AssemblyGraph(test_fastg, 25)
+        unicycler.assembly_graph_copy_depth.determine_copy_depth(graph)
+        unicycler.graph_snapshot.save_graph_snapshot(graph, self.temp_snapshot)
+        loaded = unicycler.graph_snapshot.load_graph_snapshot(self.temp_snapshot)
+        self.assertEqual(loaded.overlap, graph.overlap)
+        self.assertEqual(loaded.forward_links, graph.forward_links)
+        self.assertEqual(loaded.reverse_links, graph.reverse_links)
+        self.assertEqual(loaded.copy_depths, graph.copy_depths)
+        self.assertEqual(sorted(loaded.segments), sorted(graph.segments))
+        for seg_num, segment in graph.segments.items():
+            self.assertEqual(loaded.segments[seg_num].forward_sequence, segment.forward_sequence)
+            self.assertEqual(loaded.segments[seg_num].reverse_sequence, segment.reverse_sequence)
+            self.assertEqual(loaded.segments[seg_num].depth, segment.depth)
+
+    def test_string_graph_snapshot(self):
+        test_gfa = os.path.join(os.path.dirname(__file__),
+                                'test_contig_placement_unitig_graph_1.gfa')
+        graph = unicycler.string_graph.StringGraph(test_gfa)
+        unicycler.graph_snapshot.save_graph_snapshot(graph, self.temp_snapshot)
+        loaded = unicycler.graph_snapshot.load_graph_snapshot(self.temp_snapshot)
+        self.assertEqual(sorted(loaded.segments), sorted(graph.segments))
+        self.assertEqual(sorted(loaded.links), sorted(graph.links))
+        self.assertEqual(dict(loaded.forward_links), dict(graph.forward_links))
+
+    def test_bad_snapshot(self):
+        with open(self.temp_snapshot, 'wt') as f:
+            f.write('S\t1\tACGT\n')
+        with self.assertRaises(unicycler.graph_snapshot.BadSnapshot):
+            unicycler.graph_snapshot.load_graph_snapshot(self.temp_snapshot)
@@ -0,0 +1,86 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import unittest
+import os
+import unicycler.assembly_graph
+import unicycler.path_finding
+
+
+def components_by_search(graph):
+    """
+    A simple reference implementation of connected components which uses the link dictionaries.
+    """
+    visited = set()
+    components = []
+    for seg_num in graph.segments:
+        if seg_num in visited:
+            continue
+        visited.add(seg_num)
+        component, to_visit = [], [seg_num]
+        while to_visit:
+            current = to_visit.pop()
+            component.append(current)
+            for linked in graph.forward_links.get(current, []) + \
+                    graph.reverse_links.get(current, []):
+                if abs(linked) not in visited:
+                    visited.add(abs(linked))
+                    to_visit.append(abs(linked))
+        components.append(sorted(component))
+    return sorted(components)
+
+
+class TestLinkIndex(unittest.TestCase):
+
+    def setUp(self):
+        test_gfa = os.path.join(os.path.dirname(__file__), 'test_assembly_graph.gfa')
+        self.graph = unicycler.assembly_graph.AssemblyGraph(test_gfa, 0)
+
+    def test_links(self):
+        link_index = self.graph.get_link_index()
+        for seg_num in self.graph.segments:
+            for signed_seg_num in (seg_num, -seg_num):
+                node = link_index.get_node(signed_seg_num)
+                self.assertEqual(link_index.get_signed_seg_num(node), signed_seg_num)
+                self.assertEqual([link_index.get_signed_seg_num(x)
+                                  for x in link_index.get_downstream_nodes(node)],
+                                 self.graph.get_downstream_seg_nums(signed_seg_num))
+                self.assertEqual(sorted(link_index.get_signed_seg_num(x)
+                                        for x in link_index.get_upstream_nodes(node)),
+                                 sorted(self.graph.get_upstream_seg_nums(signed_seg_num)))
+
+    def test_connected_components(self):
+        self.assertEqual(self.graph.get_connected_components(), components_by_search(self.graph))
+
+    def test_rebuilt_after_changes(self):
+        link_index = self.graph.get_link_index()
+        self.assertIs(self.graph.get_link_index(), link_index)
+        seg_nums = sorted(self.graph.segments)
+        self.graph.remove_segments(seg_nums[:3])
+        self.assertIsNot(self.graph.get_link_index(), link_index)
+        self.assertEqual(self.graph.get_connected_components(), components_by_search(self.graph))
+        self.graph.add_link(seg_nums[3], seg_nums[-1])
+        self.assertEqual(self.graph.get_connected_components(), components_by_search(self.graph))
+        self.graph.renumber_segments()
+        self.assertEqual(self.graph.get_connected_components(), components_by_search(self.graph))
+
+    def test_all_paths(self):
+        start = 1
+        end = self.graph.get_downstream_seg_nums(
+            self.graph.get_downstream_seg_nums(start)[0])[0]
+        paths = unicycler.path_finding.all_paths(self.graph, start, end, 0, 1000)
+        self.assertTrue(paths)
+        for path in paths:
+            full_path = [start] + path + [end]
+            for seg_1, seg_2 in zip(full_path, full_path[1:]):
+                self.assertIn(seg_2, self.graph.get_downstream_seg_nums(seg_1))
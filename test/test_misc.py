@@ -52,43 +52,6 @@ class TestMiscFunctions(unittest.TestCase):
         self.assertFalse(unicycler.misc.is_header_spades_format('name stuff'))
         self.assertFalse(unicycler.misc.is_header_spades_format('name stuff stuff stuff'))
 
-    def test_reverse_complement(self):
-        self.assertEqual('GCAGGCCGCTTAATGAATAGATCATGGCTGCGCCGCCTACCGGTCCGAGACCTTCGCTGA',
-                         unicycler.misc.reverse_complement('TCAGCGAAGGTCTCGGACCGGTAGGCGGCGCAGCCATG'
-                                                           'ATCTATTCATTAAGCGGCCTGC'))
-        self.assertEqual('', unicycler.misc.reverse_complement(''))
-        self.assertEqual('TATTTNGTTANAT', unicycler.misc.reverse_complement('ATNTAACNAAATA'))
-        self.assertEqual('ATNTAACNAAATA', unicycler.misc.reverse_complement('TATTTNGTTANAT'))
-        self.assertEqual('TGACBWDARAYACHASKGVTMACNG',
-                         unicycler.misc.reverse_complement('CNGTKABCMSTDGTRTYTHWVGTCA'))
-        self.assertEqual('tgACBWDARAYACHASKGVTMACnG',
-                         unicycler.misc.reverse_complement('CnGTKABCMSTDGTRTYTHWVGTca'))
-
-    def test_get_random_base(self):
-        a_count, c_count, g_count, t_count, other_count = 0, 0, 0, 0, 0
-        for i in range(10000):
-            base = unicycler.misc.get_random_base()
-            if base == 'A':
-                a_count += 1
-            elif base == 'C':
-                c_count += 1
-            elif base == 'G':
-                g_count += 1
-            elif base == 'T':
-                t_count += 1
-            else:
-                other_count += 1
-        self.assertTrue(a_count > 0)
-        self.assertTrue(c_count > 0)
-        self.assertTrue(g_count > 0)
-        self.assertTrue(t_count > 0)
-        self.assertTrue(other_count == 0)
-
-    def test_get_random_sequence(self):
-        self.assertEqual(10, len(unicycler.misc.get_random_sequence(10)))
-        self.assertEqual(100, len(unicycler.misc.get_random_sequence(100)))
-        self.assertEqual(1000, len(unicycler.misc.get_random_sequence(1000)))
-
     def test_get_percentile(self):
         self.assertEqual(20, unicycler.misc.get_percentile([50, 20, 40, 35, 15], 30))
         self.assertEqual(20, unicycler.misc.get_percentile([20, 50, 40, 35, 15], 40))
@@ -198,6 +161,17 @@ class TestMiscFunctions(unittest.TestCase):
         self.assertTrue(fasta[2][2].endswith('AGTTGATTTAAATCGCTACACCATTATGATTCATGTAGCGATTTAAATTACT'
                                              'ACATAATGGTGATTAGC'))
 
+    def test_load_fasta_empty_header(self):
+        test_fasta = os.path.join(os.path.dirname(__file__), 'temp_test.fasta')
+        with open(test_fasta, 'wt') as fasta_file:
+            fasta_file.write('>seq_1 description\nACGT\n>\nGGGG\n> \nTTTT\n>seq_2\nCCCC\n')
+        fasta = unicycler.misc.load_fasta(test_fasta)
+        self.assertEqual(fasta, [('seq_1', 'ACGT'), ('seq_2', 'CCCC')])
+        fasta = unicycler.misc.load_fasta_with_full_header(test_fasta)
+        self.assertEqual(fasta, [('seq_1', 'seq_1 description', 'ACGT'),
+                                 ('seq_2', 'seq_2', 'CCCC')])
+        os.remove(test_fasta)
+
     def test_score_function(self):
         self.assertAlmostEqual(unicycler.misc.score_function(0.0, 1.0), 0.0)
         self.assertAlmostEqual(unicycler.misc.score_function(0.0, 2.0), 0.0)
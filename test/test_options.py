@@ -93,6 +93,8 @@ class TestUnicyclerOptions(unittest.TestCase):
         threads_default = int(get_default_from_help('--threads', help_text))
         # mode_default = get_default_from_help('--mode', help)
         linear_seqs_default = int(get_default_from_help('--linear_seqs', help_text))
+        bridge_time_limit_default = float(get_default_from_help('--bridge_time_limit',
+                                                                help_text))
         spades_path_default = get_default_from_help('--spades_path', help_text)
         min_kmer_frac_default = float(get_default_from_help('--min_kmer_frac', help_text))
         max_kmer_frac_default = float(get_default_from_help('--max_kmer_frac', help_text))
@@ -120,6 +122,7 @@ class TestUnicyclerOptions(unittest.TestCase):
         self.assertEqual(args.keep, keep_default)
         self.assertEqual(args.threads, threads_default)
         self.assertEqual(args.linear_seqs, linear_seqs_default)
+        self.assertEqual(args.bridge_time_limit, bridge_time_limit_default)
         self.assertEqual(args.spades_path, spades_path_default)
         self.assertEqual(args.min_kmer_frac, min_kmer_frac_default)
         self.assertEqual(args.max_kmer_frac, max_kmer_frac_default)
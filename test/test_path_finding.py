@@ -0,0 +1,326 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+import unicycler.alignment
+import unicycler.assembly_graph
+import unicycler.path_finding
+import unicycler.settings
+from unicycler.cpp_wrappers import fully_global_alignment
+from unicycler.misc import weighted_average
+from unicycler.path_finding import SearchPath, SearchDeadline, TooManyPaths, \
+    get_min_distances_to
+
+
+def all_paths_with_lists(graph, start, end, min_length, max_length):
+    """
+    A simple reference implementation of all_paths which keeps each path as a list of signed
+    segment numbers.
+    """
+    if start not in graph.forward_links:
+        return []
+    start_seg = graph.segments[abs(start)]
+    end_seg = graph.segments[abs(end)]
+    start_end_depth = weighted_average(start_seg.depth, end_seg.depth,
+                                       start_seg.get_length(), end_seg.get_length())
+    working_paths = [[x] for x in graph.forward_links[start]]
+    final_paths = []
+    while working_paths:
+        new_working_paths = []
+        for working_path in working_paths:
+            if working_path[-1] == end:
+                potential_result = working_path[:-1]
+                if graph.get_path_length(potential_result) >= min_length:
+                    final_paths.append(potential_result)
+                    if len(final_paths) > unicycler.settings.ALL_PATH_SEARCH_MAX_FINAL_PATHS:
+                        raise TooManyPaths
+            elif graph.get_path_length(working_path) <= max_length:
+                for next_seg in graph.forward_links.get(working_path[-1], []):
+                    max_allowed_count = graph.max_path_segment_count(next_seg, start_end_depth)
+                    count_so_far = working_path.count(next_seg) + working_path.count(-next_seg)
+                    if count_so_far < max_allowed_count:
+                        new_working_paths.append(working_path + [next_seg])
+        if len(working_paths) > unicycler.settings.ALL_PATH_SEARCH_MAX_WORKING_PATHS:
+            raise TooManyPaths
+        working_paths = new_working_paths
+    return final_paths
+
+
+def min_distances_by_relaxation(graph, target):
+    """
+    A simple reference for get_min_distances_to (without a maximum) which repeatedly relaxes every
+    link until nothing changes.
+    """
+    distances = {x: 0 for x in graph.reverse_links.get(target, [])}
+    changed = True
+    while changed:
+        changed = False
+        for seg, distance in list(distances.items()):
+            if seg == target:
+                continue
+            upstream_distance = distance + graph.segments[abs(seg)].get_length() - graph.overlap
+            for upstream_seg in graph.reverse_links.get(seg, []):
+                if upstream_distance < distances.get(upstream_seg, float('inf')):
+                    distances[upstream_seg] = upstream_distance
+                    changed = True
+    return distances
+
+
+def all_paths_or_none(function, graph, start, end, min_length, max_length):
+    try:
+        return function(graph, start, end, min_length, max_length)
+    except TooManyPaths:
+        return None
+
+
+class TestSearchPath(unittest.TestCase):
+
+    def test_single_segment(self):
+        path = SearchPath(5, 100, 5)
+        self.assertEqual(path.to_list(), [5])
+        self.assertEqual(path.length, 100)
+        self.assertEqual(path.first_length, 100)
+        self.assertEqual(path.get_count(5), 1)
+        self.assertEqual(path.get_count(6), 0)
+
+    def test_extend(self):
+        path = SearchPath(5, 100, 5).extend(-3, 20, 3).extend(3, 20, 3).extend(7, 1, 7)
+        self.assertEqual(path.to_list(), [5, -3, 3, 7])
+        self.assertEqual(path.length, 141)
+        self.assertEqual(path.first_length, 100)
+        self.assertEqual(path.get_count(3), 2)
+        self.assertEqual(path.get_count(5), 1)
+        self.assertEqual(path.get_count(7), 1)
+
+    def test_extend_does_not_change_parent(self):
+        parent = SearchPath(1, 10, 1).extend(2, 10, 2)
+        self.assertEqual(parent.get_count(3), 0)
+        child_1 = parent.extend(3, 10, 3)
+        child_2 = parent.extend(-2, 5, 2)
+        self.assertEqual(child_1.to_list(), [1, 2, 3])
+        self.assertEqual(child_2.to_list(), [1, 2, -2])
+        self.assertEqual(child_1.get_count(3), 1)
+        self.assertEqual(child_1.get_count(2), 1)
+        self.assertEqual(child_2.get_count(3), 0)
+        self.assertEqual(child_2.get_count(2), 2)
+        self.assertEqual(parent.get_count(2), 1)
+        self.assertEqual(parent.length, 20)
+
+
+class TestPathFinding(unittest.TestCase):
+
+    def setUp(self):
+        test_gfa = os.path.join(os.path.dirname(__file__), 'test_assembly_graph.gfa')
+        self.graph = unicycler.assembly_graph.AssemblyGraph(test_gfa, 0)
+
+    def test_all_paths_matches_list_paths(self):
+        random.seed(0)
+        seg_nums = sorted(self.graph.segments)
+        found_paths = 0
+        for _ in range(200):
+            start = random.choice(seg_nums) * random.choice([1, -1])
+            end = random.choice(seg_nums) * random.choice([1, -1])
+            max_length = random.randint(0, 5000)
+            min_length = random.randint(0, max_length)
+            paths = all_paths_or_none(unicycler.path_finding.all_paths, self.graph, start, end,
+                                      min_length, max_length)
+            list_paths = all_paths_or_none(all_paths_with_lists, self.graph, start, end,
+                                           min_length, max_length)
+
+            # Pruning can only avoid TooManyPaths, never cause it or change the paths found.
+            if list_paths is None:
+                continue
+            self.assertEqual(paths, list_paths)
+            if paths:
+                found_paths += 1
+        self.assertGreater(found_paths, 0)
+
+    def test_min_distances(self):
+        for seg_num in self.graph.segments:
+            for target in (seg_num, -seg_num):
+                distances = get_min_distances_to(self.graph, target, float('inf'))
+                self.assertEqual(distances, min_distances_by_relaxation(self.graph, target))
+
+    def test_min_distances_with_max(self):
+        for seg_num in self.graph.segments:
+            all_distances = get_min_distances_to(self.graph, seg_num, float('inf'))
+            distances = get_min_distances_to(self.graph, seg_num, 500)
+            self.assertEqual(distances, {x: d for x, d in all_distances.items() if d <= 500})
+
+
+class TestPathPruning(unittest.TestCase):
+    """
+    Uses a graph where the start segment leads both to the end (via a single short segment) and to
+    a tangle of short, high-depth segments which never reaches the end. Without pruning, paths
+    wandering through the tangle make too many paths.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        gfa_filename = os.path.join(self.temp_dir, 'graph.gfa')
+        tangle = list(range(4, 10))
+        with open(gfa_filename, 'wt') as gfa:
+            gfa.write('S\t1\t' + 'A' * 1000 + '\tdp:f:1.0\n')
+            gfa.write('S\t2\t' + 'C' * 1000 + '\tdp:f:1.0\n')
+            gfa.write('S\t3\t' + 'G' * 100 + '\tdp:f:1.0\n')
+            for seg_num in tangle:
+                gfa.write('S\t' + str(seg_num) + '\t' + 'T' * 10 + '\tdp:f:10.0\n')
+            gfa.write('L\t1\t+\t3\t+\t0M\n')
+            gfa.write('L\t3\t+\t2\t+\t0M\n')
+            gfa.write('L\t1\t+\t4\t+\t0M\n')
+            for seg_1 in tangle:
+                for seg_2 in tangle:
+                    gfa.write('L\t' + str(seg_1) + '\t+\t' + str(seg_2) + '\t+\t0M\n')
+        self.graph = unicycler.assembly_graph.AssemblyGraph(gfa_filename, 0)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_without_pruning(self):
+        with self.assertRaises(TooManyPaths):
+            all_paths_with_lists(self.graph, 1, 2, 0, 2000)
+
+    def test_all_paths(self):
+        self.assertEqual(unicycler.path_finding.all_paths(self.graph, 1, 2, 0, 2000), [[3]])
+
+    def test_all_paths_too_long(self):
+        self.assertEqual(unicycler.path_finding.all_paths(self.graph, 1, 2, 0, 50), [])
+
+    def test_tangle_cannot_reach_end(self):
+        distances = get_min_distances_to(self.graph, 2, 2000)
+        self.assertEqual(distances, {3: 0, 1: 100})
+
+
+class TestGraphAlignmentPaths(unittest.TestCase):
+
+    def setUp(self):
+        test_gfa = os.path.join(os.path.dirname(__file__), 'test_assembly_graph.gfa')
+        self.graph = unicycler.assembly_graph.AssemblyGraph(test_gfa, 0)
+        self.scoring_scheme = unicycler.alignment.AlignmentScoringScheme('3,-6,-5,-2')
+
+    def best_raw_score(self, paths, sequence):
+        scores = []
+        for path in paths:
+            result = fully_global_alignment(sequence, self.graph.get_path_sequence(path),
+                                            self.scoring_scheme, False, 1000)
+            scores.append(int(result.split(',', 9)[6]))
+        return max(scores)
+
+    def test_matches_aligning_to_all_paths(self):
+        random.seed(0)
+        seg_nums = sorted(self.graph.segments)
+        tested = 0
+        while tested < 20:
+            start = random.choice(seg_nums) * random.choice([1, -1])
+            end = random.choice(seg_nums) * random.choice([1, -1])
+            paths = all_paths_or_none(unicycler.path_finding.all_paths, self.graph, start, end,
+                                      0, 2000)
+            if not paths or [] in paths:
+                continue
+            tested += 1
+
+            # The sequence is one of the paths with a few changes, so the best path may not be
+            # the one it came from.
+            sequence = list(self.graph.get_path_sequence(random.choice(paths)))
+            for _ in range(len(sequence) // 50):
+                sequence[random.randrange(len(sequence))] = random.choice('ACGT')
+            sequence = ''.join(sequence)
+
+            found_paths = unicycler.path_finding.graph_alignment_paths(
+                self.graph, start, end, 0, 2000, sequence, self.scoring_scheme)
+            self.assertTrue(found_paths)
+            self.assertTrue(all(x in paths for x in found_paths))
+            self.assertEqual(self.best_raw_score(found_paths[:1], sequence),
+                             self.best_raw_score(paths, sequence))
+
+    def test_get_best_paths_for_seq(self):
+        path = [2, 3, 4, 5, 11, 7, 9, 10, 15, 14, 13]
+        sequence = self.graph.get_path_sequence(path)
+        for use_graph_alignment in (False, True):
+            paths_and_scores, search_type = unicycler.path_finding.get_best_paths_for_seq(
+                self.graph, 1, 12, len(sequence), sequence, self.scoring_scheme, 90.0,
+                use_graph_alignment)
+            self.assertEqual(paths_and_scores[0][0], path)
+            self.assertEqual(search_type, 'graph align' if use_graph_alignment else 'exhaustive')
+
+    def test_too_many_columns(self):
+        old_max_columns = unicycler.settings.GRAPH_ALIGNMENT_MAX_COLUMNS
+        unicycler.settings.GRAPH_ALIGNMENT_MAX_COLUMNS = 1
+        try:
+            sequence = self.graph.get_path_sequence([2, 3, 4, 5, 11, 7, 9, 10, 15, 14, 13])
+            with self.assertRaises(TooManyPaths):
+                unicycler.path_finding.graph_alignment_paths(
+                    self.graph, 1, 12, 0, 2000, sequence, self.scoring_scheme)
+            _, search_type = unicycler.path_finding.get_best_paths_for_seq(
+                self.graph, 1, 12, len(sequence), sequence, self.scoring_scheme, 90.0, True)
+            self.assertEqual(search_type, 'exhaustive')
+        finally:
+            unicycler.settings.GRAPH_ALIGNMENT_MAX_COLUMNS = old_max_columns
+
+    def test_progressive_with_culling(self):
+        old_max_working_paths = unicycler.settings.PROGRESSIVE_PATH_SEARCH_MAX_WORKING_PATHS
+        unicycler.settings.PROGRESSIVE_PATH_SEARCH_MAX_WORKING_PATHS = 2
+        try:
+            path = [2, 3, 4, 5, 11, 7, 9, 10, 15, 14, 13]
+            sequence = self.graph.get_path_sequence(path)
+            for threads in (1, 2):
+                paths = unicycler.path_finding.progressive_path_find(
+                    self.graph, 1, 12, 0, 2000, sequence, self.scoring_scheme, 90.0,
+                    threads=threads)
+                self.assertIn(path, paths)
+        finally:
+            unicycler.settings.PROGRESSIVE_PATH_SEARCH_MAX_WORKING_PATHS = old_max_working_paths
+
+
+class TestSearchDeadline(unittest.TestCase):
+
+    def setUp(self):
+        test_gfa = os.path.join(os.path.dirname(__file__), 'test_assembly_graph.gfa')
+        self.graph = unicycler.assembly_graph.AssemblyGraph(test_gfa, 0)
+        self.scoring_scheme = unicycler.alignment.AlignmentScoringScheme('3,-6,-5,-2')
+        self.sequence = self.graph.get_path_sequence([2, 3, 4, 5, 11, 7, 9, 10, 15, 14, 13])
+
+    def test_not_expired(self):
+        deadline = SearchDeadline(1000.0)
+        self.assertFalse(deadline.expired())
+        self.assertFalse(deadline.timed_out)
+
+    def test_expired(self):
+        deadline = SearchDeadline(-1.0)
+        self.assertTrue(deadline.expired())
+        self.assertTrue(deadline.timed_out)
+
+    def test_graph_alignment_with_time(self):
+        deadline = SearchDeadline(1000.0)
+        paths = unicycler.path_finding.graph_alignment_paths(
+            self.graph, 1, 12, 0, 2000, self.sequence, self.scoring_scheme, deadline)
+        self.assertEqual(paths[0], [2, 3, 4, 5, 11, 7, 9, 10, 15, 14, 13])
+        self.assertFalse(deadline.timed_out)
+
+    def test_graph_alignment_out_of_time(self):
+        deadline = SearchDeadline(-1.0)
+        paths = unicycler.path_finding.graph_alignment_paths(
+            self.graph, 1, 12, 0, 2000, self.sequence, self.scoring_scheme, deadline)
+        self.assertEqual(paths, [])
+        self.assertTrue(deadline.timed_out)
+
+    def test_progressive_out_of_time(self):
+        deadline = SearchDeadline(-1.0)
+        paths = unicycler.path_finding.progressive_path_find(
+            self.graph, 1, 12, 0, 2000, self.sequence, self.scoring_scheme, 90.0, deadline)
+        self.assertEqual(paths, [])
+        self.assertTrue(deadline.timed_out)
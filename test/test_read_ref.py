@@ -0,0 +1,80 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import unittest
+import os
+import tempfile
+import unicycler.read_ref
+import unicycler.seq_parse
+
+
+class TestReadStore(unittest.TestCase):
+
+    def setUp(self):
+        self.read_store = unicycler.read_ref.ReadStore()
+        self.read_1 = unicycler.read_ref.Read('read_1', 'acgtACGT', 'ABCDEFGH', self.read_store)
+        self.read_2 = unicycler.read_ref.Read('read_2', 'GGG', None, self.read_store)
+        self.read_3 = unicycler.read_ref.Read('read_3', 'TTAA', '!!!!', self.read_store)
+
+    def test_sequences(self):
+        self.assertEqual(self.read_1.sequence, 'ACGTACGT')
+        self.assertEqual(self.read_2.sequence, 'GGG')
+        self.assertEqual(self.read_3.sequence, 'TTAA')
+
+    def test_qualities(self):
+        self.assertEqual(self.read_1.qualities, 'ABCDEFGH')
+        self.assertEqual(self.read_2.qualities, '+++')
+        self.assertEqual(self.read_3.qualities, '!!!!')
+
+    def test_lengths(self):
+        self.assertEqual(len(self.read_store), 3)
+        self.assertEqual(self.read_1.get_length(), 8)
+        self.assertEqual(self.read_2.get_length(), 3)
+        self.assertEqual(self.read_3.get_length(), 4)
+
+    def test_fastq(self):
+        self.assertEqual(self.read_3.get_fastq(), '@read_3\nTTAA\n+\n!!!!\n')
+
+    def test_read_without_store(self):
+        read = unicycler.read_ref.Read('read', 'ACGT', None)
+        self.assertEqual(read.sequence, 'ACGT')
+        self.assertEqual(read.qualities, '++++')
+        self.assertEqual(read.alignments, [])
+
+
+class TestDuplicateReadNames(unittest.TestCase):
+
+    def test_duplicate_free_fastq(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            reads = os.path.join(temp_dir, 'reads.fastq')
+            with open(reads, 'wt') as f:
+                f.write('@a\nACGT\n+\nABCD\n@b\nGG\n+\n!!\n@a extra\nTTTA\n+\nEFGH\n')
+            read_dict, read_names, no_dup_filename = \
+                unicycler.read_ref.load_long_reads(reads, silent=True, output_dir=temp_dir)
+            self.assertEqual(read_names, ['a', 'b', 'a_2'])
+            self.assertEqual(no_dup_filename,
+                             os.path.join(temp_dir, 'reads_no_duplicates.fastq.gz'))
+            self.assertEqual(unicycler.seq_parse.load_fastq_records(no_dup_filename),
+                             [('a', 'ACGT', 'ABCD'), ('b', 'GG', '!!'), ('a_2', 'TTTA', 'EFGH')])
+            self.assertFalse(os.path.exists(no_dup_filename + '.temp'))
+
+    def test_duplicate_free_fasta(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            reads = os.path.join(temp_dir, 'reads.fasta')
+            with open(reads, 'wt') as f:
+                f.write('>a\nACGT\nAC\n>a\nGG\n')
+            _, read_names, no_dup_filename = \
+                unicycler.read_ref.load_long_reads(reads, silent=True, output_dir=temp_dir)
+            self.assertEqual(read_names, ['a', 'a_2'])
+            self.assertEqual(unicycler.seq_parse.load_fasta_records(no_dup_filename),
+                             [('a', 'ACGTAC'), ('a_2', 'GG')])
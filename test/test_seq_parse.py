@@ -0,0 +1,46 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import unittest
+import io
+import os
+import unicycler.seq_parse
+
+
+class TestSeqParse(unittest.TestCase):
+
+    def test_iterate_lines_small_chunks(self):
+        data = io.BytesIO(b'line one\nline two\n\nline four')
+        lines = list(unicycler.seq_parse.iterate_lines(data, chunk_size=3))
+        self.assertEqual(lines, [b'line one', b'line two', b'', b'line four'])
+
+    def test_iterate_fasta(self):
+        data = io.BytesIO(b'>seq_1 info\nACGT\nAC\n\n>seq_2\r\nGG\r\nTT\r\n>seq_3\n')
+        records = list(unicycler.seq_parse.iterate_fasta(data))
+        self.assertEqual(records, [('seq_1 info', 'ACGTAC'), ('seq_2', 'GGTT'), ('seq_3', '')])
+
+    def test_iterate_fastq(self):
+        data = io.BytesIO(b'@read_1 info\nACGT\n+\nABCD\n\n@read_2\nGG\n+\n!!\n')
+        records = list(unicycler.seq_parse.iterate_fastq(data))
+        self.assertEqual(records, [('read_1 info', 'ACGT', 'ABCD'), ('read_2', 'GG', '!!')])
+
+    def test_iterate_fastq_truncated(self):
+        data = io.BytesIO(b'@read_1\nACGT\n+\nABCD\n@read_2\nGG\n')
+        records = list(unicycler.seq_parse.iterate_fastq(data))
+        self.assertEqual(records, [('read_1', 'ACGT', 'ABCD')])
+
+    def test_load_fasta_records(self):
+        reference = os.path.join(os.path.dirname(__file__), '..', 'sample_data', 'reference.fasta')
+        records = unicycler.seq_parse.load_fasta_records(reference)
+        self.assertEqual(len(records), 3)
+        self.assertEqual([len(x[1]) for x in records], [215774, 5153, 8953])
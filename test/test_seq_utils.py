@@ -0,0 +1,76 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import unittest
+import unicycler.seq_utils
+
+
+class TestSeqUtils(unittest.TestCase):
+
+    def test_reverse_complement(self):
+        self.assertEqual('GCAGGCCGCTTAATGAATAGATCATGGCTGCGCCGCCTACCGGTCCGAGACCTTCGCTGA',
+                         unicycler.seq_utils.reverse_complement('TCAGCGAAGGTCTCGGACCGGTAGGCGGCGCAG'
+                                                                'CCATGATCTATTCATTAAGCGGCCTGC'))
+        self.assertEqual('', unicycler.seq_utils.reverse_complement(''))
+        self.assertEqual('TATTTNGTTANAT',
+                         unicycler.seq_utils.reverse_complement('ATNTAACNAAATA'))
+        self.assertEqual('ATNTAACNAAATA',
+                         unicycler.seq_utils.reverse_complement('TATTTNGTTANAT'))
+        self.assertEqual('TGACBWDARAYACHASKGVTMACNG',
+                         unicycler.seq_utils.reverse_complement('CNGTKABCMSTDGTRTYTHWVGTCA'))
+        self.assertEqual('tgACBWDARAYACHASKGVTMACnG',
+                         unicycler.seq_utils.reverse_complement('CnGTKABCMSTDGTRTYTHWVGTca'))
+
+    def test_get_random_base(self):
+        a_count, c_count, g_count, t_count, other_count = 0, 0, 0, 0, 0
+        for i in range(10000):
+            base = unicycler.seq_utils.get_random_base()
+            if base == 'A':
+                a_count += 1
+            elif base == 'C':
+                c_count += 1
+            elif base == 'G':
+                g_count += 1
+            elif base == 'T':
+                t_count += 1
+            else:
+                other_count += 1
+        self.assertTrue(a_count > 0)
+        self.assertTrue(c_count > 0)
+        self.assertTrue(g_count > 0)
+        self.assertTrue(t_count > 0)
+        self.assertTrue(other_count == 0)
+
+    def test_get_random_sequence(self):
+        self.assertEqual(10, len(unicycler.seq_utils.get_random_sequence(10)))
+        self.assertEqual(100, len(unicycler.seq_utils.get_random_sequence(100)))
+        self.assertEqual(1000, len(unicycler.seq_utils.get_random_sequence(1000)))
+
+    def test_complement(self):
+        self.assertEqual('TGCAtgcaN', unicycler.seq_utils.complement('ACGTacgtX'))
+        self.assertEqual('', unicycler.seq_utils.complement(''))
+
+    def test_complement_base(self):
+        self.assertEqual('T', unicycler.seq_utils.complement_base('A'))
+        self.assertEqual('y', unicycler.seq_utils.complement_base('r'))
+        self.assertEqual('N', unicycler.seq_utils.complement_base('X'))
+
+    def test_reverse_complement_unknown_characters(self):
+        self.assertEqual('NNNA', unicycler.seq_utils.reverse_complement('TXé\u20ac'))
+
+    def test_is_homopolymer(self):
+        self.assertTrue(unicycler.seq_utils.is_homopolymer('AAAA'))
+        self.assertTrue(unicycler.seq_utils.is_homopolymer('aAaA'))
+        self.assertTrue(unicycler.seq_utils.is_homopolymer('G'))
+        self.assertFalse(unicycler.seq_utils.is_homopolymer('AAAC'))
+        self.assertFalse(unicycler.seq_utils.is_homopolymer(''))
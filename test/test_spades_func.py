@@ -13,6 +13,9 @@ not, see <http://www.gnu.org/licenses/>.
 
 import unittest
 import os
+import json
+import statistics
+import tempfile
 import unicycler.spades_func
 
 
@@ -45,3 +48,44 @@ class TestSPAdesFunc(unittest.TestCase):
         test_fastq = os.path.join(os.path.dirname(__file__), 'test_bad_reads_2.fastq')
         with self.assertRaises(unicycler.spades_func.BadFastq):
             unicycler.spades_func.get_read_count(test_fastq)
+
+    def test_read_stats(self):
+        test_fastq = os.path.join(os.path.dirname(__file__), 'test_semi_global_alignment.fastq')
+        stats = unicycler.spades_func.get_read_stats(test_fastq)
+        self.assertEqual(stats.read_count, 9)
+        self.assertEqual(stats.length_counts, {100: 1, 150: 1, 200: 1, 300: 6})
+
+    def test_read_stats_summaries(self):
+        test_fastq = os.path.join(os.path.dirname(__file__), 'test_semi_global_alignment.fastq')
+        stats = unicycler.spades_func.get_read_stats(test_fastq)
+        read_lengths = sorted(unicycler.spades_func.get_read_lengths(test_fastq))
+        self.assertEqual(unicycler.spades_func.get_median_read_length([stats]),
+                         read_lengths[len(read_lengths) // 2 - 1])
+        mean, stdev = unicycler.spades_func.get_read_length_mean_and_stdev([stats, None])
+        self.assertAlmostEqual(mean, statistics.mean(read_lengths))
+        self.assertAlmostEqual(stdev, statistics.stdev(read_lengths))
+
+    def test_all_read_stats_cache(self):
+        test_dir = os.path.dirname(__file__)
+        good_fastq = os.path.join(test_dir, 'test_misc.fastq')
+        bad_fastq = os.path.join(test_dir, 'test_bad_reads_1.fastq')
+        with tempfile.TemporaryDirectory() as spades_dir:
+            all_stats = unicycler.spades_func.get_all_read_stats([good_fastq, None, bad_fastq],
+                                                                 spades_dir, 2)
+            self.assertEqual(all_stats[good_fastq].read_count, 3)
+            self.assertIsNone(all_stats[bad_fastq])
+            cache_filename = os.path.join(spades_dir,
+                                          unicycler.spades_func.READ_STATS_CACHE_FILENAME)
+            self.assertTrue(os.path.isfile(cache_filename))
+
+            # A second call should use the cached values rather than reading the files.
+            with open(cache_filename, 'rt') as cache_file:
+                cache = json.load(cache_file)
+            good_key = unicycler.spades_func.get_read_stats_cache_key(good_fastq)
+            cache[good_key]['read_count'] = 12345
+            with open(cache_filename, 'wt') as cache_file:
+                json.dump(cache, cache_file)
+            all_stats = unicycler.spades_func.get_all_read_stats([good_fastq, bad_fastq],
+                                                                 spades_dir, 2)
+            self.assertEqual(all_stats[good_fastq].read_count, 12345)
+            self.assertIsNone(all_stats[bad_fastq])
@@ -14,7 +14,8 @@ not, see <http://www.gnu.org/licenses/>.
 """
 
 import re
-from .misc import get_nice_header, reverse_complement, float_to_str
+from .misc import get_nice_header, float_to_str
+from .seq_utils import reverse_complement
 
 
 class AlignmentScoringScheme(object):
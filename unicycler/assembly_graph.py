@@ -13,21 +13,30 @@ details. You should have received a copy of the GNU General Public License along
 not, see <http://www.gnu.org/licenses/>.
 """
 
+import heapq
 import math
-import copy
 import os
 import itertools
-from collections import deque, defaultdict
+import pickle
+from collections import defaultdict, OrderedDict
 from .assembly_graph_segment import Segment
+from .link_index import LinkIndex
+from .component_index import ComponentIndex
 from .misc import int_to_str, float_to_str, weighted_average_list, score_function, \
-    add_line_breaks_to_sequence, print_table, get_dim_timestamp, get_right_arrow, \
-    remove_dupes_preserve_order
+    add_line_breaks_to_sequence, print_table, get_dim_timestamp, get_right_arrow
+from .seq_parse import load_fasta_records
 from .bridge_long_read import LongReadBridge
 from .bridge_miniasm import MiniasmBridge
 from . import settings
 from . import log
 
 
+# Loaded GFA graphs can be cached in a binary file beside the GFA with this extension. The version
+# number should be incremented whenever the cache contents change.
+GFA_CACHE_EXTENSION = '.ucache'
+GFA_CACHE_VERSION = 1
+
+
 class CannotTrimOverlaps(Exception):
     pass
 
@@ -46,7 +55,7 @@ class AssemblyGraph(object):
     """
 
     def __init__(self, filename, overlap, paths_file=None,
-                 insert_size_mean=250, insert_size_deviation=50):
+                 insert_size_mean=250, insert_size_deviation=50, use_cache=False):
         self.segments = {}  # Dict of unsigned segment number -> segment
         self.forward_links = {}  # Dict of signed segment number -> list of signed segment numbers
         self.reverse_links = {}  # Dict of signed segment number <- list of signed segment numbers
@@ -57,12 +66,25 @@ class AssemblyGraph(object):
         self.insert_size_mean = insert_size_mean
         self.insert_size_deviation = insert_size_deviation
 
+        # A compact copy of the links, built when first needed and discarded when they change.
+        self.link_index = None
+
+        # The connected components, built when first needed and then kept up to date as links and
+        # segments are added and removed.
+        self.component_index = None
+
         if filename.endswith('.fastg'):
             self.load_from_fastg(filename)
         else:
-            self.load_from_gfa(filename)
+            link_overlap = None
+            if use_cache:
+                link_overlap = self.load_from_gfa_cache(filename)
+            if link_overlap is None:
+                link_overlap = self.load_from_gfa(filename)
+                if use_cache:
+                    self.save_gfa_cache(filename, link_overlap)
             if not overlap:
-                self.overlap = get_overlap_from_gfa_link(filename)
+                self.overlap = link_overlap
 
         if paths_file:
             self.load_spades_paths(paths_file)
@@ -88,10 +110,6 @@ class AssemblyGraph(object):
                 segment = Segment(num, depth, sequence, positive)
                 self.segments[num] = segment
 
-        # Make sure that every segment has both a forward and reverse sequence.
-        for segment in self.segments.values():
-            segment.build_other_sequence_if_necessary()
-
         # Load in the links.
         for header in headers:
             start, end_list = get_links_from_header(header)
@@ -107,8 +125,10 @@ class AssemblyGraph(object):
         1) The segment names must be integers.
         2) The depths should be stored in a dp tag.
         3) All link overlaps are the same (equal to the graph overlap value).
+        The file is read in a single pass. Returns the overlap of the first link which has one
+        (or 0 if there are none).
         """
-        # Load in the segments.
+        link_overlap = None
         with open(filename, 'rt') as gfa_file:
             for line in gfa_file:
                 if line.startswith('S'):
@@ -122,19 +142,7 @@ class AssemblyGraph(object):
                             self.manual_multiplicity[num] = int(part[5:])
                     sequence = line_parts[2]
                     self.segments[num] = Segment(num, depth, sequence, True)
-                    self.segments[num].build_other_sequence_if_necessary()
-                if line.startswith('i'):
-                    line_parts = line.strip().split('\t')
-                    try:
-                        self.insert_size_mean = float(line_parts[1])
-                        self.insert_size_deviation = float(line_parts[2])
-                    except ValueError:
-                        pass
-
-        # Load in the links.
-        with open(filename, 'rt') as gfa_file:
-            for line in gfa_file:
-                if line.startswith('L'):
+                elif line.startswith('L'):
                     line_parts = line.strip().split('\t')
                     start = signed_string_to_int(line_parts[1] + line_parts[2])
                     end = signed_string_to_int(line_parts[3] + line_parts[4])
@@ -142,18 +150,78 @@ class AssemblyGraph(object):
                         self.forward_links[start] = [end]
                     else:
                         self.forward_links[start].append(end)
-            self.forward_links = build_rc_links_if_necessary(self.forward_links)
-            self.reverse_links = build_reverse_links(self.forward_links)
-        self.sort_link_order()
-
-        # Load in the paths
-        with open(filename, 'rt') as gfa_file:
-            for line in gfa_file:
-                if line.startswith('P'):
+                    if link_overlap is None and len(line_parts) > 5:
+                        link_overlap = int(line_parts[5][:-1])
+                elif line.startswith('P'):
                     line_parts = line.strip().split('\t')
                     path_name = line_parts[1]
                     segments = [signed_string_to_int(x) for x in line_parts[2].split(',')]
                     self.paths[path_name] = segments
+                elif line.startswith('i'):
+                    line_parts = line.strip().split('\t')
+                    try:
+                        self.insert_size_mean = float(line_parts[1])
+                        self.insert_size_deviation = float(line_parts[2])
+                    except ValueError:
+                        pass
+        self.forward_links = build_rc_links_if_necessary(self.forward_links)
+        self.reverse_links = build_reverse_links(self.forward_links)
+        self.sort_link_order()
+        return link_overlap if link_overlap is not None else 0
+
+    def save_gfa_cache(self, gfa_filename, link_overlap):
+        """
+        Saves the just-loaded graph to a binary sidecar file next to the GFA, so loading the same
+        GFA again (e.g. on a resumed run) is nearly instant. Failing to write the cache (e.g. in a
+        read-only directory) is not an error.
+        """
+        gfa_stat = os.stat(gfa_filename)
+        cache_data = {'version': GFA_CACHE_VERSION,
+                      'gfa_size': gfa_stat.st_size,
+                      'gfa_mtime': gfa_stat.st_mtime_ns,
+                      'segments': [(x.number, x.depth, x.forward_sequence)
+                                   for x in self.segments.values()],
+                      'forward_links': self.forward_links,
+                      'reverse_links': self.reverse_links,
+                      'manual_multiplicity': self.manual_multiplicity,
+                      'paths': self.paths,
+                      'insert_size': (self.insert_size_mean, self.insert_size_deviation),
+                      'link_overlap': link_overlap}
+        try:
+            with open(gfa_filename + GFA_CACHE_EXTENSION, 'wb') as cache_file:
+                pickle.dump(cache_data, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass
+
+    def load_from_gfa_cache(self, gfa_filename):
+        """
+        Loads the graph from a GFA's binary sidecar file, but only if the GFA's size and
+        modification time are unchanged since the cache was made. Returns the link overlap if the
+        cache was used or None if it wasn't (in which case the graph is untouched).
+        """
+        cache_filename = gfa_filename + GFA_CACHE_EXTENSION
+        if not os.path.isfile(cache_filename):
+            return None
+        try:
+            with open(cache_filename, 'rb') as cache_file:
+                cache_data = pickle.load(cache_file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        gfa_stat = os.stat(gfa_filename)
+        if not isinstance(cache_data, dict) or \
+                cache_data.get('version') != GFA_CACHE_VERSION or \
+                cache_data.get('gfa_size') != gfa_stat.st_size or \
+                cache_data.get('gfa_mtime') != gfa_stat.st_mtime_ns:
+            return None
+
+        for num, depth, sequence in cache_data['segments']:
+            self.segments[num] = Segment(num, depth, sequence, True)
+        self.forward_links = cache_data['forward_links']
+        self.reverse_links = cache_data['reverse_links']
+        self.manual_multiplicity = cache_data['manual_multiplicity']
+        self.paths = cache_data['paths']
+        self.insert_size_mean, self.insert_size_deviation = cache_data['insert_size']
+        return cache_data['link_overlap']
 
     def load_spades_paths(self, filename):
         """
@@ -516,6 +584,8 @@ class AssemblyGraph(object):
                 links_to_remove.add((up_seg, num_to_remove))
         for link in links_to_remove:
             self.remove_link(link[0], link[1])
+        if self.component_index is not None:
+            self.component_index.remove_segments(nums_to_remove)
 
         self.remove_segments_from_paths(nums_to_remove)
 
@@ -563,22 +633,33 @@ class AssemblyGraph(object):
             log.log('\nRemoved small components:', 2)
             log.log_number_list(segment_nums_to_remove, 2)
 
-    def remove_small_dead_ends(self, min_dead_end_size):
+    def remove_small_dead_ends(self, min_dead_end_size, stats=None):
         """
         Remove small segments which are graph dead-ends. This is just to tidy things up a bit
         before the final merge.
+
+        Segments are removed one at a time, each the first (in segment order) which can be. After
+        the first pass, only segments near a removed segment are checked again, as no others can
+        have changed.
         """
+        if stats is None:
+            stats = CleaningStats()
         removed_segments = []
-        while True:
-            for seg_num, segment in self.segments.items():
-                if segment.get_length() >= min_dead_end_size:
-                    continue
-                if self.dead_end_change_if_deleted(seg_num) < 0:
-                    self.remove_segments([seg_num])
-                    removed_segments.append(seg_num)
-                    break
-            else:
-                break
+        seg_nums = list(self.segments)
+        seg_order = {seg_num: i for i, seg_num in enumerate(seg_nums)}
+        worklist = list(range(len(seg_nums)))
+        stats.passes += 1
+        while worklist:
+            seg_num = seg_nums[heapq.heappop(worklist)]
+            if seg_num not in self.segments or \
+                    self.segments[seg_num].get_length() >= min_dead_end_size:
+                continue
+            stats.segments_visited += 1
+            if self.dead_end_change_if_deleted(seg_num) < 0:
+                for nearby_seg_num in self.remove_segments_and_get_nearby([seg_num]):
+                    heapq.heappush(worklist, seg_order[nearby_seg_num])
+                removed_segments.append(seg_num)
+                stats.passes += 1
         if removed_segments:
             log.log('\nRemoved small dead ends:', 2)
             log.log_number_list(removed_segments, 2)
@@ -586,31 +667,54 @@ class AssemblyGraph(object):
     def merge_all_possible(self, anchor_segments, bridging_mode):
         """
         This function merges segments which are in a simple, unbranching path.
+
+        This is done in one sweep through the segments (sorted by number so we apply the merging in
+        a consistent order), merging each path as it is found. Merged segments are left out of
+        later paths: at lower bridging modes they aren't single copy segments or bridges, and at
+        bold bridging mode they already can't be extended. The graph paths are adjusted for all of
+        the merges at the end.
         """
         if anchor_segments is not None:
             anchor_seg_nums = set(x.number for x in anchor_segments)
         else:
             anchor_seg_nums = None
-        while True:
-            # Sort the segment numbers first so we apply the merging in a consistent order.
-            seg_nums = sorted(list(self.segments.keys()))
-            for num in seg_nums:
-                path = self.get_simple_path(num, anchor_seg_nums, bridging_mode)
-                assert len(path) > 0
-                if len(path) > 1:
-                    self.merge_simple_path(path)
-                    break
-            else:
-                break
+
+        # The graph paths are set aside while merging, so removing segments doesn't have to check
+        # them each time.
+        graph_paths, self.paths = self.paths, {}
+        merges = []
+        new_seg_nums = set()
+        new_seg_num = self.get_next_available_seg_number()
+        for num in sorted(self.segments):
+            if num not in self.segments:  # already merged
+                continue
+            path = self.get_simple_path(num, anchor_seg_nums, bridging_mode, new_seg_nums)
+            assert len(path) > 0
+            if len(path) > 1:
+                self.replace_path_with_segment(path, new_seg_num)
+                merges.append((path, new_seg_num))
+                new_seg_nums.add(new_seg_num)
+                new_seg_num += 1
+        self.paths = merge_segments_in_graph_paths(graph_paths, merges)
         self.renumber_segments()
 
     def merge_simple_path(self, merge_path):
         """
         Merges the path into a single segment and adjusts any graph paths as necessary.
         """
+        paths_copy = self.paths
+        new_seg_num = self.get_next_available_seg_number()
+        self.replace_path_with_segment(merge_path, new_seg_num)
+        self.paths = merge_segments_in_graph_paths(paths_copy, [(merge_path, new_seg_num)])
+        return new_seg_num
+
+    def replace_path_with_segment(self, merge_path, new_seg_num):
+        """
+        Replaces the segments in a simple path with a single new segment. Graph paths are not
+        adjusted for the merge (that's left to the caller).
+        """
         start = merge_path[0]
         end = merge_path[-1]
-        mean_depth, original_depth = self.get_mean_path_depth(merge_path)
 
         # Make sure this is indeed a simple path.
         for i in range(len(merge_path) - 1):
@@ -619,14 +723,12 @@ class AssemblyGraph(object):
             if [s_2] != self.forward_links[s_1]:
                 raise BadPath(str(merge_path) + ' is not a simple path')
 
-        new_seg_num = self.get_next_available_seg_number()
+        mean_depth, original_depth = self.get_mean_path_depth(merge_path)
         merged_forward_seq = self.get_path_sequence(merge_path)
         new_seg = Segment(new_seg_num, mean_depth, merged_forward_seq, True,
                           original_depth=original_depth)
-        new_seg.build_other_sequence_if_necessary()
 
         # Save some info that we'll need, and then delete the old segments.
-        paths_copy = self.paths.copy()
         outgoing_links = []
         if end in self.forward_links:
             outgoing_links = list(self.forward_links[end])
@@ -647,28 +749,6 @@ class AssemblyGraph(object):
         for link in incoming_links:
             self.add_link(link, new_seg_num)
 
-        # Merge the segments in any paths.
-        flipped_merge_path = [-x for x in reversed(merge_path)]
-        for path_name in paths_copy:
-            paths_copy[path_name] = find_replace_in_list(paths_copy[path_name], merge_path,
-                                                         [new_seg_num])
-            paths_copy[path_name] = find_replace_in_list(paths_copy[path_name], flipped_merge_path,
-                                                         [-new_seg_num])
-
-        # If any paths still contain the original segments, then split those paths into pieces,
-        # removing the original segments.
-        new_paths = {}
-        for path_name, path_segments in paths_copy.items():
-            split_paths = split_path_multiple(path_segments, merge_path + flipped_merge_path)
-            if len(split_paths) == 1:
-                new_paths[path_name] = split_paths[0]
-            elif len(split_paths) > 1:
-                for i, path in enumerate(split_paths):
-                    new_paths[path_name + '_' + str(i + 1)] = path
-        self.paths = new_paths
-
-        return new_seg_num
-
     def get_mean_path_depth(self, path):
         """
         Returns the mean depth for the path. If any segments in the path are bridges, their depth
@@ -702,6 +782,9 @@ class AssemblyGraph(object):
         Adds a link to the graph in all necessary ways: forward and reverse, and for reverse
         complements too.
         """
+        self.link_index = None
+        if self.component_index is not None:
+            self.component_index.add_link(abs(start), abs(end))
         if start not in self.forward_links:
             self.forward_links[start] = []
         if end not in self.forward_links[start]:
@@ -727,6 +810,9 @@ class AssemblyGraph(object):
         Removes a link from the graph in all necessary ways: forward and reverse, and for reverse
         complements too.
         """
+        self.link_index = None
+        if self.component_index is not None:
+            self.component_index.remove_link(abs(start))
         if start in self.forward_links:
             try:
                 self.forward_links[start].remove(end)
@@ -773,27 +859,23 @@ class AssemblyGraph(object):
         E.g. [[1, 2], [3, 4, 5]] would mean that segments 1 and 2 are in a connected component
         and segments 3, 4 and 5 are in another connected component.
         """
-        visited = set()
-        components = []
-        for v in self.segments:
-            if v not in visited:
-                component = []
-                q = deque()
-                q.append(v)
-                visited.add(v)
-                while q:
-                    w = q.popleft()
-                    component.append(w)
-                    connected_segments = self.get_connected_segments(w)
-                    for k in connected_segments:
-                        if k not in visited:
-                            visited.add(k)
-                            q.append(k)
-                components.append(sorted(component))
+        if self.component_index is None:
+            components = self.get_link_index().get_connected_components(self.segments)
+            self.component_index = ComponentIndex(components)
+        components = self.component_index.get_components(self)
 
         # Sort (just for consistency from one run to the next)
         return sorted(components)
 
+    def get_link_index(self):
+        """
+        Returns a LinkIndex (compact array-based links) for the graph, building it if the links
+        have changed since it was last built.
+        """
+        if self.link_index is None:
+            self.link_index = LinkIndex(self.segments, self.forward_links)
+        return self.link_index
+
     def get_connected_segments(self, segment_num):
         """
         Given a segment number, this function returns a list of all other segment numbers for
@@ -948,6 +1030,37 @@ class AssemblyGraph(object):
             dead_ends += 1
         return potential_dead_ends - dead_ends
 
+    def get_nearby_seg_nums(self, seg_nums, link_count):
+        """
+        Returns the (unsigned) numbers of segments within the given number of links (in either
+        direction) of any of the given (unsigned) segments, not including the given segments.
+        """
+        given_seg_nums = set(seg_nums)
+        nearby_seg_nums = set()
+        current_seg_nums = given_seg_nums
+        for _ in range(link_count):
+            next_seg_nums = set()
+            for seg_num in current_seg_nums:
+                for linked_seg_num in itertools.chain(self.get_downstream_seg_nums(seg_num),
+                                                      self.get_downstream_seg_nums(-seg_num)):
+                    linked_seg_num = abs(linked_seg_num)
+                    if linked_seg_num not in given_seg_nums and \
+                            linked_seg_num not in nearby_seg_nums:
+                        next_seg_nums.add(linked_seg_num)
+            nearby_seg_nums.update(next_seg_nums)
+            current_seg_nums = next_seg_nums
+        return nearby_seg_nums
+
+    def remove_segments_and_get_nearby(self, seg_nums):
+        """
+        Removes the segments and returns the (unsigned) numbers of the remaining segments which
+        were within two links of them. The removal can only have changed the links, dead ends and
+        dead end changes (if deleted) of these segments.
+        """
+        nearby_seg_nums = self.get_nearby_seg_nums(seg_nums, 2)
+        self.remove_segments(seg_nums)
+        return sorted(x for x in nearby_seg_nums if x in self.segments)
+
     def clean(self, read_depth_filter, largest_component):
         """
         This function does various graph repairs, filters and normalisations to make it a bit
@@ -1078,7 +1191,6 @@ class AssemblyGraph(object):
                 bridge_depth = (start_seg_depth_sum + end_seg_depth_sum) / 2.0
                 bridge_seq = self.seq_from_signed_seg_num(ending_segs[0])[:self.overlap]
                 bridge_seg = Segment(bridge_num, bridge_depth, bridge_seq, True)
-                bridge_seg.build_other_sequence_if_necessary()
                 self.segments[bridge_num] = bridge_seg
                 log.log('   new seg:   ' + str(bridge_num), 3)
 
@@ -1187,11 +1299,17 @@ class AssemblyGraph(object):
                 no_copy_depth_segments.append(segment)
         return no_copy_depth_segments
 
+    def get_topology_snapshot(self):
+        """
+        Returns a read-only GraphTopologySnapshot of the graph as it is now.
+        """
+        return GraphTopologySnapshot(self)
+
     def get_path_sequence(self, path_segments):
         """
         Gets a linear (i.e. not circular) path sequence from the graph.
         """
-        path_sequence = ''
+        sequence_parts = []
         prev_segment_number = None
         for i, seg_num in enumerate(path_segments):
             segment = self.segments[abs(seg_num)]
@@ -1200,18 +1318,19 @@ class AssemblyGraph(object):
             else:
                 seg_sequence = segment.reverse_sequence
             if i == 0:
-                path_sequence = seg_sequence
+                sequence_parts.append(seg_sequence)
             else:
                 if seg_num not in self.forward_links[prev_segment_number]:
                     raise BadPath(str(path_segments) + ' is not a valid path')
                 if self.overlap > 0 and \
-                        path_sequence[-self.overlap:] != seg_sequence[:self.overlap]:
+                        get_sequence_end(sequence_parts, self.overlap) != \
+                        seg_sequence[:self.overlap]:
                     raise BadOverlaps('overlaps do not match when merging ' +
                                       str(prev_segment_number) + ' and ' + str(seg_num) +
                                       ' in path ' + str(path_segments))
-                path_sequence += seg_sequence[self.overlap:]
+                sequence_parts.append(seg_sequence[self.overlap:])
             prev_segment_number = seg_num
-        return path_sequence
+        return ''.join(sequence_parts)
 
     def apply_bridges(self, bridges, verbosity, min_bridge_qual):
         """
@@ -1222,14 +1341,16 @@ class AssemblyGraph(object):
                             'This ensures that when multiple, contradictory bridges exist, the '
                             'most supported option is used.')
 
-        unbridged_graph = copy.deepcopy(self)
+        unbridged_graph = self.get_topology_snapshot()
 
         # Each segment can have only one bridge per side, so we will track which segments have had
-        # a bridge applied off one side or the other.
+        # a bridge applied off one side or the other. We also track which segments are in the paths
+        # of applied bridges (an OrderedDict used as an ordered set) and, for each such segment,
+        # the applied bridges using it.
         right_bridged = set()
         left_bridged = set()
-        seg_nums_used_in_bridges = []
-        applied_bridges = []
+        seg_nums_used_in_bridges = OrderedDict()
+        applied_bridges_by_seg = defaultdict(list)
 
         # Sort bridges first by type: LongReadBridge, SpadesContigBridge and then
         # LoopUnrollingBridge. Then sort by quality so within each type we apply the best bridges
@@ -1265,17 +1386,9 @@ class AssemblyGraph(object):
                 # bridge that happens to start or end in this bridge. That arrangement (two bridges,
                 # each of which end inside the other's path) can break up the graph if they are
                 # both applied, so don't apply this bridge if such a case exists.
-                bridges_using_this_segment = []
-                if abs(bridge.start_segment) in seg_nums_used_in_bridges:
-                    for applied_bridge in applied_bridges:
-                        segs_in_applied_bridge_path = set(abs(x) for x in applied_bridge.graph_path)
-                        if abs(bridge.start_segment) in segs_in_applied_bridge_path:
-                            bridges_using_this_segment.append(applied_bridge)
-                if abs(bridge.end_segment) in seg_nums_used_in_bridges:
-                    for applied_bridge in applied_bridges:
-                        segs_in_applied_bridge_path = set(abs(x) for x in applied_bridge.graph_path)
-                        if abs(bridge.end_segment) in segs_in_applied_bridge_path:
-                            bridges_using_this_segment.append(applied_bridge)
+                bridges_using_this_segment = \
+                    applied_bridges_by_seg.get(abs(bridge.start_segment), []) + \
+                    applied_bridges_by_seg.get(abs(bridge.end_segment), [])
                 if bridges_using_this_segment:
                     segs_in_path = set(abs(x) for x in bridge.graph_path)
                     for bridge_using_this_segment in bridges_using_this_segment:
@@ -1293,8 +1406,8 @@ class AssemblyGraph(object):
                 # high enough for this bridge to be applicable.
                 if bridge.quality >= min_bridge_qual:
                     self.apply_bridge(bridge, right_bridged, left_bridged, seg_nums_used_in_bridges)
-                    seg_nums_used_in_bridges = remove_dupes_preserve_order(seg_nums_used_in_bridges)
-                    applied_bridges.append(bridge)
+                    for seg_num in set(abs(x) for x in bridge.graph_path):
+                        applied_bridges_by_seg[seg_num].append(bridge)
                     if verbosity > 1:
                         bridge_application_table_row.append('applied')
                     bridge_application_table.append(bridge_application_table_row)
@@ -1342,7 +1455,6 @@ class AssemblyGraph(object):
         new_seg_num = self.get_next_available_seg_number()
         new_seg = Segment(new_seg_num, bridge.depth, bridge.bridge_sequence, True, bridge,
                           bridge.graph_path)
-        new_seg.build_other_sequence_if_necessary()
         self.segments[new_seg_num] = new_seg
 
         # Link the bridge segment in to the start/end segments.
@@ -1354,7 +1466,8 @@ class AssemblyGraph(object):
             self.add_bridge_to_segment(self.segments[abs(seg_num)], bridge)
 
         add_to_bridged_sets(bridge.start_segment, bridge.end_segment, right_bridged, left_bridged)
-        seg_nums_used_in_bridges.extend([abs(x) for x in bridge.graph_path])
+        for seg_num in bridge.graph_path:
+            seg_nums_used_in_bridges[abs(seg_num)] = None
 
     def add_bridge_to_segment(self, segment, bridge):
         """
@@ -1456,6 +1569,7 @@ class AssemblyGraph(object):
         right, however, because copy number determination and bridge paths aren't perfect.
         """
         removed_segments = []
+        stats = CleaningStats()
 
         # Get all usedupness scores once, outside the loop, to save time in the loop.
         usedupness_scores = defaultdict(float)
@@ -1463,77 +1577,82 @@ class AssemblyGraph(object):
             if seg_num in self.segments and seg_num in unbridged_graph.segments:
                 usedupness_scores[seg_num] = self.get_usedupness_score(seg_num, unbridged_graph)
 
+        # Segments (or simple paths of segments) are removed one at a time, each the first that a
+        # scan of the graph would find. Instead of rescanning the graph after each removal, the
+        # things to check are kept in heaps, ordered as a scan would find them. At first they hold
+        # everything, and after a removal only the segments near it are added again, as nothing
+        # further away can have changed.
+        used_seg_nums = list(seg_nums_used_in_bridges)
+        used_seg_order = {seg_num: i for i, seg_num in enumerate(used_seg_nums)}
+        dead_end_worklist = list(range(len(used_seg_nums)))
+        path_groups = UsedPathGroups(self, used_seg_order, usedupness_scores, stats)
+
         # For the second pass, we also remove segments (or simple paths of segments) which can be
         # removed without creating any dead ends.
         while True:
             # First we remove as many segments as possible that are used in bridges and have dead
             # ends.
-            while True:
-                for seg_num in seg_nums_used_in_bridges:
-                    if seg_num in self.segments and self.dead_end_count(seg_num) > 0:
-                        self.remove_segments([seg_num])
-                        removed_segments.append(seg_num)
-                        break
-                else:
-                    break
+            stats.passes += 1
+            while dead_end_worklist:
+                seg_num = used_seg_nums[heapq.heappop(dead_end_worklist)]
+                if seg_num not in self.segments:
+                    continue
+                stats.segments_visited += 1
+                if self.dead_end_count(seg_num) > 0:
+                    nearby_seg_nums = self.remove_segments_and_get_nearby([seg_num])
+                    removed_segments.append(seg_num)
+                    stats.passes += 1
+                    for nearby_seg_num in nearby_seg_nums:
+                        if nearby_seg_num in used_seg_order:
+                            heapq.heappush(dead_end_worklist, used_seg_order[nearby_seg_num])
+                    path_groups.update([seg_num] + nearby_seg_nums)
 
             # When the code gets here, that means all possible used-in-bridge-dead-ends have been
             # removed. Now we want to remove segments (or groups of segments in simple paths) which
             # have been entirely used in bridges and can be removed without creating dead ends.
-
-            # Group the segments based on simple paths. Segments not on a simple path will be in
-            # their own group.
-            path_groups = []
-            segs_in_path_groups = set()
-            for seg_num in seg_nums_used_in_bridges:
-                if seg_num in self.segments and seg_num not in segs_in_path_groups:
-                    # noinspection PyTypeChecker
-                    path = self.get_simple_path(seg_num, None, 2)
-                    if all(abs(x) in seg_nums_used_in_bridges for x in path):
-                        path_groups.append(path)
-                        segs_in_path_groups.update(path)
-
-            # Sort the path groups by how likely it is that they are truly all 'used up'. These are
-            # the ones we would like to remove first. Each segment in the path is scored on its
-            # 'usedupness', and the path gets the lowest score of its constituent segments.
-            scored_path_groups = []
-            for path_group in path_groups:
-                min_score = 100.0
-                for path_seg in path_group:
-                    min_score = min(min_score, usedupness_scores[abs(path_seg)])
-                scored_path_groups.append((min_score, path_group))
-            scored_path_groups = sorted(scored_path_groups, reverse=True, key=lambda x: x[0])
-
-            for _, path in scored_path_groups:
-                if self.dead_end_change_if_path_deleted(path) <= 0:
-                    unsigned_path = [abs(x) for x in path]
-                    self.remove_segments(unsigned_path)
-                    removed_segments += unsigned_path
-                    break
-            else:
+            # The path groups are tried in order of how likely it is that they are truly all 'used
+            # up'.
+            stats.passes += 1
+            path = path_groups.pop_removable_path()
+            if path is None:
                 break
+            unsigned_path = [abs(x) for x in path]
+            nearby_seg_nums = self.remove_segments_and_get_nearby(unsigned_path)
+            removed_segments += unsigned_path
+            for nearby_seg_num in nearby_seg_nums:
+                if nearby_seg_num in used_seg_order:
+                    heapq.heappush(dead_end_worklist, used_seg_order[nearby_seg_num])
+            path_groups.update(unsigned_path + nearby_seg_nums)
 
         # It's possible at this point that there are bubbles remaining in the graph which are
-        # mostly used up. If we can delete them without introducing dead ends, we do so.
-        while True:
-            potentially_deletable_paths = []
-            for seg_num in self.segments:
-                # noinspection PyTypeChecker
-                path = self.get_simple_path(seg_num, None, 2)
-                path_lengths = [max(1, self.segments[abs(x)].get_length() - self.overlap)
-                                for x in path]
-                path_usedupness = [usedupness_scores[abs(x)] for x in path]
-                average_usedupness = weighted_average_list(path_usedupness, path_lengths)
-                potentially_deletable_paths.append((average_usedupness, path))
-            for usedupness, path in potentially_deletable_paths:
-                if usedupness > settings.CLEANING_USEDUPNESS_THRESHOLD and \
-                                self.dead_end_change_if_path_deleted(path) <= 0:
-                    unsigned_path = [abs(x) for x in path]
-                    self.remove_segments(unsigned_path)
-                    removed_segments += unsigned_path
-                    break
-            else:
-                break
+        # mostly used up. If we can delete them without introducing dead ends, we do so. Each
+        # segment's simple path is checked, in segment order. After a removal, the segments in the
+        # simple paths near it are checked again.
+        seg_nums = list(self.segments)
+        seg_order = {seg_num: i for i, seg_num in enumerate(seg_nums)}
+        bubble_worklist = list(range(len(seg_nums)))
+        stats.passes += 1
+        while bubble_worklist:
+            seg_num = seg_nums[heapq.heappop(bubble_worklist)]
+            if seg_num not in self.segments:
+                continue
+            stats.segments_visited += 1
+            # noinspection PyTypeChecker
+            path = self.get_simple_path(seg_num, None, 2)
+            path_lengths = [max(1, self.segments[abs(x)].get_length() - self.overlap)
+                            for x in path]
+            path_usedupness = [usedupness_scores[abs(x)] for x in path]
+            average_usedupness = weighted_average_list(path_usedupness, path_lengths)
+            if average_usedupness > settings.CLEANING_USEDUPNESS_THRESHOLD and \
+                    self.dead_end_change_if_path_deleted(path) <= 0:
+                unsigned_path = [abs(x) for x in path]
+                nearby_seg_nums = self.remove_segments_and_get_nearby(unsigned_path)
+                removed_segments += unsigned_path
+                stats.passes += 1
+                for nearby_seg_num in nearby_seg_nums:
+                    # noinspection PyTypeChecker
+                    for path_seg_num in self.get_simple_path(nearby_seg_num, None, 2):
+                        heapq.heappush(bubble_worklist, seg_order[abs(path_seg_num)])
 
         # It's also possible for entire graph components to be mostly used up, in which case we can
         # delete those as well.
@@ -1560,7 +1679,10 @@ class AssemblyGraph(object):
         self.remove_components_entirely_used_in_bridges(seg_nums_used_in_bridges)
         self.remove_unbridging_segments(anchor_seg_nums)
         self.remove_small_components(min_component_size)
-        self.remove_small_dead_ends(min_dead_end_size)
+        self.remove_small_dead_ends(min_dead_end_size, stats)
+        log.log('Cleaning took ' + int_to_str(stats.passes) + ' passes and visited ' +
+                int_to_str(stats.segments_visited) + ' segments', 3)
+        return stats
 
     def remove_components_without_anchor_segments(self, anchor_seg_nums):
         """
@@ -1600,12 +1722,24 @@ class AssemblyGraph(object):
         """
         Deletes any segments which cannot possibly connect two anchor segments.
         """
+        # A segment strand can connect to an anchor segment if it leads (by one or more links) to
+        # either strand of one. Searching backwards from the anchor segments finds all such strands
+        # at once, instead of searching forwards from each segment.
+        anchor_strands = set(anchor_seg_nums) | set(-x for x in anchor_seg_nums)
+        leads_to_anchor = set()
+        stack = list(anchor_strands)
+        while stack:
+            seg_num = stack.pop()
+            for upstream_seg_num in self.get_upstream_seg_nums(seg_num):
+                if upstream_seg_num not in leads_to_anchor:
+                    leads_to_anchor.add(upstream_seg_num)
+                    stack.append(upstream_seg_num)
+
         segment_nums_to_remove = []
         for seg_num in self.segments:
             if seg_num in anchor_seg_nums:
                 continue
-            if not (self.search(seg_num, anchor_seg_nums) and
-                    self.search(-seg_num, anchor_seg_nums)):
+            if not (seg_num in leads_to_anchor and -seg_num in leads_to_anchor):
                 segment_nums_to_remove.append(seg_num)
         if segment_nums_to_remove:
             log.log('Removed unbridging segments:', 2)
@@ -1773,6 +1907,8 @@ class AssemblyGraph(object):
             if link_nums:
                 new_reverse_links[changes[seg_num]] = [changes[x] for x in link_nums]
         self.reverse_links = new_reverse_links
+        self.link_index = None
+        self.component_index = None
 
         self.copy_depths = {changes[x]: y for x, y in self.copy_depths.items()}
 
@@ -1904,13 +2040,17 @@ class AssemblyGraph(object):
             return False
         return self.get_upstream_seg_nums(seg) == [seg]
 
-    def get_simple_path(self, starting_seg, single_copy_seg_nums, bridging_mode):
+    def get_simple_path(self, starting_seg, single_copy_seg_nums, bridging_mode,
+                        excluded_seg_nums=None):
         """
         Starting with the given segment, this function tries to expand outward as far as possible
         while maintaining a simple (i.e. can be merged) path. If it can't expand at all, it will
         just return a list of the starting segment. At lower bridging modes, we only allow the
-        merging of paths which are made up of single copy segments and bridges.
+        merging of paths which are made up of single copy segments and bridges. The path won't
+        expand into any of the excluded segments (unsigned numbers).
         """
+        if excluded_seg_nums is None:
+            excluded_seg_nums = set()
         simple_path = [starting_seg]
 
         # Expand forward as much as possible.
@@ -1922,6 +2062,8 @@ class AssemblyGraph(object):
             if potential in simple_path or -potential in simple_path:
                 break
             abs_potential = abs(potential)
+            if abs_potential in excluded_seg_nums:
+                break
             if bridging_mode < 2 and not self.is_single_copy_or_bridge(abs_potential, bridging_mode,
                                                                        single_copy_seg_nums):
                 break
@@ -1940,6 +2082,8 @@ class AssemblyGraph(object):
             if potential in simple_path or -potential in simple_path:
                 break
             abs_potential = abs(potential)
+            if abs_potential in excluded_seg_nums:
+                break
             if bridging_mode < 2 and not self.is_single_copy_or_bridge(abs_potential, bridging_mode,
                                                                        single_copy_seg_nums):
                 break
@@ -1960,6 +2104,7 @@ class AssemblyGraph(object):
             self.forward_links[seg_num].sort()
         for seg_num in self.reverse_links:
             self.reverse_links[seg_num].sort()
+        self.link_index = None
 
     def search(self, start, ends):
         """
@@ -2472,32 +2617,136 @@ class AssemblyGraph(object):
             segment.rotate_sequence(shift, False)
 
 
+class GraphTopologySnapshot(object):
+    """
+    A lightweight, read-only copy of an AssemblyGraph's links, segment depths and copy depths,
+    e.g. for comparing against the graph after bridges have been applied. Unlike a deepcopy of the
+    graph, it doesn't copy bridges or paths, and its segments share their sequence strings with
+    the graph's segments (changing a segment's sequence replaces the string, so the snapshot keeps
+    the old one).
+    """
+    def __init__(self, graph):
+        self.overlap = graph.overlap
+        self.segments = {num: seg.get_snapshot() for num, seg in graph.segments.items()}
+        self.forward_links = {seg: list(links) for seg, links in graph.forward_links.items()}
+        self.reverse_links = {seg: list(links) for seg, links in graph.reverse_links.items()}
+        self.copy_depths = {seg: list(depths) for seg, depths in graph.copy_depths.items()}
+
+    get_path_sequence = AssemblyGraph.get_path_sequence
+
+
+class CleaningStats(object):
+    """
+    Counts the work done cleaning up the graph after bridging: the number of passes (searches for
+    something to remove) and the number of segments visited (checked for removal) in them.
+    """
+    def __init__(self):
+        self.passes = 0
+        self.segments_visited = 0
+
+
+class UsedPathGroups(object):
+    """
+    Holds the simple paths made entirely of segments used in bridges, which
+    clean_up_after_bridging_2 tries to remove. They are tried in order of decreasing usedupness
+    (the lowest usedupness of their segments), and otherwise in the order a scan through the used
+    segments would find them. That scan finds each simple path once in each direction, from the
+    first of its segments (in scan order) which is on the path's forward strand in that direction.
+    """
+    def __init__(self, graph, used_seg_order, usedupness_scores, stats):
+        self.graph = graph
+        self.used_seg_order = used_seg_order
+        self.usedupness_scores = usedupness_scores
+        self.stats = stats
+        self.paths = {}  # scan position of the path's first segment -> path
+        self.scores = {}
+        self.keys_by_seg_num = defaultdict(set)
+        self.heap = []
+        self.rejected = set()  # paths which can't currently be removed
+        self.update(used_seg_order)
+
+    def update(self, seg_nums):
+        """
+        Finds the paths for the given segments (and for the others in their current paths) again,
+        and queues them to be tried.
+        """
+        seg_nums_to_find = set()
+        for seg_num in seg_nums:
+            for key in list(self.keys_by_seg_num.get(seg_num, ())):
+                seg_nums_to_find.update(self.remove_path(key))
+            seg_nums_to_find.add(seg_num)
+
+        seg_nums_found = set()
+        for seg_num in sorted(seg_nums_to_find):
+            if seg_num in seg_nums_found or seg_num not in self.graph.segments or \
+                    seg_num not in self.used_seg_order:
+                continue
+            self.stats.segments_visited += 1
+            # noinspection PyTypeChecker
+            path = self.graph.get_simple_path(seg_num, None, 2)
+            seg_nums_found.update(abs(x) for x in path)
+            if not all(abs(x) in self.used_seg_order for x in path):
+                continue
+            for strand_seg_nums in ([x for x in path if x > 0], [-x for x in path if x < 0]):
+                if not strand_seg_nums:
+                    continue
+                first_seg_num = min(strand_seg_nums, key=lambda x: self.used_seg_order[x])
+                if first_seg_num == seg_num:
+                    self.add_path(self.used_seg_order[first_seg_num], path)
+                else:
+                    # noinspection PyTypeChecker
+                    self.add_path(self.used_seg_order[first_seg_num],
+                                  self.graph.get_simple_path(first_seg_num, None, 2))
+
+    def add_path(self, key, path):
+        score = 100.0
+        for seg_num in path:
+            score = min(score, self.usedupness_scores[abs(seg_num)])
+        self.paths[key] = path
+        self.scores[key] = score
+        for seg_num in path:
+            self.keys_by_seg_num[abs(seg_num)].add(key)
+        self.rejected.discard(key)
+        heapq.heappush(self.heap, (-score, key))
+
+    def remove_path(self, key):
+        """
+        Forgets the path and returns its (unsigned) segment numbers.
+        """
+        path = self.paths.pop(key)
+        del self.scores[key]
+        seg_nums = [abs(x) for x in path]
+        for seg_num in seg_nums:
+            self.keys_by_seg_num[seg_num].discard(key)
+        return seg_nums
+
+    def pop_removable_path(self):
+        """
+        Returns the first path which can be removed without creating dead ends, or None if there
+        isn't one.
+        """
+        while self.heap:
+            negative_score, key = heapq.heappop(self.heap)
+            if key not in self.paths or self.scores[key] != -negative_score or \
+                    key in self.rejected:
+                continue
+            self.stats.segments_visited += 1
+            path = self.paths[key]
+            if self.graph.dead_end_change_if_path_deleted(path) <= 0:
+                return path
+            self.rejected.add(key)
+        return None
+
+
 def get_headers_and_sequences(filename):
     """
     Reads through a SPAdes assembly graph file and returns two lists:
     1) the headers for each segment (without the leading '>')
     2) the sequences for each segment
     """
-    headers = []
-    sequences = []
-    header = ''
-    sequence = ''
-    with open(filename, 'rt') as graph_file:
-        for line in graph_file:
-            line = line.strip()
-            if not line:
-                continue
-            if line[0] == '>':
-                if header:
-                    headers.append(header)
-                    sequences.append(sequence)
-                    sequence = ''
-                header = line[1:]
-            else:
-                sequence += line
-        if header:
-            headers.append(header)
-            sequences.append(sequence)
+    records = load_fasta_records(filename)
+    headers = [x[0] for x in records]
+    sequences = [x[1] for x in records]
     return headers, sequences
 
 
@@ -2681,6 +2930,66 @@ def insert_num_in_list(lst, val_1, val_2, insert_val):
     return new_list
 
 
+def get_sequence_end(sequence_parts, length):
+    """
+    Returns the last length bases of the sequence made by joining the parts, without joining them
+    all.
+    """
+    end_parts = []
+    end_length = 0
+    for part in reversed(sequence_parts):
+        end_parts.append(part)
+        end_length += len(part)
+        if end_length >= length:
+            break
+    return ''.join(reversed(end_parts))[-length:]
+
+
+def merge_segments_in_graph_paths(graph_paths, merges):
+    """
+    Takes graph paths and a list of merges (each a simple path and the number of the segment it
+    was merged into) and returns the graph paths as they would be if merge_simple_path adjusted
+    them for each merge in turn: each merged path is replaced with its new segment, and a graph
+    path which still contains any of its original segments is split into pieces without them.
+    Each graph path is only adjusted for the merges which involve its segments.
+    """
+    if not merges:
+        return dict(graph_paths)
+    merge_indices = {}
+    for i, (merge_path, _) in enumerate(merges):
+        for seg_num in merge_path:
+            merge_indices[abs(seg_num)] = i
+
+    def merge_in_graph_path(path_name, path, path_merge_indices):
+        for j, merge_index in enumerate(path_merge_indices):
+            merge_path, new_seg_num = merges[merge_index]
+            flipped_merge_path = [-x for x in reversed(merge_path)]
+            path = find_replace_in_list(path, merge_path, [new_seg_num])
+            path = find_replace_in_list(path, flipped_merge_path, [-new_seg_num])
+            split_paths = split_path_multiple(path, merge_path + flipped_merge_path)
+            if len(split_paths) != 1:
+                pieces = []
+                for k, split_path_segments in enumerate(split_paths):
+                    pieces += merge_in_graph_path(path_name + '_' + str(k + 1),
+                                                  split_path_segments,
+                                                  path_merge_indices[j + 1:])
+                return pieces
+            path = split_paths[0]
+        return [(path_name, path)]
+
+    # Merging drops any graph paths which are too short to split (a single segment), whether or
+    # not they contain the merged segments.
+    new_paths = {}
+    for path_name, path_segments in graph_paths.items():
+        if len(path_segments) < 2:
+            continue
+        path_merge_indices = sorted(set(merge_indices[abs(x)] for x in path_segments
+                                        if abs(x) in merge_indices))
+        for name, path in merge_in_graph_path(path_name, path_segments, path_merge_indices):
+            new_paths[name] = path
+    return new_paths
+
+
 def find_replace_in_list(lst, pattern, replacement):
     """
     This function looks for the given pattern in the list and if found, replaces it.
@@ -2772,18 +3081,3 @@ def add_to_bridged_sets(start, end, right_bridged, left_bridged):
         left_bridged.add(end)
     else:
         right_bridged.add(-end)
-
-
-def get_overlap_from_gfa_link(filename):
-    """
-    Looks for the first link line and gets the overlap. Assumes that all overlaps in the graph are
-    the same.
-    """
-    with open(filename, 'rt') as gfa_file:
-        for line in gfa_file:
-            if line.startswith('L'):
-                line_parts = line.strip().split('\t')
-                if len(line_parts) > 5:
-                    cigar = line_parts[5]
-                    return int(cigar[:-1])
-    return 0
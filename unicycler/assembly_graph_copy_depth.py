@@ -13,6 +13,8 @@ details. You should have received a copy of the GNU General Public License along
 not, see <http://www.gnu.org/licenses/>.
 """
 
+import heapq
+import itertools
 from .misc import print_table, get_right_arrow
 from . import settings
 from . import log
@@ -71,111 +73,194 @@ def determine_copy_depth(graph):
 
     # Propagate copy depth as much as possible using those initial assignments.
     copy_depth_table = [['Input', '', 'Output']]
-    determine_copy_depth_part_2(graph, settings.COPY_PROPAGATION_TOLERANCE, copy_depth_table)
+    propagator = CopyDepthPropagator(graph)
+    determine_copy_depth_part_2(propagator, settings.COPY_PROPAGATION_TOLERANCE, copy_depth_table)
 
     # Assign single copy to the largest available segment, propagate and repeat.
     while True:
-        assignments = assign_single_copy_depth(graph, settings.MIN_SINGLE_COPY_LENGTH,
-                                               copy_depth_table)
-        determine_copy_depth_part_2(graph, settings.COPY_PROPAGATION_TOLERANCE, copy_depth_table)
+        assignments = propagator.assign_single_copy_depth(copy_depth_table)
+        determine_copy_depth_part_2(propagator, settings.COPY_PROPAGATION_TOLERANCE,
+                                    copy_depth_table)
         if not assignments:
             break
 
     # Now propagate with no tolerance threshold to complete the remaining segments.
     if log.logger.stdout_verbosity_level >= 3:
         copy_depth_table.append(['REMOVING PROPAGATION TOLERANCE', '', ''])
-    determine_copy_depth_part_2(graph, 1.0, copy_depth_table)
+    determine_copy_depth_part_2(propagator, 1.0, copy_depth_table)
 
     print_table(copy_depth_table, alignments='RLL', max_col_width=999, hide_header=True,
                 indent=0, col_separation=1, verbosity=2)
 
 
-def determine_copy_depth_part_2(graph, tolerance, copy_depth_table):
+def determine_copy_depth_part_2(propagator, tolerance, copy_depth_table):
     """
     Propagates copy depth repeatedly until assignments stop.
     """
-    if log.logger.stdout_verbosity_level >= 3:
-        copy_depth_table.append(['MERGING MULTIPLICITY', '', ''])
-    while merge_copy_depths(graph, tolerance, copy_depth_table):
-        pass
-    if log.logger.stdout_verbosity_level >= 3:
-        copy_depth_table.append(['SPLITTING MULTIPLICITY', '', ''])
-    if redistribute_copy_depths(graph, tolerance, copy_depth_table):
-        determine_copy_depth_part_2(graph, tolerance, copy_depth_table)
-
-
-def assign_single_copy_depth(graph, min_single_copy_length, copy_depth_table):
-    """
-    This function assigns a single copy to the longest available segment.
-    """
-    if log.logger.stdout_verbosity_level >= 3:
-        copy_depth_table.append(['FINDING NEW SINGLE-COPY', '', ''])
-    segments = sorted(get_segments_without_copies(graph), key=lambda x: x.get_length(),
-                      reverse=True)
-    for segment in segments:
-        if segment.get_length() < min_single_copy_length:
-            continue
-        num = segment.number
-        if num in graph.manual_multiplicity and graph.manual_multiplicity[num] != 1:
-            continue
-        if exactly_one_link_per_end(graph, segment):
-            name_depth_before = get_seg_name_depth_str(graph, segment.number)
-            graph.copy_depths[segment.number] = [segment.depth]
-            name_depth_after = get_seg_name_depth_str(graph, segment.number)
-            add_to_copy_depth_table(name_depth_before, name_depth_after, copy_depth_table)
-            return 1
-    return 0
+    while True:
+        if log.logger.stdout_verbosity_level >= 3:
+            copy_depth_table.append(['MERGING MULTIPLICITY', '', ''])
+        while propagator.merge_copy_depths(tolerance, copy_depth_table):
+            pass
+        if log.logger.stdout_verbosity_level >= 3:
+            copy_depth_table.append(['SPLITTING MULTIPLICITY', '', ''])
+        if not propagator.redistribute_copy_depths(tolerance, copy_depth_table):
+            break
 
 
-def merge_copy_depths(graph, error_margin, copy_depth_table):
+class CopyDepthPropagator(object):
     """
-    This function looks for segments where they have input on one end where:
-      1) All input segments have copy depth assigned.
-      2) All input segments exclusively input to this segment.
-    All such cases are evaluated, and the segment with the lowest error (if that error is below
-    the allowed error margin) is assigned copy depths, scaling the inputs so their sum
-    exactly matches the segment's depth.
+    This class carries out the steps of copy depth propagation. Whether a segment can get copy
+    depths from its neighbours (or give them to its neighbours) only changes when one of those
+    neighbours gets copy depths, so instead of scanning the whole graph for each step, it keeps:
+      * the best merge for each segment without copy depths, in a heap ordered by error,
+      * a worklist of segments which might be able to redistribute their copy depths,
+      * the segments which could become single copy, longest first.
+    After each assignment, only the neighbours of the newly assigned segments are re-evaluated.
+    The graph's links and depths must not change while it is in use, and all copy depth
+    assignments must go through it.
     """
-    segments = get_segments_without_copies(graph)
-    if not segments:
-        return 0
-
-    best_segment_num = None
-    best_source_nums = None
-    best_new_depths = []
-    lowest_error = float('inf')
-
-    for segment in segments:
-        num = segment.number
-        exclusive_inputs = graph.get_exclusive_inputs(num)
-        exclusive_outputs = graph.get_exclusive_outputs(num)
-        in_depth_possible = exclusive_inputs and all_have_copy_depths(graph, exclusive_inputs)
-        out_depth_possible = exclusive_outputs and all_have_copy_depths(graph, exclusive_outputs)
-        if in_depth_possible:
-            depths, error = scale_copy_depths_from_source_segments(graph, num, exclusive_inputs)
-            conflict = (num in graph.manual_multiplicity and
-                        graph.manual_multiplicity[num] != len(depths))
-            if error < lowest_error and not conflict:
-                lowest_error = error
-                best_segment_num = num
-                best_source_nums = exclusive_inputs
-                best_new_depths = depths
-        if out_depth_possible:
-            depths, error = scale_copy_depths_from_source_segments(graph, num, exclusive_outputs)
+    def __init__(self, graph):
+        self.graph = graph
+
+        # Ties between equally good steps go to the segment which comes first in the graph.
+        self.order = {num: i for i, num in enumerate(graph.segments)}
+
+        # The current best merge for each segment, and a heap of merges (which may include
+        # out-of-date ones, recognised by their ID).
+        self.merges = {}
+        self.merge_heap = []
+        self.merge_ids = itertools.count()
+        for num in graph.segments:
+            if num not in graph.copy_depths:
+                self.update_merge(num)
+
+        # Segments with two or more copies which haven't yet failed to redistribute them at the
+        # current tolerance.
+        self.redistribution_worklist = set()
+        self.redistribution_tolerance = None
+
+        # Segments which are long enough and have the right links to be assigned single copy.
+        self.single_copy_candidates = [x.number for x in sorted(graph.segments.values(),
+                                                                key=lambda x: x.get_length(),
+                                                                reverse=True)
+                                       if okay_for_single_copy_assignment(graph, x)]
+        self.single_copy_index = 0
+
+    def get_neighbours(self, num):
+        neighbours = set()
+        for links in (self.graph.forward_links, self.graph.reverse_links):
+            neighbours.update(abs(x) for x in links.get(num, []))
+            neighbours.update(abs(x) for x in links.get(-num, []))
+        return neighbours
+
+    def update_merge(self, num):
+        """
+        Finds the best way for the segment to get copy depths from the segments which
+        exclusively input to it or output from it.
+        """
+        graph = self.graph
+        best_merge = None
+        lowest_error = float('inf')
+        for sources in (graph.get_exclusive_inputs(num), graph.get_exclusive_outputs(num)):
+            if not sources or not all_have_copy_depths(graph, sources):
+                continue
+            depths, error = scale_copy_depths_from_source_segments(graph, num, sources)
             conflict = (num in graph.manual_multiplicity and
                         graph.manual_multiplicity[num] != len(depths))
             if error < lowest_error and not conflict:
                 lowest_error = error
-                best_segment_num = num
-                best_source_nums = exclusive_outputs
-                best_new_depths = depths
-    if best_segment_num and lowest_error < error_margin:
-        graph.copy_depths[best_segment_num] = best_new_depths
-        add_to_copy_depth_table(' + '.join(get_seg_name_depth_str(graph, x)
-                                           for x in best_source_nums),
-                                get_seg_name_depth_str(graph, best_segment_num), copy_depth_table)
+                best_merge = (error, self.order[num], next(self.merge_ids), num, sources, depths)
+        if best_merge is None:
+            self.merges.pop(num, None)
+        else:
+            self.merges[num] = best_merge
+            heapq.heappush(self.merge_heap, best_merge)
+
+    def copy_depths_assigned(self, segment_nums):
+        """
+        Updates the merges and worklists after the segments have been given copy depths.
+        """
+        graph = self.graph
+        for num in segment_nums:
+            self.merges.pop(num, None)
+            if len(graph.copy_depths[num]) > 1:
+                self.redistribution_worklist.add(num)
+            for neighbour in self.get_neighbours(num):
+                if neighbour not in graph.copy_depths:
+                    self.update_merge(neighbour)
+                elif len(graph.copy_depths[neighbour]) > 1:
+                    self.redistribution_worklist.add(neighbour)
+
+    def assign_single_copy_depth(self, copy_depth_table):
+        """
+        This function assigns a single copy to the longest available segment.
+        """
+        if log.logger.stdout_verbosity_level >= 3:
+            copy_depth_table.append(['FINDING NEW SINGLE-COPY', '', ''])
+        graph = self.graph
+        while self.single_copy_index < len(self.single_copy_candidates):
+            num = self.single_copy_candidates[self.single_copy_index]
+            self.single_copy_index += 1
+            if num in graph.copy_depths:
+                continue
+            name_depth_before = get_seg_name_depth_str(graph, num)
+            graph.copy_depths[num] = [graph.segments[num].depth]
+            name_depth_after = get_seg_name_depth_str(graph, num)
+            add_to_copy_depth_table(name_depth_before, name_depth_after, copy_depth_table)
+            self.copy_depths_assigned([num])
+            return 1
+        return 0
+
+    def merge_copy_depths(self, error_margin, copy_depth_table):
+        """
+        This function looks for segments where they have input on one end where:
+          1) All input segments have copy depth assigned.
+          2) All input segments exclusively input to this segment.
+        Of all such cases, the segment with the lowest error (if that error is below the allowed
+        error margin) is assigned copy depths, scaling the inputs so their sum exactly matches the
+        segment's depth.
+        """
+        graph = self.graph
+        while self.merge_heap and self.merges.get(self.merge_heap[0][3]) is not self.merge_heap[0]:
+            heapq.heappop(self.merge_heap)
+        if not self.merge_heap or not self.merge_heap[0][0] < error_margin:
+            return 0
+        _, _, _, num, source_nums, new_depths = heapq.heappop(self.merge_heap)
+        graph.copy_depths[num] = new_depths
+        add_to_copy_depth_table(' + '.join(get_seg_name_depth_str(graph, x) for x in source_nums),
+                                get_seg_name_depth_str(graph, num), copy_depth_table)
+        self.copy_depths_assigned([num])
         return 1
-    else:
+
+    def redistribute_copy_depths(self, error_margin, copy_depth_table):
+        """
+        This function deals with the easier case of copy depth redistribution: where one segments
+        with copy depth leads exclusively to multiple segments without copy depth.
+        We will then try to redistribute the source segment's copy depths among the destination
+        segments.  If it can be done within the allowed error margin, the destination segments
+        will get their copy depths.
+        """
+        graph = self.graph
+
+        # A segment which fails stays in the worklist if the error margin changes, as it may now
+        # succeed.
+        if error_margin != self.redistribution_tolerance:
+            self.redistribution_tolerance = error_margin
+            self.redistribution_worklist = set(num for num, depths in graph.copy_depths.items()
+                                               if len(depths) > 1)
+
+        for num in sorted(self.redistribution_worklist, key=lambda x: self.order[x]):
+            connections = redistribute_segment_copy_depths(graph, num, error_margin)
+            if connections is None:
+                self.redistribution_worklist.discard(num)
+                continue
+            add_to_copy_depth_table(get_seg_name_depth_str(graph, num),
+                                    ' + '.join(get_seg_name_depth_str(graph, x)
+                                               for x in connections),
+                                    copy_depth_table)
+            self.copy_depths_assigned(connections)
+            return 1
         return 0
 
 
@@ -205,67 +290,50 @@ def add_to_copy_depth_table(before_str, after_str, copy_depth_table):
     copy_depth_table.append([before_str, get_right_arrow(), after_str])
 
 
-def redistribute_copy_depths(graph, error_margin, copy_depth_table):
+def redistribute_segment_copy_depths(graph, num, error_margin):
     """
-    This function deals with the easier case of copy depth redistribution: where one segments
-    with copy depth leads exclusively to multiple segments without copy depth.
-    We will then try to redistribute the source segment's copy depths among the destination
-    segments.  If it can be done within the allowed error margin, the destination segments will
-    get their copy depths.
+    Tries to redistribute the segment's copy depths to the segments it exclusively connects to on
+    one side. Returns those connections if any of them got copy depths, or None if not.
     """
-    segments = get_segments_with_two_or_more_copies(graph)
-    if not segments:
-        return 0
-
-    for segment in segments:
-        num = segment.number
-        connections = graph.get_exclusive_inputs(num)
-        if not connections or all_have_copy_depths(graph, connections):
-            connections = graph.get_exclusive_outputs(num)
-        if not connections or all_have_copy_depths(graph, connections):
-            continue
-
-        # If we got here, then we can try to redistribute the segment's copy depths to its
-        # connections which are lacking copy depth.
-        copy_depths = graph.copy_depths[num]
-        bins = [[]] * len(connections)
-        targets = [None if x not in graph.copy_depths else len(graph.copy_depths[x])
-                   for x in connections]
-
-        # For cases where there are many copy depths being distributed to many segments, there
-        # will be too many combinations, so we don't bother trying.
-        arrangement_count = len(bins) ** len(copy_depths)
-        if arrangement_count > settings.MAX_COPY_DEPTH_DISTRIBUTION_ARRANGEMENTS:
-            continue
-        arrangements = shuffle_into_bins(copy_depths, bins, targets)
-        if not arrangements:
-            continue
-
-        lowest_error = float('inf')
-        best_arrangement = None
-        for i, arrangement in enumerate(arrangements):
-            error = get_error_for_multiple_segments_and_depths(graph, connections, arrangement)
-            if i == 0 or error < lowest_error:
-                lowest_error = error
-                best_arrangement = arrangement
-
-        # Make sure this redistribution of copy depths does not conflict with any manually assigned
-        # multiplicities.
-        conflict = False
-        if best_arrangement is not None:
-            for connection_num, connection_depths in zip(connections, best_arrangement):
-                if (connection_num in graph.manual_multiplicity and
-                        graph.manual_multiplicity[connection_num] != len(connection_depths)):
-                    conflict = True
-
-        if lowest_error < error_margin and not conflict:
-            if assign_copy_depths_where_needed(graph, connections, best_arrangement, error_margin):
-                add_to_copy_depth_table(get_seg_name_depth_str(graph, num),
-                                        ' + '.join(get_seg_name_depth_str(graph, x)
-                                                   for x in connections),
-                                        copy_depth_table)
-                return 1
-    return 0
+    connections = graph.get_exclusive_inputs(num)
+    if not connections or all_have_copy_depths(graph, connections):
+        connections = graph.get_exclusive_outputs(num)
+    if not connections or all_have_copy_depths(graph, connections):
+        return None
+
+    # If we got here, then we can try to redistribute the segment's copy depths to its
+    # connections which are lacking copy depth.
+    copy_depths = graph.copy_depths[num]
+    targets = [None if x not in graph.copy_depths else len(graph.copy_depths[x])
+               for x in connections]
+
+    # For cases where there are many copy depths being distributed to many segments, the search
+    # for the best arrangement is limited, and if it runs out of steps we don't bother trying.
+    if len(connections) ** len(copy_depths) > settings.MAX_COPY_DEPTH_DISTRIBUTION_ARRANGEMENTS:
+        max_steps = settings.MAX_COPY_DEPTH_DISTRIBUTION_SEARCH_STEPS
+    else:
+        max_steps = None
+    try:
+        best_arrangement, lowest_error = \
+            get_best_arrangement(copy_depths, [graph.segments[x].depth for x in connections],
+                                 targets, max_steps)
+    except TooManySteps:
+        return None
+    if best_arrangement is None:
+        return None
+
+    # Make sure this redistribution of copy depths does not conflict with any manually assigned
+    # multiplicities.
+    conflict = False
+    for connection_num, connection_depths in zip(connections, best_arrangement):
+        if (connection_num in graph.manual_multiplicity and
+                graph.manual_multiplicity[connection_num] != len(connection_depths)):
+            conflict = True
+
+    if lowest_error < error_margin and not conflict:
+        if assign_copy_depths_where_needed(graph, connections, best_arrangement, error_margin):
+            return connections
+    return None
 
 
 def okay_for_initial_single_copy(graph, segment):
@@ -323,6 +391,20 @@ def okay_for_initial_single_copy(graph, segment):
     return forward_okay and reverse_okay
 
 
+def okay_for_single_copy_assignment(graph, segment):
+    """
+    Returns True if the segment could be assigned single copy after the initial round (if it
+    doesn't already have copy depths): it must be long, have exactly one link per end and not
+    have a different manually set multiplicity.
+    """
+    if segment.get_length() < settings.MIN_SINGLE_COPY_LENGTH:
+        return False
+    num = segment.number
+    if num in graph.manual_multiplicity and graph.manual_multiplicity[num] != 1:
+        return False
+    return exactly_one_link_per_end(graph, segment)
+
+
 def exactly_one_link_per_end(graph, segment):
     """
     Returns True if the given segment has exactly one link on either end.
@@ -374,31 +456,6 @@ def scale_copy_depths(target_depth, source_depths):
     return scaled_depths, error
 
 
-def get_segments_without_copies(graph):
-    """
-    Returns a list of the graph segments lacking copy depth information.
-    """
-    return [x for x in graph.segments.values() if x.number not in graph.copy_depths]
-
-
-def get_segments_with_two_or_more_copies(graph):
-    return [x for x in graph.segments.values() if
-            x.number in graph.copy_depths and len(graph.copy_depths[x.number]) > 1]
-
-
-def get_error_for_multiple_segments_and_depths(graph, segment_numbers, copy_depths):
-    """
-    For the given segments, this function assesses how well the given copy depths match up.
-    The maximum error for any segment is what's returned at the end.
-    """
-    max_error = 0.0
-    for i, num in enumerate(segment_numbers):
-        segment_depth = graph.segments[num].depth
-        depth_sum = sum(copy_depths[i])
-        max_error = max(max_error, get_error(depth_sum, segment_depth))
-    return max_error
-
-
 def assign_copy_depths_where_needed(graph, segment_numbers, new_depths, error_margin):
     """
     For the given segments, this function assigns the corresponding copy depths, scaled to fit
@@ -427,11 +484,96 @@ def get_error(source, target):
         return float('inf')
 
 
+class TooManySteps(Exception):
+    pass
+
+
+def get_best_arrangement(items, bin_depths, targets, max_steps=None):
+    """
+    Finds the arrangement of items (copy depths) into bins (segments with the given depths) which
+    has the lowest error, where the error is the largest error between a bin's total and its
+    depth. The arrangements are those of shuffle_into_bins, and if more than one has the lowest
+    error, the first (in shuffle_into_bins's order) is returned. It returns the arrangement and its
+    error, or (None, None) if there are no possible arrangements.
+
+    Instead of scoring every arrangement, it does a depth-first branch-and-bound search in the
+    same order as shuffle_into_bins. A partial arrangement is abandoned when its bins can't do
+    better than the best error found so far: a bin's total can only grow, and it can't grow by
+    more than the remaining items. Equal items (copy depths are sorted, so they are adjacent) are
+    put in bins in non-decreasing order, as swapping them gives the same arrangement. If max_steps
+    is given and the search takes more steps than that, TooManySteps is raised.
+    """
+    bin_count, item_count = len(bin_depths), len(items)
+    bins = [[] for _ in range(bin_count)]
+    bin_totals = [0] * bin_count
+    item_bins = [0] * item_count
+    best = [None, None]
+    step_count = [0]
+
+    # The bounds assume that adding an item can't make a bin's total smaller. They are loosened
+    # very slightly so rounding can't make them rule out an arrangement that ties the best.
+    use_bounds = all(x >= 0.0 for x in items)
+    remaining_totals = [0.0] * (item_count + 1)
+    for k in range(item_count - 1, -1, -1):
+        remaining_totals[k] = remaining_totals[k + 1] + items[k]
+
+    def can_beat_best(k):
+        if best[0] is None or not use_bounds:
+            return True
+        for j, depth in enumerate(bin_depths):
+            total = bin_totals[j]
+            if total > depth:
+                bound = get_error(total, depth)
+            elif total + remaining_totals[k] < depth:
+                bound = get_error(total + remaining_totals[k], depth)
+            else:
+                continue
+            if bound * (1.0 - 1e-9) >= best[1]:
+                return False
+        return True
+
+    def place_item(k, empty_bin_count):
+        if k == item_count:
+            if empty_bin_count == 0 and \
+                    all(not target or target == len(bins[j]) for j, target in enumerate(targets)):
+                error = 0.0
+                for j, depth in enumerate(bin_depths):
+                    error = max(error, get_error(sum(bins[j]), depth))
+                if best[0] is None or error < best[1]:
+                    best[0], best[1] = [list(x) for x in bins], error
+            return
+
+        step_count[0] += 1
+        if max_steps is not None and step_count[0] > max_steps:
+            raise TooManySteps
+
+        only_put_in_empty = item_count - k <= empty_bin_count
+        first_bin = item_bins[k - 1] if k > 0 and items[k] == items[k - 1] else 0
+        for j in range(first_bin, bin_count):
+            if targets[j] and len(bins[j]) >= targets[j]:
+                continue
+            if only_put_in_empty and bins[j]:
+                continue
+            previous_total = bin_totals[j]
+            bins[j].append(items[k])
+            bin_totals[j] += items[k]
+            item_bins[k] = j
+            if can_beat_best(k + 1):
+                place_item(k + 1, empty_bin_count - (1 if len(bins[j]) == 1 else 0))
+            bins[j].pop()
+            bin_totals[j] = previous_total
+
+    place_item(0, bin_count)
+    return best[0], best[1]
+
+
 def shuffle_into_bins(items, bins, targets):
     """
     Shuffle items into bins in all possible arrangements that satisfy these conditions:
       1) All bins must have at least one item.
       2) Any bins with a specified target must have exactly that number of items.
+    Copy depth redistribution uses get_best_arrangement instead of scoring all of these, but this
+    is kept as its reference.
     """
     arrangements = []
 
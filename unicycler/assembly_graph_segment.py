@@ -15,7 +15,8 @@ not, see <http://www.gnu.org/licenses/>.
 """
 
 import textwrap
-from .misc import reverse_complement, add_line_breaks_to_sequence
+from .misc import add_line_breaks_to_sequence
+from .seq_utils import reverse_complement, is_homopolymer
 from .bridge_long_read import LongReadBridge
 from .bridge_spades_contig import SpadesContigBridge
 from .bridge_loop_unroll import LoopUnrollingBridge
@@ -33,10 +34,14 @@ class Segment(object):
         self.number = number
         self.depth = depth
         self.original_depth = original_depth
-        self.forward_sequence = ''
-        self.reverse_sequence = ''
         self.bridge = bridge
         self.graph_path = graph_path
+
+        # Only one strand's sequence needs to be stored: the other is made from it when first
+        # needed and then cached. At least one of these is always set (None means not yet made),
+        # and changing either strand clears the other.
+        self._forward_sequence = None
+        self._reverse_sequence = None
         if positive:
             self.forward_sequence = sequence
         else:
@@ -50,18 +55,57 @@ class Segment(object):
             seq_string = self.forward_sequence
         return str(self.number) + ' (' + seq_string + ')'
 
+    def __getstate__(self):
+        """
+        Drops the cached strand when the segment is copied or pickled, so graph copies and
+        snapshots only hold one strand per segment.
+        """
+        state = self.__dict__.copy()
+        if state['_forward_sequence'] is not None:
+            state['_reverse_sequence'] = None
+        return state
+
+    def get_snapshot(self):
+        """
+        Returns a new segment with just this one's number, depth and sequence. The sequence string
+        is shared, not copied.
+        """
+        if self._forward_sequence is not None:
+            return Segment(self.number, self.depth, self._forward_sequence, True)
+        return Segment(self.number, self.depth, self._reverse_sequence, False)
+
+    @property
+    def forward_sequence(self):
+        if self._forward_sequence is None:
+            self._forward_sequence = reverse_complement(self._reverse_sequence)
+        return self._forward_sequence
+
+    @forward_sequence.setter
+    def forward_sequence(self, sequence):
+        self._forward_sequence = sequence
+        self._reverse_sequence = None
+
+    @property
+    def reverse_sequence(self):
+        if self._reverse_sequence is None:
+            self._reverse_sequence = reverse_complement(self._forward_sequence)
+        return self._reverse_sequence
+
+    @reverse_sequence.setter
+    def reverse_sequence(self, sequence):
+        self._reverse_sequence = sequence
+        self._forward_sequence = None
+
     def add_sequence(self, sequence, positive):
+        """
+        Adds a strand's sequence (e.g. from a FASTG file which has both). If the segment already
+        has its forward sequence, then the reverse one isn't needed as it can be made from that.
+        """
         if positive:
             self.forward_sequence = sequence
-        else:
+        elif not self._forward_sequence:
             self.reverse_sequence = sequence
 
-    def build_other_sequence_if_necessary(self):
-        if not self.forward_sequence:
-            self.forward_sequence = reverse_complement(self.reverse_sequence)
-        if not self.reverse_sequence:
-            self.reverse_sequence = reverse_complement(self.forward_sequence)
-
     def get_length(self):
         return len(self.forward_sequence)
 
@@ -72,13 +116,7 @@ class Segment(object):
         """
         Returns True if the segment's sequence is made up of only one base.
         """
-        if len(self.forward_sequence) == 0:
-            return False
-        first_base = self.forward_sequence[0].lower()
-        for base in self.forward_sequence[1:]:
-            if base.lower() != first_base:
-                return False
-        return True
+        return is_homopolymer(self.forward_sequence)
 
     def gfa_segment_line(self):
         """
@@ -142,7 +180,6 @@ class Segment(object):
         if amount == 0:
             return
         self.forward_sequence = self.forward_sequence[:-amount]
-        self.reverse_sequence = self.reverse_sequence[amount:]
 
     def trim_from_start(self, amount):
         """
@@ -152,46 +189,40 @@ class Segment(object):
         if amount == 0:
             return
         self.forward_sequence = self.forward_sequence[amount:]
-        self.reverse_sequence = self.reverse_sequence[:-amount]
 
     def append_to_forward_sequence(self, additional_seq):
         """
-        Adds the given sequence to the end of the forward sequence (and updates the reverse
-        sequence accordingly).
+        Adds the given sequence to the end of the forward sequence (the reverse sequence will be
+        rebuilt when next needed).
         """
         self.forward_sequence = self.forward_sequence + additional_seq
-        self.reverse_sequence = reverse_complement(self.forward_sequence)
 
     def append_to_reverse_sequence(self, additional_seq):
         """
-        Adds the given sequence to the end of the reverse sequence (and updates the forward
-        sequence accordingly).
+        Adds the given sequence to the end of the reverse sequence (the forward sequence will be
+        rebuilt when next needed).
         """
         self.reverse_sequence = self.reverse_sequence + additional_seq
-        self.forward_sequence = reverse_complement(self.reverse_sequence)
 
     def prepend_to_forward_sequence(self, additional_seq):
         """
-        Adds the given sequence to the end of the forward sequence (and updates the reverse
-        sequence accordingly).
+        Adds the given sequence to the start of the forward sequence (the reverse sequence will be
+        rebuilt when next needed).
         """
         self.forward_sequence = additional_seq + self.forward_sequence
-        self.reverse_sequence = reverse_complement(self.forward_sequence)
 
     def prepend_to_reverse_sequence(self, additional_seq):
         """
-        Adds the given sequence to the end of the reverse sequence (and updates the forward
-        sequence accordingly).
+        Adds the given sequence to the start of the reverse sequence (the forward sequence will be
+        rebuilt when next needed).
         """
         self.reverse_sequence = additional_seq + self.reverse_sequence
-        self.forward_sequence = reverse_complement(self.reverse_sequence)
 
     def remove_sequence(self):
         """
         Gets rid of the segment sequence entirely, turning it into a zero-length segment.
         """
         self.forward_sequence = ''
-        self.reverse_sequence = ''
 
     def rotate_sequence(self, start_pos, flip):
         """
@@ -201,11 +232,7 @@ class Segment(object):
         """
         unrotated_seq = self.forward_sequence
         rotated_seq = unrotated_seq[start_pos:] + unrotated_seq[:start_pos]
-        rev_comp_rotated_seq = reverse_complement(rotated_seq)
-
         if flip:
-            self.forward_sequence = rev_comp_rotated_seq
             self.reverse_sequence = rotated_seq
         else:
             self.forward_sequence = rotated_seq
-            self.reverse_sequence = rev_comp_rotated_seq
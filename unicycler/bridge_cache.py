@@ -0,0 +1,150 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This module contains an on-disk cache of finalised long read bridges. Finalising a bridge (making
+its consensus sequence and searching the graph for its path) is slow, so a resumed run, or a rerun
+with different bridge application settings, can load the results from the cache instead.
+
+Each bridge's key is a hash of everything its finalisation depends on: its start/end segments,
+its spanning reads (and their alignments' scores and lengths), the graph and the finalisation
+settings. Results are appended to the cache file as each bridge finishes, so a run which is
+interrupted partway through bridging keeps the bridges it completed.
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+import os
+import pickle
+from . import settings
+
+# The version should be incremented whenever a change to bridge finalisation would make old cached
+# results wrong.
+BRIDGE_CACHE_VERSION = 2
+
+
+class BridgeCache(object):
+
+    def __init__(self, filename, graph, finalise_args):
+        """
+        Loads any results already in the cache file. The graph and finalisation arguments are
+        hashed once here, as they are the same for every bridge. The time limit (the last
+        finalisation argument) is left out, as bridges which run out of time aren't cached.
+        """
+        self.filename = filename
+        run_hash = hashlib.sha256()
+        run_hash.update(str(BRIDGE_CACHE_VERSION).encode())
+        run_hash.update(get_graph_fingerprint(graph))
+        scoring_scheme, min_alignment_length, read_lengths, estimated_genome_size, \
+            expected_linear_seqs = finalise_args[:5]
+        run_hash.update(repr((scoring_scheme.get_full_string(), min_alignment_length,
+                              sorted(read_lengths.items()), estimated_genome_size,
+                              expected_linear_seqs,
+                              settings.GRAPH_ALIGNMENT_PATH_SEARCH)).encode())
+        self.run_hash = run_hash.digest()
+        self.results = load_bridge_cache(filename)
+
+        # The results looked up or added by this run, which are all that save keeps.
+        self.run_results = {}
+
+    def get_key(self, bridge):
+        key = hashlib.sha256(self.run_hash)
+        key.update(repr((bridge.start_segment, bridge.end_segment)).encode())
+        for sequence, qualities, start_alignment, end_alignment in bridge.reads:
+            key.update(repr((sequence, qualities,
+                             get_alignment_summary(start_alignment),
+                             get_alignment_summary(end_alignment))).encode())
+        return key.hexdigest()
+
+    def get(self, bridge):
+        """
+        Returns the bridge's cached (finalised state, table output), or None if it isn't in the
+        cache.
+        """
+        key = self.get_key(bridge)
+        result = self.results.get(key)
+        if result is not None:
+            self.run_results[key] = result
+        return result
+
+    def add(self, bridge, output):
+        """
+        Adds a just-finalised bridge to the cache (unless it ran out of time, as it may do better
+        with another go). Failing to write the cache (e.g. in a read-only directory) is not an
+        error.
+        """
+        if bridge.timed_out:
+            return
+        key = self.get_key(bridge)
+        result = (bridge.get_finalised_state(), output)
+        self.results[key] = result
+        self.run_results[key] = result
+        try:
+            with open(self.filename, 'ab') as cache_file:
+                pickle.dump((key, result), cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass
+
+    def save(self):
+        """
+        Rewrites the cache file with only this run's results. Adding appends to the file, so
+        without this, results from earlier runs (with a different graph or settings) would pile up
+        and all be loaded on every run. The file is replaced in one step so a killed run can't
+        leave it half-written.
+        """
+        temp_filename = self.filename + '.temp'
+        try:
+            with open(temp_filename, 'wb') as cache_file:
+                for key, result in self.run_results.items():
+                    pickle.dump((key, result), cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_filename, self.filename)
+        except OSError:
+            pass
+
+
+def load_bridge_cache(filename):
+    """
+    Returns a dictionary of the results in the cache file. The file is a series of pickled
+    (key, result) pairs, and reading stops at the first one which can't be loaded (e.g. one which
+    was only partly written when a run was killed).
+    """
+    results = {}
+    if not os.path.isfile(filename):
+        return results
+    try:
+        with open(filename, 'rb') as cache_file:
+            while True:
+                key, result = pickle.load(cache_file)
+                results[key] = result
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError, TypeError):
+        pass
+    return results
+
+
+def get_graph_fingerprint(graph):
+    graph_hash = hashlib.sha256()
+    graph_hash.update(str(graph.overlap).encode())
+    for seg_num in sorted(graph.segments):
+        segment = graph.segments[seg_num]
+        graph_hash.update(repr((seg_num, segment.depth)).encode())
+        graph_hash.update(segment.forward_sequence.encode())
+    for seg_num in sorted(graph.forward_links):
+        graph_hash.update(repr((seg_num, graph.forward_links[seg_num])).encode())
+    for seg_num in sorted(graph.copy_depths):
+        graph_hash.update(repr((seg_num, graph.copy_depths[seg_num])).encode())
+    return graph_hash.digest()
+
+
+def get_alignment_summary(alignment):
+    """
+    Returns the parts of a spanning read's alignment that bridge finalisation uses.
+    """
+    return (alignment.scaled_score, alignment.get_read_to_ref_ratio(),
+            alignment.get_aligned_ref_length())
@@ -14,6 +14,7 @@ details. You should have received a copy of the GNU General Public License along
 not, see <http://www.gnu.org/licenses/>.
 """
 
+import multiprocessing
 from multiprocessing.dummy import Pool as ThreadPool
 import time
 import math
@@ -22,9 +23,12 @@ import sys
 from collections import defaultdict
 from .bridge_common import get_bridge_str, get_mean_depth, get_depth_agreement_factor, \
     get_bridge_table_parameters, print_bridge_table_header, print_bridge_table_row
-from .misc import float_to_str, reverse_complement, flip_number_order, score_function
+from .misc import float_to_str, flip_number_order, score_function
+from .seq_utils import reverse_complement
 from . import settings
-from .path_finding import get_best_paths_for_seq
+from .path_finding import get_best_paths_for_seq, get_min_distances_to, SearchDeadline
+from .bridge_cache import BridgeCache
+from .bridge_time_model import BridgeTimeModel, load_bridge_time_model, append_to_time_profile
 from . import log
 
 try:
@@ -71,6 +75,17 @@ class LongReadBridge(object):
         # A score used to determine the order of bridge application.
         self.quality = 1.0
 
+        # Whether finalising the bridge ran out of time, in which case its path is the best found
+        # before then.
+        self.timed_out = False
+
+        # The features used to predict the bridge's finalisation time (see get_time_features) and,
+        # once finalised, the (consensus time, path search time) it actually took. The graph
+        # complexity is kept apart as it needs a graph search and is only found when needed.
+        self.read_features = None
+        self.complexity = None
+        self.finalise_times = None
+
         # When a bridge is applied, the segments in the bridge may have their depth reduced
         # accordingly. This member stores which segments have had their depth reduced and by how
         # much due to this bridge's application. It is stored so if this bridge is later deleted,
@@ -83,39 +98,55 @@ class LongReadBridge(object):
         return 'long read bridge: ' + get_bridge_str(self) + \
                ' (quality = ' + float_to_str(self.quality, 2) + ')'
 
-    def predicted_time_to_finalise(self):
+    def get_time_features(self, with_complexity=True):
+        """
+        Returns the bridge's total read sequence length, read sequence count, mean read sequence
+        length and graph complexity: the number of segments which can reach the end segment within
+        the longest path search. These are what its finalisation time is predicted from. If
+        with_complexity is False, the complexity is given as 0 (unless it was already found) to
+        save the graph search.
+        """
+        if self.read_features is None:
+            total_seq_length = 0
+            seq_count = 0
+            for read in self.reads:
+                if not isinstance(read[0], int):
+                    total_seq_length += len(read[0])
+                    seq_count += 1
+            if not seq_count:
+                mean_seq_length = 0.0
+            else:
+                mean_seq_length = total_seq_length / seq_count
+            self.read_features = (total_seq_length, seq_count, mean_seq_length)
+        if self.complexity is None and with_complexity:
+            max_path_length = int(round(self.read_features[2] *
+                                        settings.MAX_RELATIVE_PATH_LENGTH)) + \
+                settings.RELATIVE_PATH_LENGTH_BUFFER_SIZE
+            distances = get_min_distances_to(self.graph, self.end_segment, max_path_length)
+            self.complexity = len(distances) if distances is not None else 0
+        return self.read_features + (self.complexity or 0,)
+
+    def predicted_time_to_finalise(self, time_model=None):
         """
         This function very roughly predicts how long the bridge will take to finalise. It's not
         meant to be particularly accurate, but can hopefully be used to roughly order the bridges
-        from slow to fast.
+        from slow to fast. The time model defaults to the built-in coefficients.
         """
-        total_seq_length = 0
-        seq_count = 0
-        for read in self.reads:
-            if not isinstance(read[0], int):
-                total_seq_length += len(read[0])
-                seq_count += 1
-        if not seq_count:
-            mean_seq_length = 0.0
-        else:
-            mean_seq_length = total_seq_length / seq_count
-
-        if seq_count > 1:
-            predicted_consensus_time = ((1.34e-9 * (total_seq_length ** 2)) +
-                                        (2.76e-5 * total_seq_length))
-        else:
-            predicted_consensus_time = 0.0
-        predicted_path_time = ((1.78e-7 * (mean_seq_length ** 2)) + (3.75e-3 * mean_seq_length))
-
-        return predicted_consensus_time + predicted_path_time
+        if time_model is None:
+            time_model = BridgeTimeModel()
+        return time_model.predict(self.get_time_features(time_model.uses_complexity()))
 
     def finalise(self, scoring_scheme, min_alignment_length, read_lengths, estimated_genome_size,
-                 expected_linear_seqs):
+                 expected_linear_seqs, time_limit=0.0):
         """
         Determines the consensus sequence for the bridge, attempts to find it in the graph and
         assigns a quality score to the bridge. This is the big performance-intensive step of long
         read bridging!
+
+        If time_limit (in seconds) is set and the path search is still going when it runs out,
+        the best paths found so far are used and the bridge's quality is reduced.
         """
+        deadline = SearchDeadline(time_limit) if time_limit > 0.0 else None
         start_seg = self.graph.segments[abs(self.start_segment)]
         end_seg = self.graph.segments[abs(self.end_segment)]
 
@@ -150,10 +181,11 @@ class LongReadBridge(object):
                 reads_without_seq = []
 
         # For reads with sequence, we perform a MSA and get a consensus sequence.
+        consensus_time = 0.0
         if reads_with_seq:
 
-            self.consensus_sequence = get_consensus_sequence(reads_with_seq, scoring_scheme,
-                                                             output)
+            self.consensus_sequence, consensus_time = get_consensus_sequence(reads_with_seq,
+                                                                             scoring_scheme, output)
 
             # We now make an expected scaled score for an alignment between the consensus and a
             # graph path. I.e. when we find a path in the graph for this consensus, this is about
@@ -192,14 +224,17 @@ class LongReadBridge(object):
         output.append(str(target_path_length))
 
         path_start_time = time.time()
-        self.all_paths, progressive_path_search = \
+        self.all_paths, search_type = \
             get_best_paths_for_seq(self.graph, self.start_segment, self.end_segment,
                                    target_path_length, self.consensus_sequence, scoring_scheme,
-                                   expected_scaled_score)
+                                   expected_scaled_score, settings.GRAPH_ALIGNMENT_PATH_SEARCH,
+                                   deadline)
         path_time = time.time() - path_start_time
+        self.timed_out = deadline is not None and deadline.timed_out
+        self.finalise_times = (consensus_time, path_time)
 
         output.append(str(len(self.all_paths)))
-        output.append('progressive' if progressive_path_search else 'exhaustive')
+        output.append('timed out' if self.timed_out else search_type)
         output.append(float_to_str(path_time, 1))
 
         # If paths were found, use a path sequence for the bridge.
@@ -334,11 +369,34 @@ class LongReadBridge(object):
         # the scores up a bit (otherwise they tend to hang near the bottom of the range).
         self.quality = 100.0 * math.sqrt(self.quality)
 
+        # A bridge which ran out of time may have missed its best path.
+        if self.timed_out:
+            self.quality *= settings.TIMED_OUT_BRIDGE_QUAL_FACTOR
+
         # noinspection PyTypeChecker
         output.append(self.quality)
 
         return output
 
+    def get_finalised_state(self):
+        """
+        Returns the results of finalise, compactly enough to send back from a worker process.
+        The bridge sequence is left out when it can be rebuilt from the graph path.
+        """
+        bridge_sequence = None if self.graph_path else self.bridge_sequence
+        return self.consensus_sequence, self.graph_path, self.all_paths, bridge_sequence, \
+            self.quality, self.timed_out
+
+    def set_finalised_state(self, state):
+        """
+        Takes the results of finalise from get_finalised_state (run on a copy of this bridge).
+        """
+        self.consensus_sequence, self.graph_path, self.all_paths, bridge_sequence, self.quality, \
+            self.timed_out = state
+        if bridge_sequence is None:
+            bridge_sequence = self.graph.get_path_sequence(self.graph_path)
+        self.bridge_sequence = bridge_sequence
+
     def set_path_based_on_availability(self, graph, unbridged_graph):
         """
         This function will change a bridge's graph path based on what's currently available. This
@@ -399,9 +457,17 @@ class LongReadBridge(object):
 
 def create_long_read_bridges(graph, read_dict, read_names, anchor_segments, verbosity,
                              min_scaled_score, threads, scoring_scheme, min_alignment_length,
-                             expected_linear_seqs, min_bridge_qual):
+                             expected_linear_seqs, min_bridge_qual, time_limit=0.0,
+                             use_processes=False, time_profile=None, cache_filename=None):
     """
-    Makes bridges between single copy segments using the alignments in the long reads.
+    Makes bridges between single copy segments using the alignments in the long reads. If
+    time_limit is set, each bridge's path search stops after that many seconds. If use_processes
+    is set, bridges are finalised in worker processes instead of threads. If time_profile is set,
+    the bridges' finalisation times are predicted with a model fit to the times recorded in that
+    file, and their own times are added to it. If cache_filename is set, bridges already finalised
+    in an earlier run (with the same reads, graph and settings) are loaded from that file instead
+    of being finalised again, and newly finalised bridges are added to it. At the end, the file is
+    rewritten with only this run's bridges.
     """
     log.log_section_header('Building long read bridges')
     log.log_explanation('Unicycler uses the long read alignments to produce bridges between '
@@ -515,45 +581,67 @@ def create_long_read_bridges(graph, read_dict, read_names, anchor_segments, verb
 
     # Now we need to finalise the bridges. This is the intensive step, as it involves creating a
     # consensus sequence, finding graph paths and doing alignments between the consensus and the
-    # graph paths. We can therefore use threads to make this faster.
+    # graph paths. We can therefore use threads (or processes) to make this faster.
     num_long_read_bridges = len(new_bridges)
 
+    time_model = load_bridge_time_model(time_profile)
+    if time_model.record_count:
+        log.log('Bridge time model fit to ' + str(time_model.record_count) +
+                ' recorded bridges from ' + time_profile + '\n', verbosity=2)
+
     # We want to display this table one row at a time, so we have to fix all of the column widths
     # at the start.
     alignments, col_widths = get_bridge_table_parameters(graph, num_long_read_bridges, verbosity,
                                                          'LongReadBridge')
     print_bridge_table_header(alignments, col_widths, verbosity, 'LongReadBridge')
     completed_count = 0
-
-    # Use a simple loop if we only have one thread.
-    if threads == 1:
+    finalise_args = (scoring_scheme, min_alignment_length, read_lengths, estimated_genome_size,
+                     expected_linear_seqs, time_limit)
+
+    # Bridges in the cache don't need finalising.
+    bridges_to_finalise = new_bridges
+    cache = BridgeCache(cache_filename, graph, finalise_args) if cache_filename else None
+    if cache is not None:
+        bridges_to_finalise = []
         for bridge in new_bridges:
-            output = bridge.finalise(scoring_scheme, min_alignment_length, read_lengths,
-                                     estimated_genome_size, expected_linear_seqs)
-            completed_count += 1
-            print_bridge_table_row(alignments, col_widths, output, completed_count,
-                                   num_long_read_bridges, min_bridge_qual, verbosity,
-                                   'LongReadBridge')
-
-    # Use a thread pool if we have more than one thread.
-    else:
-        pool = ThreadPool(threads)
-        arg_list = []
-
-        # Sort the bridges based on how long they're predicted to take to finalise. This will make
-        # the big ones runs first which helps to more efficiently use the CPU cores.
-        # E.g. if the biggest bridge was at the end, we'd be left waiting for it to finish with
-        # only one core (bad), but if it was at the start, other work could be done in parallel.
-        long_read_bridges = sorted(new_bridges, reverse=True,
-                                   key=lambda x: x.predicted_time_to_finalise())
-        for bridge in long_read_bridges:
-            arg_list.append((bridge, scoring_scheme, min_alignment_length, read_lengths,
-                             estimated_genome_size, expected_linear_seqs))
-        for output in pool.imap_unordered(finalise_bridge, arg_list):
+            cached_result = cache.get(bridge)
+            if cached_result is None:
+                bridges_to_finalise.append(bridge)
+                continue
+            state, output = cached_result
+            bridge.set_finalised_state(state)
             completed_count += 1
             print_bridge_table_row(alignments, col_widths, output, completed_count,
                                    num_long_read_bridges, min_bridge_qual, verbosity,
                                    'LongReadBridge')
+    cached_count = completed_count
+
+    for bridge, output in finalise_long_read_bridges(bridges_to_finalise, threads, use_processes,
+                                                     finalise_args, time_model):
+        if cache is not None:
+            cache.add(bridge, output)
+        completed_count += 1
+        print_bridge_table_row(alignments, col_widths, output, completed_count,
+                               num_long_read_bridges, min_bridge_qual, verbosity,
+                               'LongReadBridge')
+
+    if cache is not None:
+        cache.save()
+    if cached_count:
+        log.log('\n' + str(cached_count) + ' bridge' + ('' if cached_count == 1 else 's') +
+                ' loaded from ' + cache_filename)
+
+    timed_out_count = sum(1 for x in new_bridges if x.timed_out)
+    if timed_out_count:
+        log.log('\n' + str(timed_out_count) + ' bridge' + ('' if timed_out_count == 1 else 's') +
+                ' reached the ' + float_to_str(time_limit, 0) + ' second time limit and ' +
+                ('uses' if timed_out_count == 1 else 'use') + ' the best path found in time')
+
+    # Timed out bridges are left out of the profile, as their times were cut short.
+    if time_profile:
+        append_to_time_profile(time_profile, [x.get_time_features() + x.finalise_times
+                                              for x in new_bridges
+                                              if x.finalise_times is not None and not x.timed_out])
 
     # Now that the bridges are finalised, we split bridges that contain anchor segments in their
     # path such that all bridges start and end on an anchor segment but contain no anchor segments
@@ -602,14 +690,74 @@ def get_single_copy_alignments(read, single_copy_num_set, min_scaled_score):
     return sc_alignments
 
 
+def finalise_long_read_bridges(bridges, threads, use_processes, finalise_args, time_model=None):
+    """
+    Finalises the bridges (using finalise_args for each), yielding each bridge and its table output
+    as it finishes. The time model is used to start the slowest bridges first.
+
+    With more than one thread, the bridges are finalised in a pool. Much of finalising is Python
+    which holds the GIL, so with use_processes the pool is made of worker processes. These are
+    forked, so they inherit the bridges and the graph (read-only) instead of having them pickled,
+    and they only send back each bridge's index and results. Platforms which can't fork use
+    threads. The pool already uses all of the threads, so each bridge's path alignments are done
+    in a single thread.
+    """
+    # Use a simple loop if we only have one thread.
+    if threads == 1:
+        for bridge in bridges:
+            yield bridge, bridge.finalise(*finalise_args)
+        return
+
+    # Sort the bridges based on how long they're predicted to take to finalise. This will make
+    # the big ones runs first which helps to more efficiently use the CPU cores.
+    # E.g. if the biggest bridge was at the end, we'd be left waiting for it to finish with
+    # only one core (bad), but if it was at the start, other work could be done in parallel.
+    bridges = sorted(bridges, reverse=True,
+                     key=lambda x: x.predicted_time_to_finalise(time_model))
+
+    if use_processes and 'fork' in multiprocessing.get_all_start_methods():
+        global FORKED_BRIDGES, FORKED_FINALISE_ARGS
+        FORKED_BRIDGES, FORKED_FINALISE_ARGS = bridges, finalise_args
+        try:
+            with multiprocessing.get_context('fork').Pool(threads) as pool:
+                for i, output, state, times in pool.imap_unordered(finalise_forked_bridge,
+                                                                   range(len(bridges))):
+                    bridges[i].set_finalised_state(state)
+                    bridges[i].finalise_times = times
+                    yield bridges[i], output
+        finally:
+            FORKED_BRIDGES, FORKED_FINALISE_ARGS = None, None
+
+    else:
+        pool = ThreadPool(threads)
+        arg_list = [(bridge,) + finalise_args for bridge in bridges]
+        for bridge, output in pool.imap_unordered(finalise_bridge, arg_list):
+            yield bridge, output
+
+
 def finalise_bridge(all_args):
     """
-    Just a one-argument version of bridge.finalise, for pool.imap.
+    Just a one-argument version of bridge.finalise, for pool.imap. It returns the bridge with its
+    table output.
     """
     bridge, scoring_scheme, min_alignment_length, read_lengths, estimated_genome_size,\
-        expected_linear_seqs = all_args
-    return bridge.finalise(scoring_scheme, min_alignment_length, read_lengths,
-                           estimated_genome_size, expected_linear_seqs)
+        expected_linear_seqs, time_limit = all_args
+    return bridge, bridge.finalise(scoring_scheme, min_alignment_length, read_lengths,
+                                   estimated_genome_size, expected_linear_seqs, time_limit)
+
+
+# The bridges (and finalise arguments) that forked worker processes inherit from their parent.
+FORKED_BRIDGES, FORKED_FINALISE_ARGS = None, None
+
+
+def finalise_forked_bridge(i):
+    """
+    Finalises one of the inherited bridges in a worker process, returning its index, table output,
+    results and times.
+    """
+    bridge = FORKED_BRIDGES[i]
+    output = bridge.finalise(*FORKED_FINALISE_ARGS)
+    return i, output, bridge.get_finalised_state(), bridge.finalise_times
 
 
 def reduce_expected_count(expected_count, a, b):
@@ -664,4 +812,4 @@ def get_consensus_sequence(reads, scoring_scheme, output):
     consensus_time = time.time() - consensus_start_time
     output.append(str(len(consensus_sequence)))
     output.append(float_to_str(consensus_time, 1))
-    return consensus_sequence
+    return consensus_sequence, consensus_time
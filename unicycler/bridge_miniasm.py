@@ -29,7 +29,7 @@ class MiniasmBridge(object):
     This class describes a bridge created from long read alignments.
     """
     def __init__(self, graph, start, end, bridge_sequence, start_overlap, end_overlap,
-                 scoring_scheme, output, do_path_search=True):
+                 scoring_scheme, output, do_path_search=True, threads=1):
 
         # The numbers of the two single copy segments which are being bridged.
         self.start_segment = start
@@ -61,13 +61,14 @@ class MiniasmBridge(object):
             target_path_length = len(bridge_sequence)
             output += [str(target_path_length), '', str(target_path_length)]
             path_start_time = time.time()
-            self.all_paths, progressive_path_search = \
+            self.all_paths, search_type = \
                 get_best_paths_for_seq(graph, self.start_segment, self.end_segment,
-                                       target_path_length, bridge_sequence, scoring_scheme, 90.0)
+                                       target_path_length, bridge_sequence, scoring_scheme, 90.0,
+                                       threads=threads)
             path_time = time.time() - path_start_time
 
             output.append(str(len(self.all_paths)))
-            output.append('progressive' if progressive_path_search else 'exhaustive')
+            output.append(search_type)
             output.append(float_to_str(path_time, 1))
 
             if self.all_paths:
@@ -139,7 +140,7 @@ class MiniasmBridge(object):
 
 
 def create_miniasm_bridges(graph, string_graph, anchor_segments, scoring_scheme, verbosity,
-                           min_bridge_qual):
+                           min_bridge_qual, threads):
     """
     Makes bridges between single copy segments using the miniasm string graph.
     """
@@ -199,7 +200,7 @@ def create_miniasm_bridges(graph, string_graph, anchor_segments, scoring_scheme,
         output = []
         bridge = MiniasmBridge(graph, preceding_segment_number, following_segment_number,
                                bridge_seg.forward_sequence, start_overlap, end_overlap,
-                               scoring_scheme, output)
+                               scoring_scheme, output, threads=threads)
         bridges.append(bridge)
 
         completed_count += 1
@@ -238,7 +239,7 @@ def create_miniasm_bridges(graph, string_graph, anchor_segments, scoring_scheme,
                     new_path = full_path[start_i+1:end_i]
                     bridge_sequence = graph.get_path_sequence(new_path)
                     split_bridge = MiniasmBridge(graph, start_seg_num, end_seg_num, bridge_sequence,
-                                                 0, 0, scoring_scheme, [])
+                                                 0, 0, scoring_scheme, [], threads=threads)
                     split_bridge.graph_path = new_path
                     split_bridge.all_paths = [new_path]
                     split_bridge.quality = bridge.quality
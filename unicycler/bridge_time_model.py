@@ -0,0 +1,164 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This module predicts how long long read bridges will take to finalise, so the slow ones can be
+started first. The predictions come from a simple model whose coefficients can be fit to the
+finalisation times of earlier bridges, recorded in a profile file.
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+from . import settings
+
+PROFILE_COLUMNS = ['total_seq_length', 'seq_count', 'mean_seq_length', 'complexity',
+                   'consensus_time', 'path_time']
+
+
+class BridgeTimeModel(object):
+    """
+    The model predicts a bridge's finalisation time from its time features (see
+    LongReadBridge.get_time_features) in two parts:
+      * consensus time = a * total^2 + b * total (only if there is more than one sequence)
+      * path time = c * mean^2 + d * mean + e * mean * complexity
+    where total and mean are the total and mean read sequence lengths and complexity is the number
+    of segments within path search range of the bridge's end. The default coefficients are rough
+    values which don't use the complexity.
+    """
+
+    def __init__(self, consensus_coefficients=None, path_coefficients=None):
+        self.consensus_coefficients = consensus_coefficients or \
+            settings.DEFAULT_CONSENSUS_TIME_COEFFICIENTS
+        self.path_coefficients = path_coefficients or settings.DEFAULT_PATH_TIME_COEFFICIENTS
+        self.record_count = 0
+
+    def predict(self, time_features):
+        consensus_terms, path_terms = get_terms(time_features)
+        predicted_consensus_time = sum(c * x for c, x in zip(self.consensus_coefficients,
+                                                             consensus_terms))
+        predicted_path_time = sum(c * x for c, x in zip(self.path_coefficients, path_terms))
+        return predicted_consensus_time + predicted_path_time
+
+    def uses_complexity(self):
+        """
+        Returns whether predictions depend on the graph complexity feature, which is costly to get.
+        """
+        return self.path_coefficients[2] != 0.0
+
+    def fit(self, records):
+        """
+        Refits the coefficients (by least squares) to the given records, each a tuple of time
+        features followed by the consensus time and path time. If there are too few records, or
+        they don't determine the coefficients, the current coefficients are kept. Negative
+        coefficients are set to zero so predicted times can't be negative.
+        """
+        if len(records) < settings.BRIDGE_TIME_MODEL_MIN_RECORDS:
+            return
+        consensus_rows, consensus_times, path_rows, path_times = [], [], [], []
+        for record in records:
+            consensus_terms, path_terms = get_terms(record[:4])
+            if record[1] > 1:
+                consensus_rows.append(consensus_terms)
+                consensus_times.append(record[4])
+            path_rows.append(path_terms)
+            path_times.append(record[5])
+        consensus_coefficients = least_squares(consensus_rows, consensus_times)
+        if consensus_coefficients is not None:
+            self.consensus_coefficients = [max(0.0, x) for x in consensus_coefficients]
+        path_coefficients = least_squares(path_rows, path_times)
+        if path_coefficients is not None:
+            self.path_coefficients = [max(0.0, x) for x in path_coefficients]
+        self.record_count = len(records)
+
+
+def get_terms(time_features):
+    total_seq_length, seq_count, mean_seq_length, complexity = time_features
+    if seq_count > 1:
+        consensus_terms = [total_seq_length ** 2, total_seq_length]
+    else:
+        consensus_terms = [0.0, 0.0]
+    path_terms = [mean_seq_length ** 2, mean_seq_length, mean_seq_length * complexity]
+    return consensus_terms, path_terms
+
+
+def least_squares(rows, values):
+    """
+    Returns the coefficients which best fit the values as linear combinations of the rows, or None
+    if they can't be determined. The columns are scaled before solving the normal equations, as
+    the terms have very different magnitudes.
+    """
+    if not rows:
+        return None
+    column_count = len(rows[0])
+    scales = [max(abs(row[j]) for row in rows) or 1.0 for j in range(column_count)]
+    rows = [[x / s for x, s in zip(row, scales)] for row in rows]
+    matrix = [[sum(row[i] * row[j] for row in rows) for j in range(column_count)] +
+              [sum(row[i] * v for row, v in zip(rows, values))] for i in range(column_count)]
+
+    # Gaussian elimination with partial pivoting.
+    for i in range(column_count):
+        pivot = max(range(i, column_count), key=lambda r: abs(matrix[r][i]))
+        if abs(matrix[pivot][i]) < 1e-12:
+            return None
+        matrix[i], matrix[pivot] = matrix[pivot], matrix[i]
+        for r in range(i + 1, column_count):
+            factor = matrix[r][i] / matrix[i][i]
+            for c in range(i, column_count + 1):
+                matrix[r][c] -= factor * matrix[i][c]
+    coefficients = [0.0] * column_count
+    for i in reversed(range(column_count)):
+        remainder = matrix[i][column_count] - sum(matrix[i][j] * coefficients[j]
+                                                  for j in range(i + 1, column_count))
+        coefficients[i] = remainder / matrix[i][i]
+    return [c / s for c, s in zip(coefficients, scales)]
+
+
+def load_time_profile(filename):
+    """
+    Returns the records in a bridge time profile file (an empty list if it doesn't exist yet).
+    Only the most recent settings.BRIDGE_TIME_PROFILE_MAX_RECORDS records are used.
+    """
+    if not os.path.isfile(filename):
+        return []
+    records = []
+    with open(filename, 'rt') as profile:
+        for line in profile:
+            parts = line.rstrip('\n').split('\t')
+            if len(parts) != len(PROFILE_COLUMNS) or parts[0] == PROFILE_COLUMNS[0]:
+                continue
+            try:
+                records.append(tuple(float(x) for x in parts))
+            except ValueError:
+                continue
+    return records[-settings.BRIDGE_TIME_PROFILE_MAX_RECORDS:]
+
+
+def append_to_time_profile(filename, records):
+    """
+    Adds records (time features followed by the consensus time and path time) to the end of a
+    bridge time profile file, making it if necessary.
+    """
+    write_header = not os.path.isfile(filename)
+    with open(filename, 'at') as profile:
+        if write_header:
+            profile.write('\t'.join(PROFILE_COLUMNS) + '\n')
+        for record in records:
+            profile.write('\t'.join(str(x) for x in record) + '\n')
+
+
+def load_bridge_time_model(filename):
+    """
+    Returns a BridgeTimeModel fit to the records in the profile file, or the default model if
+    there is no profile file.
+    """
+    model = BridgeTimeModel()
+    if filename:
+        model.fit(load_time_profile(filename))
+    return model
@@ -0,0 +1,124 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This module contains a class for keeping track of an assembly graph's connected components as
+segments and links are added and removed, so they don't need to be found from scratch each time.
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+class ComponentIndex(object):
+    """
+    This class holds a graph's connected components as sets of unsigned segment numbers. Adding a
+    link merges two components (the smaller into the larger, so each segment only moves a
+    logarithmic number of times). Removing a link or segment might split a component, which is
+    hard to do incrementally, so that component is just marked as dirty and searched again the
+    next time the components are needed. Components which weren't touched are reused as they are.
+    """
+
+    def __init__(self, components):
+        self.members = {}  # component ID -> set of unsigned segment numbers
+        self.component_ids = {}  # unsigned segment number -> component ID
+        self.sorted_members = {}  # component ID -> sorted list of segment numbers (cached)
+        self.dirty = set()  # IDs of components which may have split
+        self.next_id = 0
+        for component in components:
+            self.add_component(component)
+
+    def add_component(self, seg_nums):
+        component_id = self.next_id
+        self.next_id += 1
+        self.members[component_id] = set(seg_nums)
+        for seg_num in seg_nums:
+            self.component_ids[seg_num] = component_id
+        return component_id
+
+    def remove_component(self, component_id):
+        del self.members[component_id]
+        self.sorted_members.pop(component_id, None)
+        self.dirty.discard(component_id)
+
+    def add_link(self, seg_num_1, seg_num_2):
+        """
+        Takes unsigned segment numbers and merges their components.
+        """
+        id_1 = self.get_or_add_component_id(seg_num_1)
+        id_2 = self.get_or_add_component_id(seg_num_2)
+        if id_1 == id_2:
+            return
+        if len(self.members[id_1]) < len(self.members[id_2]):
+            id_1, id_2 = id_2, id_1
+        for seg_num in self.members[id_2]:
+            self.component_ids[seg_num] = id_1
+        self.members[id_1].update(self.members[id_2])
+        self.sorted_members.pop(id_1, None)
+        if id_2 in self.dirty:
+            self.dirty.add(id_1)
+        self.remove_component(id_2)
+
+    def remove_link(self, seg_num):
+        """
+        Takes an unsigned segment number at one end of a removed link and marks its component as
+        dirty.
+        """
+        component_id = self.component_ids.get(seg_num)
+        if component_id is not None:
+            self.dirty.add(component_id)
+
+    def remove_segments(self, seg_nums):
+        """
+        Takes unsigned segment numbers of removed segments. Their components are marked as dirty.
+        """
+        for seg_num in seg_nums:
+            component_id = self.component_ids.pop(seg_num, None)
+            if component_id is not None:
+                self.members[component_id].discard(seg_num)
+                self.dirty.add(component_id)
+
+    def get_or_add_component_id(self, seg_num):
+        component_id = self.component_ids.get(seg_num)
+        if component_id is None:
+            component_id = self.add_component([seg_num])
+        return component_id
+
+    def get_components(self, graph):
+        """
+        Returns the components as sorted lists of segment numbers, after searching again any that
+        are dirty. Segments which were added to the graph without any links are their own
+        components.
+        """
+        if len(self.component_ids) != len(graph.segments):
+            for seg_num in graph.segments:
+                self.get_or_add_component_id(seg_num)
+
+        for component_id in list(self.dirty):
+            remaining = self.members[component_id]
+            self.remove_component(component_id)
+            for seg_num in remaining:
+                del self.component_ids[seg_num]
+            while remaining:
+                start = remaining.pop()
+                component = [start]
+                i = 0
+                while i < len(component):
+                    for seg_num in graph.get_connected_segments(component[i]):
+                        if seg_num in remaining:
+                            remaining.discard(seg_num)
+                            component.append(seg_num)
+                    i += 1
+                self.add_component(component)
+
+        components = []
+        for component_id in self.members:
+            if component_id not in self.sorted_members:
+                self.sorted_members[component_id] = sorted(self.members[component_id])
+            components.append(list(self.sorted_members[component_id]))
+        return components
@@ -118,6 +118,133 @@ def path_alignment(partial_seq, full_seq, scoring_scheme, use_banding, band_size
 
 
 
+# These functions align one sequence to many others in a single call (spread over threads) and
+# return only the scores: a list of (raw score, scaled score) tuples, with None for any alignment
+# which failed. The batched path alignment aligns each partial path sequence to the full sequence,
+# while the batched global alignment aligns the sequence to each of the others.
+C_LIB.pathAlignmentBatch.argtypes = [POINTER(c_char_p),  # Partial sequences
+                                     c_int,  # Partial sequence count
+                                     c_char_p,  # Full sequence
+                                     c_int,  # Match score
+                                     c_int,  # Mismatch score
+                                     c_int,  # Gap open score
+                                     c_int,  # Gap extension score
+                                     c_bool,  # Use banding
+                                     c_int,  # Band size
+                                     c_int,  # Threads
+                                     POINTER(c_int),  # Raw scores (filled by the function)
+                                     POINTER(c_double)]  # Scaled scores (filled by the function)
+C_LIB.pathAlignmentBatch.restype = None
+
+def path_alignment_batch(partial_seqs, full_seq, scoring_scheme, use_banding, band_size,
+                         threads):
+    partial_seqs = [x.encode('utf-8') for x in partial_seqs]
+    count = len(partial_seqs)
+    raw_scores = (c_int * count)()
+    scaled_scores = (c_double * count)()
+    C_LIB.pathAlignmentBatch((c_char_p * count)(*partial_seqs), count, full_seq.encode('utf-8'),
+                             scoring_scheme.match, scoring_scheme.mismatch,
+                             scoring_scheme.gap_open, scoring_scheme.gap_extend,
+                             use_banding, band_size, threads, raw_scores, scaled_scores)
+    return batch_scores_to_list(raw_scores, scaled_scores)
+
+C_LIB.fullyGlobalAlignmentBatch.argtypes = [c_char_p,  # Sequence
+                                            POINTER(c_char_p),  # Other sequences
+                                            c_int,  # Other sequence count
+                                            c_int,  # Match score
+                                            c_int,  # Mismatch score
+                                            c_int,  # Gap open score
+                                            c_int,  # Gap extension score
+                                            c_bool,  # Use banding
+                                            c_int,  # Band size
+                                            c_int,  # Threads
+                                            POINTER(c_int),  # Raw scores (filled by the function)
+                                            POINTER(c_double)]  # Scaled scores (filled too)
+C_LIB.fullyGlobalAlignmentBatch.restype = None
+
+def fully_global_alignment_batch(sequence, other_seqs, scoring_scheme, use_banding, band_size,
+                                 threads):
+    other_seqs = [x.encode('utf-8') for x in other_seqs]
+    count = len(other_seqs)
+    raw_scores = (c_int * count)()
+    scaled_scores = (c_double * count)()
+    C_LIB.fullyGlobalAlignmentBatch(sequence.encode('utf-8'), (c_char_p * count)(*other_seqs),
+                                    count, scoring_scheme.match, scoring_scheme.mismatch,
+                                    scoring_scheme.gap_open, scoring_scheme.gap_extend,
+                                    use_banding, band_size, threads, raw_scores, scaled_scores)
+    return batch_scores_to_list(raw_scores, scaled_scores)
+
+def batch_scores_to_list(raw_scores, scaled_scores):
+    return [None if scaled < 0.0 else (raw, scaled)
+            for raw, scaled in zip(raw_scores, scaled_scores)]
+
+
+
+# These functions align a sequence to graph paths one segment at a time. Each call to
+# extend_graph_alignment makes a new C++ column object (from the given path's column and a
+# segment's sequence) which must be deleted with delete_graph_alignment_column. The alignment is
+# global and only the diagonals from min_diagonal to max_diagonal (sequence position minus path
+# position) are computed.
+GRAPH_ALIGNMENT_MIN_SCORE = -(2 ** 31) // 4  # The C++ score for cells which can't be reached
+
+C_LIB.startGraphAlignment.argtypes = [c_char_p,  # Sequence
+                                      c_int,  # Match score
+                                      c_int,  # Mismatch score
+                                      c_int,  # Gap open score
+                                      c_int,  # Gap extension score
+                                      c_int,  # Min diagonal
+                                      c_int]  # Max diagonal
+C_LIB.startGraphAlignment.restype = c_void_p  # Column for an empty path
+
+def start_graph_alignment(sequence, scoring_scheme, min_diagonal, max_diagonal):
+    return C_LIB.startGraphAlignment(sequence.encode('utf-8'),
+                                     scoring_scheme.match, scoring_scheme.mismatch,
+                                     scoring_scheme.gap_open, scoring_scheme.gap_extend,
+                                     min_diagonal, max_diagonal)
+
+C_LIB.extendGraphAlignment.argtypes = [c_void_p,  # Column
+                                       c_char_p]  # Segment sequence
+C_LIB.extendGraphAlignment.restype = c_void_p  # Column for the extended path
+
+def extend_graph_alignment(column_ptr, sequence):
+    return C_LIB.extendGraphAlignment(column_ptr, sequence.encode('utf-8'))
+
+C_LIB.getGraphAlignmentScore.argtypes = [c_void_p]
+C_LIB.getGraphAlignmentScore.restype = c_int
+
+def get_graph_alignment_score(column_ptr):
+    """
+    Returns the score of the whole sequence aligned to the column's path, or None if that
+    alignment is outside the band.
+    """
+    score = C_LIB.getGraphAlignmentScore(column_ptr)
+    return None if score <= GRAPH_ALIGNMENT_MIN_SCORE else score
+
+C_LIB.getGraphAlignmentBound.argtypes = [c_void_p]
+C_LIB.getGraphAlignmentBound.restype = c_int
+
+def get_graph_alignment_bound(column_ptr):
+    """
+    Returns the best score that any extension of the column's path could get, or None if no
+    extension can align in the band.
+    """
+    bound = C_LIB.getGraphAlignmentBound(column_ptr)
+    return None if bound <= GRAPH_ALIGNMENT_MIN_SCORE else bound
+
+C_LIB.graphAlignmentDominates.argtypes = [c_void_p, c_void_p]
+C_LIB.graphAlignmentDominates.restype = c_bool
+
+def graph_alignment_dominates(column_ptr, other_column_ptr):
+    return C_LIB.graphAlignmentDominates(column_ptr, other_column_ptr)
+
+C_LIB.deleteGraphAlignmentColumn.argtypes = [c_void_p]
+C_LIB.deleteGraphAlignmentColumn.restype = None
+
+def delete_graph_alignment_column(column_ptr):
+    C_LIB.deleteGraphAlignmentColumn(column_ptr)
+
+
+
 # This function cleans up the heap memory for the C strings returned by the other C functions. It
 # must be called after them.
 C_LIB.freeCString.argtypes = [c_void_p]
@@ -0,0 +1,89 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This module contains functions for saving and loading binary snapshots of graphs (both
+AssemblyGraph and StringGraph). Snapshots are used for Unicycler's intermediate checkpoints
+because they are far faster to write than GFA (no per-segment or per-link text formatting) and
+they keep everything needed to resume from that point, including bridges and copy depths.
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import pickle
+import sys
+from .misc import gfa_path
+from . import log
+
+# Snapshot files start with this magic string and a version number. The version should be
+# incremented whenever a change to the graph classes would make old snapshots unloadable.
+SNAPSHOT_MAGIC = b'UNICYCLER_GRAPH_SNAPSHOT\n'
+SNAPSHOT_VERSION = 4
+
+
+class BadSnapshot(Exception):
+    pass
+
+
+def snapshot_path(out_dir, file_num, name):
+    return os.path.join(out_dir, str(file_num).zfill(3) + '_' + name + '.snapshot')
+
+
+def save_graph_snapshot(graph, filename, verbosity=1, newline=False):
+    """
+    Saves the graph (an AssemblyGraph or StringGraph) to a binary snapshot file.
+    """
+    log.log(('\n' if newline else '') + 'Saving ' + filename, verbosity)
+
+    # Bridges refer back to their graph, so a graph with many bridges can be deeply nested.
+    recursion_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(recursion_limit, 100000))
+    try:
+        with open(filename, 'wb') as snapshot_file:
+            snapshot_file.write(SNAPSHOT_MAGIC)
+            snapshot_file.write(str(SNAPSHOT_VERSION).encode() + b'\n')
+            pickle.dump(graph, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+    finally:
+        sys.setrecursionlimit(recursion_limit)
+
+
+def load_graph_snapshot(filename):
+    """
+    Loads a graph from a binary snapshot file. Raises BadSnapshot if the file isn't a snapshot or
+    was made by an incompatible version of Unicycler.
+    """
+    recursion_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(recursion_limit, 100000))
+    try:
+        with open(filename, 'rb') as snapshot_file:
+            if snapshot_file.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                raise BadSnapshot(filename + ' is not a Unicycler graph snapshot')
+            version = snapshot_file.readline().strip()
+            if version != str(SNAPSHOT_VERSION).encode():
+                raise BadSnapshot(filename + ' was made by an incompatible version of Unicycler')
+            try:
+                return pickle.load(snapshot_file)
+            except (pickle.UnpicklingError, EOFError, AttributeError) as e:
+                raise BadSnapshot('could not load ' + filename + ': ' + str(e))
+    finally:
+        sys.setrecursionlimit(recursion_limit)
+
+
+def save_checkpoint(graph, args, file_num, name, verbosity=1, newline=False, **gfa_options):
+    """
+    Saves an intermediate graph to the output directory. This is a binary snapshot unless the
+    user asked for GFA checkpoints, in which case the extra options are passed to save_to_gfa.
+    """
+    if args.gfa_checkpoints:
+        graph.save_to_gfa(gfa_path(args.out, file_num, name), verbosity=verbosity,
+                          newline=newline, **gfa_options)
+    else:
+        save_graph_snapshot(graph, snapshot_path(args.out, file_num, name), verbosity=verbosity,
+                            newline=newline)
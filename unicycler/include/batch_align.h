@@ -0,0 +1,45 @@
+// Copyright 2017 Ryan Wick (rrwick@gmail.com)
+// https://github.com/rrwick/Unicycler
+
+// This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or
+// modify it under the terms of the GNU General Public License as published by the Free Software
+// Foundation, either version 3 of the License, or (at your option) any later version. Unicycler is
+// distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the
+// implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+// Public License for more details. You should have received a copy of the GNU General Public
+// License along with Unicycler. If not, see <http://www.gnu.org/licenses/>.
+
+#ifndef BATCH_ALIGN_H
+#define BATCH_ALIGN_H
+
+
+#include <string>
+#include <vector>
+#include "scoredalignment.h"
+
+
+// Functions that are called by the Python script must have C linkage, not C++ linkage.
+extern "C" {
+    void pathAlignmentBatch(char * pathSeqs[], int pathCount, char * fullSeq,
+                            int matchScore, int mismatchScore, int gapOpenScore,
+                            int gapExtensionScore, bool useBanding, int bandSize, int threadCount,
+                            int rawScores[], double scaledScores[]);
+
+    void fullyGlobalAlignmentBatch(char * seq, char * otherSeqs[], int otherCount,
+                                   int matchScore, int mismatchScore, int gapOpenScore,
+                                   int gapExtensionScore, bool useBanding, int bandSize,
+                                   int threadCount, int rawScores[], double scaledScores[]);
+}
+
+
+typedef ScoredAlignment * (*PairAlignmentFunction)(std::string, std::string, int, int, int, int,
+                                                   bool, int);
+
+void alignBatch(std::vector<std::string> & s1s, std::vector<std::string> & s2s, int count,
+                PairAlignmentFunction alignmentFunction,
+                int matchScore, int mismatchScore, int gapOpenScore, int gapExtensionScore,
+                bool useBanding, int bandSize, int threadCount,
+                int rawScores[], double scaledScores[]);
+
+
+#endif // BATCH_ALIGN_H
@@ -0,0 +1,72 @@
+// Copyright 2017 Ryan Wick (rrwick@gmail.com)
+// https://github.com/rrwick/Unicycler
+
+// This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or
+// modify it under the terms of the GNU General Public License as published by the Free Software
+// Foundation, either version 3 of the License, or (at your option) any later version. Unicycler is
+// distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the
+// implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+// Public License for more details. You should have received a copy of the GNU General Public
+// License along with Unicycler. If not, see <http://www.gnu.org/licenses/>.
+
+#ifndef GRAPH_ALIGN_H
+#define GRAPH_ALIGN_H
+
+#include <string>
+#include <vector>
+#include <memory>
+
+
+// The settings shared by all columns of one graph alignment: the consensus sequence being aligned,
+// the scoring scheme and the band of diagonals (consensus position minus path position) which are
+// computed.
+class GraphAlignmentContext {
+public:
+    GraphAlignmentContext(std::string consensus, int matchScore, int mismatchScore,
+                          int gapOpenScore, int gapExtensionScore, int minDiagonal, int maxDiagonal);
+
+    std::string m_consensus;
+    int m_matchScore;
+    int m_mismatchScore;
+    int m_gapOpenScore;
+    int m_gapExtensionScore;
+    int m_minDiagonal;
+    int m_maxDiagonal;
+};
+
+
+// The last column of a banded global alignment between the consensus and a path sequence. A path's
+// column is made by extending its parent's column with a segment's sequence, so paths which share
+// a start never align that part twice.
+class GraphAlignmentColumn {
+public:
+    GraphAlignmentColumn(std::shared_ptr<GraphAlignmentContext> context);
+    GraphAlignmentColumn(const GraphAlignmentColumn & parent, std::string & sequence);
+
+    std::shared_ptr<GraphAlignmentContext> m_context;
+    int m_pathLength;
+    std::vector<int> m_h;  // best score ending here
+    std::vector<int> m_e;  // best score ending here with a gap in the consensus
+    int m_score;  // score for the whole consensus (very low if not in the band)
+    int m_bound;  // the best score any extension of this path could get
+
+    bool dominates(const GraphAlignmentColumn & other) const;
+
+private:
+    void setScoreAndBound();
+};
+
+
+// Functions that are called by the Python script must have C linkage, not C++ linkage.
+extern "C" {
+    GraphAlignmentColumn * startGraphAlignment(char * consensus, int matchScore, int mismatchScore,
+                                               int gapOpenScore, int gapExtensionScore,
+                                               int minDiagonal, int maxDiagonal);
+    GraphAlignmentColumn * extendGraphAlignment(GraphAlignmentColumn * column, char * sequence);
+    int getGraphAlignmentScore(GraphAlignmentColumn * column);
+    int getGraphAlignmentBound(GraphAlignmentColumn * column);
+    bool graphAlignmentDominates(GraphAlignmentColumn * column, GraphAlignmentColumn * other);
+    void deleteGraphAlignmentColumn(GraphAlignmentColumn * column);
+}
+
+#endif // GRAPH_ALIGN_H
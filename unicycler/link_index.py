@@ -0,0 +1,99 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This module contains a compact, array-based copy of an assembly graph's links, used by graph
+traversals which would otherwise spend most of their time on dictionary lookups and list copies.
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import itertools
+from array import array
+
+
+class LinkIndex(object):
+    """
+    This class holds a graph's links in compressed sparse row form. Each segment is given an index
+    (in order of segment number) and each strand of a segment is a node: for the segment with index
+    i, the positive strand is node 2i and the negative strand is node 2i+1. This means that the
+    segment index of a node is node >> 1 and the node for the other strand is node ^ 1.
+
+    The downstream nodes of node n are forward_targets[forward_offsets[n]:forward_offsets[n+1]],
+    in the same order as the graph's forward link list. Links always come in reverse complement
+    pairs, so upstream nodes don't need their own arrays: the nodes upstream of n are the other
+    strands of the nodes downstream of n ^ 1.
+
+    A LinkIndex is a snapshot: it must be rebuilt when the graph's links change. AssemblyGraph does
+    this on demand (see AssemblyGraph.get_link_index).
+    """
+
+    def __init__(self, segment_nums, forward_links):
+        # Links come in reverse complement pairs (A->B and -B->-A), so every linked segment is a
+        # key in forward_links.
+        all_seg_nums = set(segment_nums)
+        all_seg_nums.update(map(abs, forward_links))
+        self.seg_nums = sorted(all_seg_nums)
+        self.nodes = {}  # signed segment number -> node
+        for i, seg_num in enumerate(self.seg_nums):
+            self.nodes[seg_num] = 2 * i
+            self.nodes[-seg_num] = 2 * i + 1
+
+        node_links = [()] * (2 * len(self.seg_nums))
+        for start, ends in forward_links.items():
+            node_links[self.nodes[start]] = ends
+        self.forward_offsets = array('l', itertools.accumulate(map(len, node_links), initial=0))
+        self.forward_targets = array('l', map(self.nodes.__getitem__,
+                                              itertools.chain.from_iterable(node_links)))
+
+    def get_node(self, signed_seg_num):
+        return self.nodes[signed_seg_num]
+
+    def get_signed_seg_num(self, node):
+        seg_num = self.seg_nums[node >> 1]
+        return -seg_num if node & 1 else seg_num
+
+    def get_downstream_nodes(self, node):
+        return self.forward_targets[self.forward_offsets[node]:self.forward_offsets[node + 1]]
+
+    def get_upstream_nodes(self, node):
+        return [x ^ 1 for x in self.get_downstream_nodes(node ^ 1)]
+
+    def get_connected_components(self, segment_nums):
+        """
+        Returns the connected components (ignoring link direction and strand) as lists of unsigned
+        segment numbers. A search is started from each of the given segments, so these should be
+        the graph's current segments. A segment which isn't in the index can't have any links
+        (adding a link requires a rebuild) so it's a component on its own.
+        """
+        offsets, targets = self.forward_offsets, self.forward_targets
+        visited = bytearray(len(self.seg_nums))
+        components = []
+        for seg_num in segment_nums:
+            start_node = self.nodes.get(seg_num)
+            if start_node is None:
+                components.append([seg_num])
+                continue
+            start_index = start_node >> 1
+            if visited[start_index]:
+                continue
+            visited[start_index] = 1
+            component = [start_index]
+            i = 0
+            while i < len(component):
+                # Following the downstream links of both strands covers all of the segment's links.
+                node = 2 * component[i]
+                i += 1
+                for j in range(offsets[node], offsets[node + 2]):
+                    seg_index = targets[j] >> 1
+                    if not visited[seg_index]:
+                        visited[seg_index] = 1
+                        component.append(seg_index)
+            components.append(sorted(self.seg_nums[x] for x in component))
+        return components
@@ -21,13 +21,15 @@ import sys
 import itertools
 import collections
 from .misc import green, red, line_iterator, print_table, int_to_str, float_to_str, \
-    reverse_complement, gfa_path, racon_version
+    gfa_path, racon_version
+from .seq_utils import reverse_complement
 from .minimap_alignment import align_long_reads_to_assembly_graph, range_overlap_size, \
     load_minimap_alignments
 from .string_graph import StringGraph, StringGraphSegment, \
     merge_string_graph_segments_into_unitig_graph
 from .read_ref import load_references, load_long_reads
 from .unicycler_align import semi_global_align_long_reads
+from .graph_snapshot import save_checkpoint
 from . import log
 from . import settings
 
@@ -158,7 +160,8 @@ def make_miniasm_string_graph(graph, read_dict, long_read_filename, scoring_sche
                                 gfa_path(args.out, next(counter), 'string_graph'))
 
             string_graph.remove_branching_paths()
-            string_graph.save_to_gfa(branching_paths_removed_filename, include_depth=False)
+            if args.keep > 2:
+                string_graph.save_to_gfa(branching_paths_removed_filename, include_depth=False)
 
             log.log('Merging segments into unitigs:')
             unitig_graph = merge_string_graph_segments_into_unitig_graph(string_graph,
@@ -174,10 +177,11 @@ def make_miniasm_string_graph(graph, read_dict, long_read_filename, scoring_sche
                         ('' if linear_count == 1 else 's'))
             log.log('  total size = ' + int_to_str(unitig_graph_size) + ' bp')
 
-            unitig_graph.save_to_gfa(unitig_graph_filename, include_depth=False)
+            if args.keep > 2:
+                unitig_graph.save_to_gfa(unitig_graph_filename, include_depth=False)
             if not short_reads_available and args.keep > 0:
-                unitig_graph.save_to_gfa(gfa_path(args.out, next(counter), 'unitig_graph'),
-                                         include_depth=False)
+                save_checkpoint(unitig_graph, args, next(counter), 'unitig_graph',
+                                include_depth=False)
 
             # If the miniasm assembly looks too small, then we don't bother polishing it or using
             # it for bridging.
@@ -203,20 +207,20 @@ def make_miniasm_string_graph(graph, read_dict, long_read_filename, scoring_sche
                     polish_unitigs_with_racon(unitig_graph, miniasm_dir, read_dict, graph,
                                               args.racon_path, args.threads, scoring_scheme,
                                               seg_nums_to_bridge)
-                    unitig_graph.save_to_gfa(racon_polished_filename)
+                    if args.keep > 2:
+                        unitig_graph.save_to_gfa(racon_polished_filename)
                     if not short_reads_available and args.keep > 0:
-                        unitig_graph.save_to_gfa(gfa_path(args.out, next(counter),
-                                                          'racon_polished'))
+                        save_checkpoint(unitig_graph, args, next(counter), 'racon_polished')
                 if short_reads_available and args.keep > 0:
-                    unitig_graph.save_to_gfa(gfa_path(args.out, next(counter),
-                                                      'long_read_assembly'))
+                    save_checkpoint(unitig_graph, args, next(counter), 'long_read_assembly')
 
     if unitig_graph is not None and short_reads_available:
         log.log('')
         trim_dead_ends_based_on_miniasm_trimming(graph, miniasm_read_list)
         unitig_graph = place_contigs(miniasm_dir, graph, unitig_graph, args.threads,
                                      scoring_scheme, seg_nums_to_bridge)
-        unitig_graph.save_to_gfa(contigs_placed_filename, include_depth=False)
+        if args.keep > 2:
+            unitig_graph.save_to_gfa(contigs_placed_filename, include_depth=False)
 
     if args.keep < 3:
         shutil.rmtree(miniasm_dir, ignore_errors=True)
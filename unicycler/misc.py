@@ -16,7 +16,6 @@ not, see <http://www.gnu.org/licenses/>.
 import sys
 import os
 import subprocess
-import random
 import math
 import gzip
 import argparse
@@ -25,23 +24,11 @@ import re
 import textwrap
 import datetime
 import multiprocessing
+from .seq_parse import load_fasta_records
 from . import settings
 from . import log
 
 
-REV_COMP_DICT = {'A': 'T', 'T': 'A', 'G': 'C', 'C': 'G',
-                 'a': 't', 't': 'a', 'g': 'c', 'c': 'g',
-                 'R': 'Y', 'Y': 'R', 'S': 'S', 'W': 'W',
-                 'K': 'M', 'M': 'K', 'B': 'V', 'V': 'B',
-                 'D': 'H', 'H': 'D', 'N': 'N',
-                 'r': 'y', 'y': 'r', 's': 's', 'w': 'w',
-                 'k': 'm', 'm': 'k', 'b': 'v', 'v': 'b',
-                 'd': 'h', 'h': 'd', 'n': 'n',
-                 '.': '.', '-': '-', '?': '?'}
-
-RANDOM_SEQ_DICT = {0: 'A', 1: 'C', 2: 'G', 3: 'T'}
-
-
 def float_to_str(num, decimals, max_num=0):
     """
     Converts a number to a string. Will add left padding based on the max value to ensure numbers
@@ -212,37 +199,6 @@ def is_header_spades_format(contig_name):
         contig_name_parts[2] == 'length' and contig_name_parts[4] == 'cov'
 
 
-def reverse_complement(seq):
-    """
-    Given a DNA sequences, this function returns the reverse complement sequence.
-    """
-    return ''.join([complement_base(x) for x in seq][::-1])
-
-
-def complement_base(base):
-    """
-    Given a DNA base, this returns the complement.
-    """
-    try:
-        return REV_COMP_DICT[base]
-    except KeyError:
-        return 'N'
-
-
-def get_random_base():
-    """
-    Returns a random base with 25% probability of each.
-    """
-    return RANDOM_SEQ_DICT[random.randint(0, 3)]
-
-
-def get_random_sequence(length):
-    """
-    Returns a random sequence of the given length.
-    """
-    return ''.join([get_random_base() for _ in range(length)])
-
-
 def get_percentile(unsorted_list, percentile):
     """
     Returns a percentile of a list of numbers. Doesn't assume the list has already been sorted.
@@ -381,52 +337,20 @@ def flip_number_order(num_1, num_2):
 
 def load_fasta(filename):
     """
-    Returns a list of tuples (name, seq) for each record in the fasta file.
+    Returns a list of tuples (name, seq) for each record in the fasta file. Records with an empty
+    header are skipped.
     """
-    fasta_seqs = []
-    open_func = get_open_function(filename)
-    with open_func(filename, 'rt') as fasta_file:
-        name = ''
-        sequence = ''
-        for line in fasta_file:
-            line = line.strip()
-            if not line:
-                continue
-            if line[0] == '>':  # Header line = start of new contig
-                if name:
-                    fasta_seqs.append((name.split()[0], sequence))
-                    sequence = ''
-                name = line[1:]
-            else:
-                sequence += line
-        if name:
-            fasta_seqs.append((name.split()[0], sequence))
-    return fasta_seqs
+    return [(header.split()[0], sequence) for header, sequence in load_fasta_records(filename)
+            if header]
 
 
 def load_fasta_with_full_header(filename):
     """
-    Returns a list of tuples (name, header, seq) for each record in the fasta file.
+    Returns a list of tuples (name, header, seq) for each record in the fasta file. Records with
+    an empty header are skipped.
     """
-    fasta_seqs = []
-    open_func = get_open_function(filename)
-    with open_func(filename, 'rt') as fasta_file:
-        name = ''
-        sequence = ''
-        for line in fasta_file:
-            line = line.strip()
-            if not line:
-                continue
-            if line[0] == '>':  # Header line = start of new contig
-                if name:
-                    fasta_seqs.append((name.split()[0], name, sequence))
-                    sequence = ''
-                name = line[1:]
-            else:
-                sequence += line
-        if name:
-            fasta_seqs.append((name.split()[0], name, sequence))
-    return fasta_seqs
+    return [(header.split()[0], header, sequence)
+            for header, sequence in load_fasta_records(filename) if header]
 
 
 def score_function(val, half_score_val):
@@ -460,12 +384,8 @@ def add_line_breaks_to_sequence(sequence, line_length=0):
         return '\n'
     if line_length <= 0:
         line_length = settings.BASES_PER_FASTA_LINE
-    seq_with_breaks = ''
-    pos = 0
-    while pos < len(sequence):
-        seq_with_breaks += sequence[pos:pos+line_length] + '\n'
-        pos += line_length
-    return seq_with_breaks
+    return ''.join(sequence[pos:pos+line_length] + '\n'
+                   for pos in range(0, len(sequence), line_length))
 
 
 END_FORMATTING = '\033[0m'
@@ -14,13 +14,19 @@ details. You should have received a copy of the GNU General Public License along
 not, see <http://www.gnu.org/licenses/>.
 """
 
+import heapq
 import sys
+import time
 from collections import defaultdict
-from .misc import weighted_average, reverse_complement, get_num_agreement
+from .misc import weighted_average, get_num_agreement
+from .seq_utils import reverse_complement
 from . import settings
 
 try:
-    from .cpp_wrappers import fully_global_alignment, path_alignment
+    from .cpp_wrappers import fully_global_alignment_batch, path_alignment, \
+        path_alignment_batch, start_graph_alignment, extend_graph_alignment, \
+        get_graph_alignment_score, get_graph_alignment_bound, graph_alignment_dominates, \
+        delete_graph_alignment_column
 except AttributeError as e:
     sys.exit('Error when importing C++ library: ' + str(e) + '\n'
              'Have you successfully built the library file using make?')
@@ -30,11 +36,95 @@ class TooManyPaths(Exception):
     pass
 
 
+class SearchDeadline(object):
+    """
+    A time after which the path searches stop and return the best paths they have found so far.
+    Searches check it with expired, which also records (in timed_out) that a search was cut short.
+    """
+    def __init__(self, seconds):
+        self.end_time = time.time() + seconds
+        self.timed_out = False
+
+    def expired(self):
+        if not self.timed_out and time.time() > self.end_time:
+            self.timed_out = True
+        return self.timed_out
+
+
+class SearchPath(object):
+    """
+    An in-progress path used by the path searches. Instead of holding a list of its segments, each
+    path points to the path it was extended from, so extending a path doesn't copy it. The path's
+    length is carried along and updated with each extension, so it never needs to be summed again.
+
+    Segments can be signed segment numbers or LinkIndex nodes. The caller gives each segment's
+    length (minus the graph overlap) and a count key which is the same for both strands of a
+    segment, so get_count can say how many times a segment (either strand) is in the path. The
+    counts are built the first time they're needed from the parent's counts, so paths which are
+    never extended (most of them, in a branching search) never pay for them.
+    """
+    __slots__ = ['parent', 'seg', 'count_key', 'length', 'first_length', 'seg_counts']
+
+    def __init__(self, seg, seg_length, count_key, parent=None):
+        self.parent = parent
+        self.seg = seg
+        self.count_key = count_key
+        self.seg_counts = None
+        if parent is None:
+            self.length = seg_length
+            self.first_length = seg_length
+        else:
+            self.length = parent.length + seg_length
+            self.first_length = parent.first_length
+
+    def extend(self, seg, seg_length, count_key):
+        return SearchPath(seg, seg_length, count_key, self)
+
+    def get_count(self, count_key):
+        if self.seg_counts is None:
+            self.build_seg_counts()
+        return self.seg_counts.get(count_key, 0)
+
+    def build_seg_counts(self):
+        # The parent usually has its counts already (checking them is how it got extended), but we
+        # go back as far as needed in case it doesn't.
+        unbuilt = []
+        search_path = self
+        while search_path is not None and search_path.seg_counts is None:
+            unbuilt.append(search_path)
+            search_path = search_path.parent
+        seg_counts = {} if search_path is None else search_path.seg_counts
+        for search_path in reversed(unbuilt):
+            seg_counts = seg_counts.copy()
+            seg_counts[search_path.count_key] = seg_counts.get(search_path.count_key, 0) + 1
+            search_path.seg_counts = seg_counts
+
+    def to_list(self):
+        path = []
+        search_path = self
+        while search_path is not None:
+            path.append(search_path.seg)
+            search_path = search_path.parent
+        path.reverse()
+        return path
+
+
 def get_best_paths_for_seq(graph, start_seg, end_seg, target_length, sequence, scoring_scheme,
-                           expected_scaled_score):
+                           expected_scaled_score, use_graph_alignment=False, deadline=None,
+                           threads=1):
     """
     Given a sequence and target length, this function finds the best paths from the start
-    segment to the end segment.
+    segment to the end segment. It also returns the type of search which found them:
+    'graph align', 'exhaustive' or 'progressive'.
+
+    If use_graph_alignment is set, the sequence is first aligned directly to the graph (see
+    graph_alignment_paths). If that gives up, the usual searches are used instead.
+
+    If a SearchDeadline is given, the graph alignment and progressive searches stop when it
+    expires and the paths found so far are used.
+
+    Batches of path alignments are spread over the given number of threads. Callers which are
+    already running in a thread/process pool should leave this at 1.
     """
     assert graph.overlap == 0
 
@@ -44,38 +134,47 @@ def get_best_paths_for_seq(graph, start_seg, end_seg, target_length, sequence, s
     max_length = max(int(round(target_length * settings.MAX_RELATIVE_PATH_LENGTH)),
                      target_length + settings.RELATIVE_PATH_LENGTH_BUFFER_SIZE)
 
-    # If there are few enough possible paths, we just try aligning to them all.
-    try:
-        paths = all_paths(graph, start_seg, end_seg, min_length, max_length)
-        progressive_path_search = False
+    paths = None
+    if use_graph_alignment and sequence:
+        try:
+            paths = graph_alignment_paths(graph, start_seg, end_seg, min_length, max_length,
+                                          sequence, scoring_scheme, deadline)
+            search_type = 'graph align'
+        except TooManyPaths:
+            pass
 
-    # If there are too many paths to try exhaustively, we use a progressive approach to find
-    # the best path.
-    except TooManyPaths:
-        progressive_path_search = True
-        paths = progressive_path_find(graph, start_seg, end_seg, min_length, max_length,
-                                      sequence, scoring_scheme, expected_scaled_score)
+    # If there are few enough possible paths, we just try aligning to them all.
+    if paths is None:
+        try:
+            paths = all_paths(graph, start_seg, end_seg, min_length, max_length)
+            search_type = 'exhaustive'
+
+        # If there are too many paths to try exhaustively, we use a progressive approach to find
+        # the best path.
+        except TooManyPaths:
+            search_type = 'progressive'
+            paths = progressive_path_find(graph, start_seg, end_seg, min_length, max_length,
+                                          sequence, scoring_scheme, expected_scaled_score,
+                                          deadline, threads)
 
     # Sort by length discrepancy from the target so the closest length matches come first.
     paths = sorted(paths, key=lambda x: abs(target_length - graph.get_bridge_path_length(x)))
 
-    # We now align the consensus to each of the possible paths.
+    # We now align the consensus to each of the possible paths (all in one batch).
+    if sequence:
+        alignment_scores = fully_global_alignment_batch(sequence,
+                                                        [graph.get_path_sequence(x) for x in paths],
+                                                        scoring_scheme, True, 1000, threads)
     paths_and_scores = []
-    for path in paths:
+    for i, path in enumerate(paths):
         path_len = graph.get_bridge_path_length(path)
         length_discrepancy = abs(path_len - target_length)
 
-        # If there is a consensus sequence, then we actually do an alignment against the path.
+        # If there is a consensus sequence, then we use the alignment against the path.
         if sequence:
-            path_seq = graph.get_path_sequence(path)
-            alignment_result = fully_global_alignment(sequence, path_seq, scoring_scheme,
-                                                      True, 1000)
-            if not alignment_result:
+            if alignment_scores[i] is None:
                 continue
-
-            seqan_parts = alignment_result.split(',', 9)
-            raw_score = int(seqan_parts[6])
-            scaled_score = float(seqan_parts[7])
+            raw_score, scaled_score = alignment_scores[i]
 
         # If there isn't a consensus sequence (i.e. the start and end overlap), then each
         # path is only scored on how well its length agrees with the target length.
@@ -94,7 +193,43 @@ def get_best_paths_for_seq(graph, start_seg, end_seg, target_length, sequence, s
         min_scaled_score = best_scaled_score * 0.95
         paths_and_scores = [x for x in paths_and_scores if x[3] >= min_scaled_score]
 
-    return paths_and_scores, progressive_path_search
+    return paths_and_scores, search_type
+
+
+def get_min_distances_to(graph, target, max_distance):
+    """
+    Returns a dictionary of the (signed) segments which can lead to the target segment, where each
+    value is the shortest length that the segments between that segment and the target (excluding
+    both) would add to a path: the total of their lengths minus the graph overlap. It is found with
+    a Dijkstra search backward from the target which stops at max_distance, so a segment which
+    isn't in the dictionary either can't reach the target or can't reach it within max_distance.
+
+    Path searches use this to discard a path as soon as its length plus the distance still to go
+    exceeds their maximum. The distances ignore the limits on segment counts, so they can only
+    underestimate. This returns None (no pruning possible) if it meets a segment shorter than the
+    overlap, as that would make a distance negative.
+    """
+    distances = {}
+    heap = [(0, x) for x in graph.reverse_links.get(target, [])]
+    heapq.heapify(heap)
+    while heap:
+        distance, seg = heapq.heappop(heap)
+        if seg in distances:
+            continue
+        distances[seg] = distance
+
+        # Searches stop when they reach the target, so no path goes through it.
+        if seg == target:
+            continue
+        upstream_distance = distance + graph.segments[abs(seg)].get_length() - graph.overlap
+        if upstream_distance < distance:
+            return None
+        if upstream_distance > max_distance:
+            continue
+        for upstream_seg in graph.reverse_links.get(seg, []):
+            if upstream_seg not in distances:
+                heapq.heappush(heap, (upstream_distance, upstream_seg))
+    return distances
 
 
 def all_paths(graph, start, end, min_length, max_length):
@@ -106,6 +241,8 @@ def all_paths(graph, start, end, min_length, max_length):
     length) can result in very large numbers of potential paths in complex areas. To somewhat
     manage this, we exclude paths which include too many copies of a segment. 'Too many copies'
     is defined as double the copy depth count or the double the depth over start/end depth.
+    Paths which can't reach the end segment without exceeding the maximum length are dropped as
+    soon as they are made.
     """
     if start not in graph.forward_links:
         return []
@@ -114,41 +251,187 @@ def all_paths(graph, start, end, min_length, max_length):
     end_seg = graph.segments[abs(end)]
     start_end_depth = weighted_average(start_seg.depth, end_seg.depth,
                                        start_seg.get_length(), end_seg.get_length())
-    working_paths = [[x] for x in graph.forward_links[start]]
+
+    # The search runs on the graph's LinkIndex, so paths are SearchPaths of integer nodes. Segment
+    # lengths (minus the overlap) and allowed counts don't change during the search, so they are
+    # looked up once for each node as it's first reached.
+    # Each node's budget is the longest a path ending in that node can be (in SearchPath length)
+    # and still reach the end segment within max_length. Nodes which can't reach the end in time
+    # get a budget of -1, which no path can fit.
+    link_index = graph.get_link_index()
+    forward_offsets, forward_targets = link_index.forward_offsets, link_index.forward_targets
+    node_lengths = {}
+    node_max_counts = {}
+    node_budgets = {}
+    end_node = link_index.get_node(end)
+    distances = get_min_distances_to(graph, end, max_length)
+
+    def add_node_info(n):
+        seg_num = link_index.get_signed_seg_num(n)
+        node_lengths[n] = graph.segments[abs(seg_num)].get_length() - graph.overlap
+        node_max_counts[n] = graph.max_path_segment_count(seg_num, start_end_depth)
+        if n == end_node or distances is None:
+            node_budgets[n] = max_length - graph.overlap
+        elif seg_num in distances:
+            node_budgets[n] = max_length - graph.overlap - distances[seg_num]
+        else:
+            node_budgets[n] = -1
+
+    def get_path_length(path):
+        return 0 if path is None else path.length + graph.overlap
+
+    working_paths = []
+    for first_node in link_index.get_downstream_nodes(link_index.get_node(start)):
+        add_node_info(first_node)
+        if node_lengths[first_node] <= node_budgets[first_node] or first_node == end_node:
+            working_paths.append(SearchPath(first_node, node_lengths[first_node],
+                                            first_node >> 1))
     final_paths = []
     while working_paths:
         new_working_paths = []
         for working_path in working_paths:
-            last_seg = working_path[-1]
-            if last_seg == end:
-                potential_result = working_path[:-1]
-                if graph.get_path_length(potential_result) >= min_length:
+            last_node = working_path.seg
+            if last_node == end_node:
+                potential_result = working_path.parent
+                if get_path_length(potential_result) >= min_length:
                     final_paths.append(potential_result)
                     if len(final_paths) > settings.ALL_PATH_SEARCH_MAX_FINAL_PATHS:
                         raise TooManyPaths
-            elif graph.get_path_length(working_path) <= max_length and \
-                    last_seg in graph.forward_links:
-                for next_seg in graph.forward_links[last_seg]:
-                    max_allowed_count = graph.max_path_segment_count(next_seg, start_end_depth)
-                    count_so_far = working_path.count(next_seg) + working_path.count(-next_seg)
-                    if count_so_far < max_allowed_count:
-                        new_working_paths.append(working_path + [next_seg])
+            elif get_path_length(working_path) <= max_length:
+                if working_path.seg_counts is None:
+                    working_path.build_seg_counts()
+                seg_counts = working_path.seg_counts
+                for i in range(forward_offsets[last_node], forward_offsets[last_node + 1]):
+                    next_node = forward_targets[i]
+                    if next_node not in node_max_counts:
+                        add_node_info(next_node)
+                    if seg_counts.get(next_node >> 1, 0) >= node_max_counts[next_node]:
+                        continue
+                    next_length = working_path.length + node_lengths[next_node]
+                    if next_length <= node_budgets[next_node] or next_node == end_node:
+                        new_working_paths.append(SearchPath(next_node, node_lengths[next_node],
+                                                            next_node >> 1, working_path))
 
         # If the number of working paths is too high, we give up.
         if len(working_paths) > settings.ALL_PATH_SEARCH_MAX_WORKING_PATHS:
             raise TooManyPaths
         working_paths = new_working_paths
 
-    return final_paths
+    return [[link_index.get_signed_seg_num(n) for n in path.to_list()] if path is not None else []
+            for path in final_paths]
+
+
+def graph_alignment_paths(graph, start, end, min_length, max_length, sequence, scoring_scheme,
+                          deadline=None):
+    """
+    Returns the paths which connect the starting segment to the ending segment, are within the
+    length bounds and best align to the sequence (up to settings.GRAPH_ALIGNMENT_MAX_PATHS of
+    them, best first). The start and end segments are not themselves included in the paths.
+
+    Instead of enumerating paths and then aligning the sequence to each, this aligns the sequence
+    to the graph: each path's alignment column is made by extending its parent's column with one
+    segment, so shared path starts are only aligned once. Paths are extended best-first (by the
+    best score they could still get) and dropped when they can't beat the paths already found, when
+    another path ending in the same segment with the same length aligns at least as well at every
+    cell, or when they can't reach the end segment within max_length. Segment counts are limited
+    as in all_paths. Raises TooManyPaths if the search makes too many alignment columns.
+    If the deadline (a SearchDeadline) expires, the best paths found so far are returned.
+    """
+    if start not in graph.forward_links:
+        return []
+
+    start_seg = graph.segments[abs(start)]
+    end_seg = graph.segments[abs(end)]
+    start_end_depth = weighted_average(start_seg.depth, end_seg.depth,
+                                       start_seg.get_length(), end_seg.get_length())
+    distances = get_min_distances_to(graph, end, max_length)
+    max_path_count = settings.GRAPH_ALIGNMENT_MAX_PATHS
+
+    # The band covers the diagonal where the alignment starts (0) and those where it could end.
+    band_margin = settings.GRAPH_ALIGNMENT_BAND_MARGIN
+    min_diagonal = min(0, len(sequence) - max_length) - band_margin
+    max_diagonal = max(0, len(sequence) - min_length) + band_margin
+
+    def get_path_length(path):
+        return 0 if path is None else path.length + graph.overlap
+
+    # Every column is kept until the search is over (they are needed for the domination checks),
+    # and then they are all deleted.
+    columns = [start_graph_alignment(sequence, scoring_scheme, min_diagonal, max_diagonal)]
+    try:
+        # Working paths are in a heap ordered by their bound. The final paths are in a heap
+        # ordered by score, so the worst one we're keeping is always first. The counter breaks
+        # ties so paths are never compared.
+        counter = 0
+        working_paths = [(-get_graph_alignment_bound(columns[0]), counter, None, columns[0])]
+        final_paths = []
+        extended_columns = defaultdict(list)
+        while working_paths:
+            negative_bound, _, path, column = heapq.heappop(working_paths)
+            if len(final_paths) == max_path_count and -negative_bound <= final_paths[0][0]:
+                break
+            if deadline is not None and deadline.expired():
+                break
+            last_seg = start if path is None else path.seg
+            path_length = get_path_length(path)
+            same_end_columns = extended_columns[(last_seg, path_length)]
+            if any(graph_alignment_dominates(x, column) for x in same_end_columns):
+                continue
+            same_end_columns.append(column)
+
+            for next_seg in graph.forward_links.get(last_seg, []):
+                if next_seg == end:
+                    score = get_graph_alignment_score(column)
+                    if score is not None and min_length <= path_length <= max_length:
+                        counter += 1
+                        final_path = [] if path is None else path.to_list()
+                        if len(final_paths) < max_path_count:
+                            heapq.heappush(final_paths, (score, counter, final_path))
+                        elif score > final_paths[0][0]:
+                            heapq.heapreplace(final_paths, (score, counter, final_path))
+                    continue
+
+                max_allowed_count = graph.max_path_segment_count(next_seg, start_end_depth)
+                if path is not None and path.get_count(abs(next_seg)) >= max_allowed_count:
+                    continue
+                if path is None:
+                    next_path = start_search_path(graph, next_seg)
+                else:
+                    next_path = extend_search_path(graph, path, next_seg)
+                next_path_length = get_path_length(next_path)
+                if distances is not None:
+                    distance = distances.get(next_seg)
+                    if distance is None or next_path_length + distance > max_length:
+                        continue
+                elif next_path_length > max_length:
+                    continue
+
+                next_column = extend_graph_alignment(column,
+                                                     graph.get_path_sequence([next_seg]))
+                columns.append(next_column)
+                if len(columns) > settings.GRAPH_ALIGNMENT_MAX_COLUMNS:
+                    raise TooManyPaths
+                bound = get_graph_alignment_bound(next_column)
+                if bound is None or \
+                        (len(final_paths) == max_path_count and bound <= final_paths[0][0]):
+                    continue
+                counter += 1
+                heapq.heappush(working_paths, (-bound, counter, next_path, next_column))
+    finally:
+        for column in columns:
+            delete_graph_alignment_column(column)
+
+    return [x[2] for x in sorted(final_paths, key=lambda x: (-x[0], x[1]))]
 
 
 def progressive_path_find(graph, start, end, min_length, max_length, sequence, scoring_scheme,
-                          expected_scaled_score):
+                          expected_scaled_score, deadline=None, threads=1):
     """
     This function is called when all_paths fails due to too many paths. It searches for paths by
     extended outward from both the start and end, making paths where the two searches meet. When
     the number of working paths gets too high, it is culled by performing alignments with the
-    in-progress paths.
+    in-progress paths. If the deadline (a SearchDeadline) expires, the search stops and returns
+    the final paths it has made so far.
     """
     reverse_sequence = reverse_complement(sequence)
 
@@ -159,8 +442,8 @@ def progressive_path_find(graph, start, end, min_length, max_length, sequence, s
     # We will work with a list of forward paths and a list of reverse paths. We set them up now
     # along with dictionaries to allow easy access to all working paths which end in a particular
     # segment.
-    forward_working_paths = [[start]]
-    reverse_working_paths = [[-end]]
+    forward_working_paths = [start_search_path(graph, start)]
+    reverse_working_paths = [start_search_path(graph, -end)]
 
     # Knowing the start/end depth lets us put some limits on how many times a segment can be in a
     # path, which we use to avoid going through loops forever.
@@ -169,6 +452,12 @@ def progressive_path_find(graph, start, end, min_length, max_length, sequence, s
     start_end_depth = weighted_average(start_seg.depth, end_seg.depth,
                                        start_seg.get_length(), end_seg.get_length())
 
+    # The shortest distances to the far end let each direction drop paths which can't make it there
+    # within the maximum length. The reverse paths are heading for the start segment (on its other
+    # strand).
+    forward_distances = get_min_distances_to(graph, end, max_length)
+    reverse_distances = get_min_distances_to(graph, -start, max_length)
+
     # If one of the two directions gets clogged, then only the other direction will be advanced.
     # If both directions get clogged, then the culling score fraction will be increased (brought
     # closer to 1.0) such that path culling is more aggressive.
@@ -176,28 +465,36 @@ def progressive_path_find(graph, start, end, min_length, max_length, sequence, s
     reverse_clogged = False
 
     while True:
+        if deadline is not None and deadline.expired():
+            break
+
         if not forward_clogged:
-            shortest_reverse_path = min(graph.get_path_length(x[1:]) for x in reverse_working_paths)
+            shortest_reverse_path = min(get_length_after_start(graph, x)
+                                        for x in reverse_working_paths)
             reverse_paths_dict = build_path_dictionary(reverse_working_paths)
             forward_working_paths = advance_paths(forward_working_paths, reverse_paths_dict,
                                                   shortest_reverse_path, final_paths, False,
                                                   sequence, scoring_scheme, expected_scaled_score,
                                                   graph, start_end_depth, max_length,
-                                                  settings.PROGRESSIVE_PATH_SEARCH_SCORE_FRACTION)
+                                                  forward_distances,
+                                                  settings.PROGRESSIVE_PATH_SEARCH_SCORE_FRACTION,
+                                                  deadline, threads)
             if not forward_working_paths:
                 break
             elif len(forward_working_paths) > settings.PROGRESSIVE_PATH_SEARCH_MAX_WORKING_PATHS:
                 forward_clogged = True
 
         if not reverse_clogged:
-            shortest_forward_path = min(graph.get_path_length(x[1:]) for x in forward_working_paths)
+            shortest_forward_path = min(get_length_after_start(graph, x)
+                                        for x in forward_working_paths)
             forward_paths_dict = build_path_dictionary(forward_working_paths)
             reverse_working_paths = advance_paths(reverse_working_paths, forward_paths_dict,
                                                   shortest_forward_path, final_paths, True,
                                                   reverse_sequence, scoring_scheme,
                                                   expected_scaled_score, graph, start_end_depth,
-                                                  max_length,
-                                                  settings.PROGRESSIVE_PATH_SEARCH_SCORE_FRACTION)
+                                                  max_length, reverse_distances,
+                                                  settings.PROGRESSIVE_PATH_SEARCH_SCORE_FRACTION,
+                                                  deadline, threads)
             if not reverse_working_paths:
                 break
             elif len(reverse_working_paths) > settings.PROGRESSIVE_PATH_SEARCH_MAX_WORKING_PATHS:
@@ -212,6 +509,27 @@ def progressive_path_find(graph, start, end, min_length, max_length, sequence, s
     return [x for x in final_paths if min_length <= graph.get_path_length(x) <= max_length]
 
 
+def start_search_path(graph, seg):
+    """
+    Returns a SearchPath (of signed segment numbers) holding just the given segment.
+    """
+    return SearchPath(seg, graph.segments[abs(seg)].get_length() - graph.overlap, abs(seg))
+
+
+def extend_search_path(graph, path, seg):
+    return path.extend(seg, graph.segments[abs(seg)].get_length() - graph.overlap, abs(seg))
+
+
+def get_length_after_start(graph, path):
+    """
+    Returns the same value as graph.get_path_length for the SearchPath's segments after the first
+    (the start segment, which isn't part of the bridge).
+    """
+    if path.parent is None:
+        return 0
+    return path.length - path.first_length + graph.overlap
+
+
 def build_path_dictionary(path_list):
     """
     Constructs a dictionary where the key is the furthest segment in the path and the value is a
@@ -220,7 +538,7 @@ def build_path_dictionary(path_list):
     """
     path_dict = defaultdict(list)
     for path in path_list:
-        r_path = reverse_path(path)
+        r_path = reverse_path(path.to_list())
         path_dict[r_path[0]].append(r_path)
     return path_dict
 
@@ -235,10 +553,12 @@ def reverse_path(path):
 def advance_paths(working_paths, opposite_paths_dict, shortest_opposite_path,
                   final_paths, flip_new_final_paths, sequence, scoring_scheme,
                   expected_scaled_score, graph, start_end_depth, total_max_length,
-                  cull_score_fraction):
+                  distances_to_target, cull_score_fraction, deadline=None, threads=1):
     """
     This function takes the working paths for one direction and extends them until there are too
-    many or there are no more.
+    many, there are no more or the deadline (a SearchDeadline) expires. If distances_to_target
+    (from get_min_distances_to) is given, paths which can't reach the other end within
+    total_max_length aren't kept.
     """
     # For this function, the longest we'll allow paths to get is the the max length minus how far
     # the other side has gotten.
@@ -249,55 +569,70 @@ def advance_paths(working_paths, opposite_paths_dict, shortest_opposite_path,
         # round of advancing.
         if not 0 < len(working_paths) <= settings.PROGRESSIVE_PATH_SEARCH_MAX_WORKING_PATHS:
             break
+        if deadline is not None and deadline.expired():
+            break
 
-        shortest_path_len = min(graph.get_path_length(x) for x in working_paths)
+        shortest_path_len = min(x.length for x in working_paths)
 
         # Extend the shortest working path(s) by adding downstream segments.
         new_working_paths = []
         for path in working_paths:
-            path_len = graph.get_path_length(path)
 
             # If this path isn't the shortest path, we don't deal with it this time.
-            if path_len > shortest_path_len:
+            if path.length > shortest_path_len:
                 new_working_paths.append(path)
 
             # If it is the shortest path and has downstream segments...
-            elif path[-1] in graph.forward_links:
-                downstream_segments = graph.forward_links[path[-1]]
+            elif path.seg in graph.forward_links:
+                downstream_segments = graph.forward_links[path.seg]
+                path_list = None
                 for next_seg in downstream_segments:
 
                     # Make sure we haven't already used this segment too many times in the path.
                     max_allowed_count = graph.max_path_segment_count(next_seg, start_end_depth)
-                    count_so_far = path.count(next_seg) + path.count(-next_seg)
-                    if count_so_far < max_allowed_count:
+                    if path.get_count(abs(next_seg)) < max_allowed_count:
 
                         # If the next segment is in the dictionary of the opposite direction's
                         # paths, that means we've found a path through to the other side!
                         if next_seg in opposite_paths_dict:
+                            if path_list is None:
+                                path_list = path.to_list()
                             for final_part in opposite_paths_dict[next_seg]:
-                                final_path = path + final_part
+                                final_path = path_list + final_part
                                 if flip_new_final_paths:
                                     final_path = reverse_path(final_path)
                                 final_paths.add(tuple(final_path))
 
                         # Finally, extend the path if doing so won't make it too long.
-                        if graph.get_path_length(path[1:] + [next_seg]) <= max_length:
-                            new_working_paths.append(path + [next_seg])
+                        next_path = extend_search_path(graph, path, next_seg)
+                        next_path_len = get_length_after_start(graph, next_path)
+                        if next_path_len > max_length:
+                            continue
+                        if distances_to_target is not None:
+                            distance = distances_to_target.get(next_seg)
+                            if distance is None or next_path_len + distance > total_max_length:
+                                continue
+                        new_working_paths.append(next_path)
 
         working_paths = new_working_paths
 
     # If we've exceeded the allowable working count, cull the paths down to size now.
     if len(working_paths) > settings.PROGRESSIVE_PATH_SEARCH_MAX_WORKING_PATHS:
         working_paths = cull_paths(graph, working_paths, sequence, scoring_scheme,
-                                   expected_scaled_score, cull_score_fraction)
+                                   expected_scaled_score, cull_score_fraction, threads)
 
     return working_paths
 
 
-def cull_paths(graph, paths, sequence, scoring_scheme, expected_scaled_score, cull_score_fraction):
+def cull_paths(graph, paths, sequence, scoring_scheme, expected_scaled_score, cull_score_fraction,
+               threads=1):
     """
-    Returns a reduced list of paths - the ones which best align to the given sequence.
+    Returns a reduced list of paths (SearchPaths) - the ones which best align to the given
+    sequence.
     """
+    search_paths = paths
+    paths = [x.to_list() for x in search_paths]
+
     # It's possible that all of the working paths share quite a bit in common at their
     # start. We can therefore find the common starting sequence and align to that once,
     # and then only do separate alignments for the remainder of the paths, saving some time.
@@ -325,17 +660,15 @@ def cull_paths(graph, paths, sequence, scoring_scheme, expected_scaled_score, cu
     else:
         seq_align_start = 0
 
-    scored_paths = []
     shortest_len = min(graph.get_path_length(x[1:]) for x in paths)
     seq_after_common_path = sequence[seq_align_start:]
-    for path in paths:
-        path_seq_after_common_path = \
-            graph.get_path_sequence(path[1:])[path_align_start:shortest_len]
-        alignment_result = path_alignment(path_seq_after_common_path, seq_after_common_path,
-                                          scoring_scheme, True, 500)
-        if alignment_result:
-            scaled_score = float(alignment_result.split(',', 8)[7])
-            scored_paths.append((path, scaled_score))
+    paths_seq_after_common_path = [graph.get_path_sequence(x[1:])[path_align_start:shortest_len]
+                                   for x in paths]
+    alignment_scores = path_alignment_batch(paths_seq_after_common_path, seq_after_common_path,
+                                            scoring_scheme, True, 500, threads)
+    scored_paths = [(search_path, scores[1])
+                    for search_path, scores in zip(search_paths, alignment_scores)
+                    if scores is not None]
 
     scored_paths = sorted(scored_paths, key=lambda x: x[1], reverse=True)
     if not scored_paths:
@@ -359,7 +692,7 @@ def cull_paths(graph, paths, sequence, scoring_scheme, expected_scaled_score, cu
     # passes through this function will have a larger common start and will therefore go faster.
     surviving_paths_by_terminal_seg = {}
     for path in surviving_paths:
-        terminal_seg = path[0][-1]
+        terminal_seg = path[0].seg
         score = path[1]
         if terminal_seg not in surviving_paths_by_terminal_seg:  # First
             surviving_paths_by_terminal_seg[terminal_seg] = [path]
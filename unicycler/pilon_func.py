@@ -17,7 +17,8 @@ import os
 import subprocess
 import shutil
 from collections import defaultdict
-from .misc import load_fasta, reverse_complement, int_to_str, underline, get_percentile_sorted, dim
+from .misc import load_fasta, int_to_str, underline, get_percentile_sorted, dim
+from .seq_utils import reverse_complement
 from .assembly_graph import AssemblyGraph
 from .assembly_graph_segment import Segment
 from .string_graph import StringGraph, StringGraphSegment
@@ -316,13 +317,14 @@ def polish_with_pilon(graph, args, polish_dir, insert_size_1st, insert_size_99th
             if header.endswith('_pilon'):
                 header = header[:-6]
             if isinstance(graph, AssemblyGraph):
-                segment = graph.segments[int(header)]
+                # The reverse strand is made from this when needed.
+                graph.segments[int(header)].forward_sequence = sequence
             elif isinstance(graph, StringGraph):
                 segment = graph.segments[header]
+                segment.forward_sequence = sequence
+                segment.reverse_sequence = reverse_complement(sequence)
             else:
                 assert False
-            segment.forward_sequence = sequence
-            segment.reverse_sequence = reverse_complement(sequence)
 
     log.log('')
 
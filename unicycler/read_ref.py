@@ -17,9 +17,11 @@ import random
 import gzip
 import os
 import math
+from array import array
 from .misc import quit_with_error, get_nice_header, get_compression_type, get_sequence_file_type,\
     strip_read_extensions, print_table, float_to_str, range_is_contained, range_overlap_size, \
     simplify_ranges, add_line_breaks_to_sequence
+from .seq_parse import open_binary, iterate_fasta, iterate_fastq
 from . import settings
 from . import log
 
@@ -51,39 +53,21 @@ def load_references(fasta_filename, contamination=False, section_header='Loading
     if show_progress:
         log.log_progress_line(0, num_refs)
 
-    fasta_file = open_func(fasta_filename, 'rt')
-    name = ''
-    sequence = ''
     last_progress = 0.0
     step = settings.LOADING_REFERENCES_PROGRESS_STEP
-    for line in fasta_file:
-        line = line.strip()
-        if not line:
-            continue
-        if line.startswith('>'):  # Header line = start of new contig
-            if name:
-                if contamination:
-                    name = 'CONTAMINATION_' + name
-                references.append(Reference(name, sequence))
-                total_bases += len(sequence)
-                progress = 100.0 * len(references) / num_refs
-                progress_rounded_down = math.floor(progress / step) * step
-                if progress == 100.0 or progress_rounded_down > last_progress:
-                    if show_progress:
-                        log.log_progress_line(len(references), num_refs, total_bases)
-                    last_progress = progress_rounded_down
-                sequence = ''
-            name = get_nice_header(line[1:])
-        else:
-            sequence += line
-    fasta_file.close()
-    if name:
-        if contamination:
-            name = 'CONTAMINATION_' + name
-        references.append(Reference(name, sequence))
-        total_bases += len(sequence)
-        if show_progress:
-            log.log_progress_line(len(references), num_refs, total_bases)
+    with open_binary(fasta_filename) as fasta_file:
+        for header, sequence in iterate_fasta(fasta_file):
+            name = get_nice_header(header)
+            if contamination:
+                name = 'CONTAMINATION_' + name
+            references.append(Reference(name, sequence))
+            total_bases += len(sequence)
+            progress = 100.0 * len(references) / num_refs
+            progress_rounded_down = math.floor(progress / step) * step
+            if progress == 100.0 or progress_rounded_down > last_progress:
+                if show_progress:
+                    log.log_progress_line(len(references), num_refs, total_bases)
+                last_progress = progress_rounded_down
     if show_progress:
         log.log_progress_line(len(references), len(references), total_bases, end_newline=True)
 
@@ -95,6 +79,9 @@ def load_long_reads(filename, silent=False, section_header='Loading reads', outp
     This function loads in long reads from a FASTQ file and returns a dictionary where key = read
     name and value = Read object. It also returns a list of read names, in the order they are in
     the file.
+
+    The file is only read once. Since we don't know the read count in advance, progress is
+    estimated from how many bytes of the (possibly compressed) file have been consumed.
     """
     # Read files can be either FASTA or FASTQ and optionally gzipped.
     try:
@@ -102,103 +89,48 @@ def load_long_reads(filename, silent=False, section_header='Loading reads', outp
     except ValueError:
         file_type = ''
         quit_with_error(filename + ' is not in either FASTA or FASTQ format')
-    if get_compression_type(filename) == 'gz':
-        open_func = gzip.open
-    else:  # plain text
-        open_func = open
 
     if not silent:
         log.log_section_header(section_header)
 
     read_dict = {}
     read_names = []
+    read_store = ReadStore()
     total_bases = 0
     last_progress = 0.0
     step = settings.LOADING_READS_PROGRESS_STEP
     duplicate_read_names_found = False
 
-    if file_type == 'FASTQ':
-        with open_func(filename, 'rt') as fastq:
-            num_reads = sum(1 for _ in fastq) // 4
-    else:  # file_type == 'FASTA'
-        with open_func(filename, 'rt') as fasta:
-            num_reads = sum(1 for line in fasta if line.startswith('>'))
-    if not num_reads:
+    with ProgressFile(filename) as progress_file:
+        if file_type == 'FASTQ':
+            records = iterate_fastq(progress_file.binary_file)
+        else:  # file_type == 'FASTA'
+            records = ((header, sequence, None) for header, sequence
+                       in iterate_fasta(progress_file.binary_file))
+
+        for header, sequence, qualities in records:
+            if file_type == 'FASTQ':
+                original_name = header.split()[0]
+            else:  # file_type == 'FASTA'
+                original_name = get_nice_header(header)
+
+            # Don't allow duplicate read names, so add a trailing number when they occur.
+            name = original_name
+            duplicate_name_number = 1
+            while name in read_dict:
+                duplicate_read_names_found = True
+                duplicate_name_number += 1
+                name = original_name + '_' + str(duplicate_name_number)
+
+            read_dict[name] = Read(name, sequence, qualities, read_store)
+            read_names.append(name)
+            total_bases += len(sequence)
+            if not silent:
+                last_progress = log_estimated_progress(progress_file, len(read_dict),
+                                                       total_bases, last_progress, step)
+
+    if not read_dict:
         quit_with_error('There are no read sequences in ' + filename)
-    if not silent:
-        log.log_progress_line(0, num_reads)
-
-    if file_type == 'FASTQ':
-        with open_func(filename, 'rt') as fastq:
-            for line in fastq:
-                stripped_line = line.strip()
-                if len(stripped_line) == 0:
-                    continue
-                if not stripped_line.startswith('@'):
-                    continue
-                original_name = stripped_line[1:].split()[0]
-                sequence = next(fastq).strip()
-                _ = next(fastq)
-                qualities = next(fastq).strip()
-
-                # Don't allow duplicate read names, so add a trailing number when they occur.
-                name = original_name
-                duplicate_name_number = 1
-                while name in read_dict:
-                    duplicate_read_names_found = True
-                    duplicate_name_number += 1
-                    name = original_name + '_' + str(duplicate_name_number)
-
-                read_dict[name] = Read(name, sequence, qualities)
-                read_names.append(name)
-                total_bases += len(sequence)
-                progress = 100.0 * len(read_dict) / num_reads
-                progress_rounded_down = math.floor(progress / step) * step
-                if progress == 100.0 or progress_rounded_down > last_progress:
-                    if not silent:
-                        log.log_progress_line(len(read_dict), num_reads, total_bases)
-                    last_progress = progress_rounded_down
-
-    else:  # file_type == 'FASTA'
-        with open_func(filename, 'rt') as fasta:
-            name = ''
-            sequence = ''
-            last_progress = 0.0
-            for line in fasta:
-                line = line.strip()
-                if not line:
-                    continue
-                if line.startswith('>'):  # Header line = start of new contig
-                    if name:
-                        read_dict[name] = Read(name, sequence, None)
-                        read_names.append(name)
-                        total_bases += len(sequence)
-                        progress = 100.0 * len(read_dict) / num_reads
-                        progress_rounded_down = math.floor(progress / step) * step
-                        if progress == 100.0 or progress_rounded_down > last_progress:
-                            if not silent:
-                                log.log_progress_line(len(read_dict), num_reads, total_bases)
-                            last_progress = progress_rounded_down
-                        sequence = ''
-
-                    # Don't allow duplicate read names, so add a trailing number when they occur.
-                    original_name = get_nice_header(line[1:])
-                    name = original_name
-                    duplicate_name_number = 1
-                    while name in read_dict:
-                        duplicate_read_names_found = True
-                        duplicate_name_number += 1
-                        name = original_name + '_' + str(duplicate_name_number)
-
-                else:
-                    sequence += line
-            if name:
-                read_dict[name] = Read(name, sequence, None)
-                read_names.append(name)
-                total_bases += len(sequence)
-                if not silent:
-                    log.log_progress_line(len(read_dict), num_reads, total_bases)
-
     if not silent:
         log.log_progress_line(len(read_dict), len(read_dict), total_bases, end_newline=True)
 
@@ -221,16 +153,18 @@ def load_long_reads(filename, silent=False, section_header='Loading reads', outp
             no_dup_filename = os.path.join(os.path.dirname(os.path.abspath(filename)),
                                            no_dup_filename)
 
-        if not silent:
-            log.log('\nDuplicate read names found. Saving duplicate-free file:')
-            log.log(no_dup_filename)
-        with gzip.open(no_dup_filename, 'wb') as f:
-            for read_name in read_names:
-                read = read_dict[read_name]
-                if file_type == 'FASTQ':
-                    f.write(read.get_fastq().encode())
-                else:  # file_type == 'FASTA'
-                    f.write(read.get_fasta().encode())
+        # The duplicate-free file only depends on the original, so if it was already made (e.g.
+        # by an earlier run with the same output directory) then we can reuse it.
+        if os.path.isfile(no_dup_filename) and \
+                os.path.getmtime(no_dup_filename) >= os.path.getmtime(filename):
+            if not silent:
+                log.log('\nDuplicate read names found. Using existing duplicate-free file:')
+                log.log(no_dup_filename)
+        else:
+            if not silent:
+                log.log('\nDuplicate read names found. Saving duplicate-free file:')
+                log.log(no_dup_filename)
+            save_reads_to_file(no_dup_filename, read_dict, read_names, file_type == 'FASTQ')
 
     else:
         no_dup_filename = filename
@@ -238,6 +172,76 @@ def load_long_reads(filename, silent=False, section_header='Loading reads', outp
     return read_dict, read_names, no_dup_filename
 
 
+def save_reads_to_file(filename, read_dict, read_names, fastq):
+    """
+    Saves reads to a gzipped FASTQ or FASTA file. Records are built directly from the ReadStore's
+    bytes and written in large batches with fast compression, as this file only needs to be read
+    by later steps of the same run. FASTA sequences are written on a single line. The file is
+    written under a temporary name and then moved into place, so a partial file is never left
+    behind to be mistaken for a complete one.
+    """
+    temp_filename = filename + '.temp'
+    batch = []
+    batch_size = 0
+    with gzip.open(temp_filename, 'wb',
+                   compresslevel=settings.DUPLICATE_FREE_READS_COMPRESSION_LEVEL) as f:
+        for read_name in read_names:
+            read = read_dict[read_name]
+            batch += read.get_record_bytes(fastq)
+            batch_size += read.get_length()
+            if batch_size >= settings.DUPLICATE_FREE_READS_WRITE_BATCH_SIZE:
+                f.write(b''.join(batch))
+                batch = []
+                batch_size = 0
+        f.write(b''.join(batch))
+    os.replace(temp_filename, filename)
+
+
+class ProgressFile(object):
+    """
+    This class opens a (possibly gzipped) sequence file for reading in binary mode, but it keeps a
+    handle on the underlying raw file. That lets us see how much of the file has been consumed, even
+    when the contents are being decompressed on the fly, so we can show progress without needing
+    an extra pass over the file to count records.
+    """
+
+    def __init__(self, filename):
+        self.size = os.path.getsize(filename)
+        self.raw_file = open(filename, 'rb')
+        if get_compression_type(filename) == 'gz':
+            self.binary_file = gzip.GzipFile(fileobj=self.raw_file, mode='rb')
+        else:  # plain text
+            self.binary_file = self.raw_file
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.binary_file.close()
+        self.raw_file.close()
+
+    def fraction_consumed(self):
+        if self.size == 0:
+            return 1.0
+        return min(1.0, self.raw_file.tell() / self.size)
+
+
+def log_estimated_progress(progress_file, count, total_bases, last_progress, step):
+    """
+    Logs a progress line for records loaded from a ProgressFile. The total record count isn't
+    known, so it is extrapolated from the fraction of the file consumed so far. Returns the
+    updated last_progress value.
+    """
+    fraction = progress_file.fraction_consumed()
+    progress = 100.0 * fraction
+    progress_rounded_down = math.floor(progress / step) * step
+    if fraction > 0.0 and progress_rounded_down > last_progress:
+        estimated_total = max(count, int(round(count / fraction)))
+        log.log_progress_line(count, estimated_total, total_bases)
+        return progress_rounded_down
+    return last_progress
+
+
 class Reference(object):
     """
     This class holds a reference sequence: just a name and a nucleotide sequence.
@@ -263,32 +267,95 @@ class Reference(object):
         return len(self.sequence)
 
 
-class Read(object):
+class ReadStore(object):
     """
-    This class holds a long read, e.g. from PacBio or Oxford Nanopore.
+    This class packs the sequences and qualities of many reads into contiguous buffers, with an
+    offset table marking where each read starts and ends. This uses far less memory than keeping
+    two separate Python strings per read. Read objects are lightweight views into a ReadStore.
     """
 
-    def __init__(self, name, sequence, qualities):
-        self.name = name
-        self.sequence = sequence.upper()
+    def __init__(self):
+        self.sequences = bytearray()
+        self.qualities = bytearray()
+        self.offsets = array('Q', [0])
 
+        # Reads without qualities (e.g. from a FASTA file) don't take up any space in the
+        # qualities buffer, so their qualities offset is stored separately (-1 for no qualities).
+        self.qual_offsets = array('q')
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def add(self, sequence, qualities):
+        """
+        Adds a read's sequence and qualities to the store and returns its index.
+        """
+        self.sequences += sequence.upper().encode()
         if qualities:
-            self.qualities = qualities
+            self.qual_offsets.append(len(self.qualities))
+            self.qualities += qualities.encode()
+        else:
+            self.qual_offsets.append(-1)
+        self.offsets.append(len(self.sequences))
+        return len(self.offsets) - 2
+
+    def get_length(self, index):
+        return self.offsets[index + 1] - self.offsets[index]
+
+    def get_sequence_bytes(self, index):
+        return self.sequences[self.offsets[index]:self.offsets[index + 1]]
+
+    def get_qualities_bytes(self, index):
+        qual_start = self.qual_offsets[index]
+        if qual_start < 0:
+            return b'+' * self.get_length(index)
+        return self.qualities[qual_start:qual_start + self.get_length(index)]
+
+    def get_sequence(self, index):
+        return self.sequences[self.offsets[index]:self.offsets[index + 1]].decode()
+
+    def get_qualities(self, index):
+        qual_start = self.qual_offsets[index]
+        if qual_start < 0:
+            return '+' * self.get_length(index)
+        return self.qualities[qual_start:qual_start + self.get_length(index)].decode()
+
+
+class Read(object):
+    """
+    This class holds a long read, e.g. from PacBio or Oxford Nanopore. The sequence and qualities
+    are kept in a ReadStore (which can be shared between many reads) and are only turned into
+    Python strings when accessed.
+    """
+    __slots__ = ['name', 'alignments', 'read_store', 'index']
+
+    def __init__(self, name, sequence, qualities, read_store=None):
+        self.name = name
+        if read_store is None:
+            read_store = ReadStore()
+        self.read_store = read_store
 
         # If no qualities are given, then they are all set to '+', the Phred+33 score for 10% error.
-        else:
-            self.qualities = '+' * len(self.sequence)
+        self.index = read_store.add(sequence, qualities)
 
         self.alignments = []
 
     def __repr__(self):
-        return self.name + ' (' + str(len(self.sequence)) + ' bp)'
+        return self.name + ' (' + str(self.get_length()) + ' bp)'
+
+    @property
+    def sequence(self):
+        return self.read_store.get_sequence(self.index)
+
+    @property
+    def qualities(self):
+        return self.read_store.get_qualities(self.index)
 
     def get_length(self):
         """
         Returns the sequence length.
         """
-        return len(self.sequence)
+        return self.read_store.get_length(self.index)
 
     def remove_conflicting_alignments(self, allowed_overlap):
         """
@@ -355,18 +422,31 @@ class Read(object):
         """
         return '>' + self.name + '\n' + add_line_breaks_to_sequence(self.sequence, 70)
 
+    def get_record_bytes(self, fastq):
+        """
+        Returns the parts of a FASTQ or (unwrapped) FASTA record for this read as a list of bytes,
+        taken straight from the ReadStore without building intermediate strings.
+        """
+        sequence = self.read_store.get_sequence_bytes(self.index)
+        if fastq:
+            return [b'@', self.name.encode(), b'\n', sequence, b'\n+\n',
+                    self.read_store.get_qualities_bytes(self.index), b'\n']
+        else:
+            return [b'>', self.name.encode(), b'\n', sequence, b'\n']
+
     def get_fraction_aligned(self):
         """
         This function returns the fraction of the read which is covered by any of the read's
         alignments.
         """
-        if len(self.sequence) == 0:
+        read_length = self.get_length()
+        if read_length == 0:
             return 0.0
         read_ranges = [x.read_start_end_positive_strand()
                        for x in self.alignments]
         read_ranges = simplify_ranges(read_ranges)
         aligned_length = sum([x[1] - x[0] for x in read_ranges])
-        return aligned_length / len(self.sequence)
+        return aligned_length / read_length
 
     def get_reference_bases_aligned(self):
         """
@@ -386,7 +466,7 @@ class Read(object):
         """
         Returns true if 50% or more of the alignments are to contaminant sequences.
         """
-        if len(self.sequence) == 0:
+        if self.get_length() == 0:
             return False
         if not self.alignments:
             return False
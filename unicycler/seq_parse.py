@@ -0,0 +1,137 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This module contains fast FASTA and FASTQ parsing functions which are shared by Unicycler's
+various sequence loaders. Files are read in binary mode in large chunks and each record's sequence
+is built with a single join, so loading time stays linear even for long line-wrapped sequences.
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import gzip
+
+CHUNK_SIZE = 1048576
+
+
+def open_binary(filename):
+    """
+    Opens a plain or gzipped file for reading in binary mode.
+    """
+    with open(filename, 'rb') as f:
+        magic_bytes = f.read(2)
+    if magic_bytes == b'\x1f\x8b':
+        return gzip.open(filename, 'rb')
+    else:
+        return open(filename, 'rb')
+
+
+def iterate_lines(binary_file, chunk_size=CHUNK_SIZE):
+    """
+    Yields the lines of a binary file (as bytes without the trailing line break). The file is read
+    in large chunks which is much faster than the line-by-line iteration of a text mode file.
+    """
+    leftover = b''
+    while True:
+        chunk = binary_file.read(chunk_size)
+        if not chunk:
+            break
+        lines = (leftover + chunk).split(b'\n')
+        leftover = lines.pop()
+        yield from lines
+    if leftover:
+        yield leftover
+
+
+def iterate_fasta(binary_file, chunk_size=CHUNK_SIZE):
+    """
+    Yields a (header, sequence) tuple of strings for each record in a FASTA file. The header does
+    not include the leading '>'. Rather than going line by line, this finds record boundaries in
+    each chunk and strips line breaks from a whole record at once, which is much faster for
+    line-wrapped sequences.
+    """
+    record_parts = []
+    carry = b'\n'  # lets us find a record that starts at the very beginning of the file
+    while True:
+        chunk = binary_file.read(chunk_size)
+        if not chunk:
+            break
+        data = carry + chunk
+        start = 0
+        while True:
+            record_start = data.find(b'\n>', start)
+            if record_start < 0:
+                break
+            record_parts.append(data[start:record_start])
+            if record_parts[0].startswith(b'>'):
+                yield fasta_record_from_bytes(b''.join(record_parts))
+            record_parts = []
+            start = record_start + 1
+
+        # A trailing line break is held back, in case the next chunk starts with a '>'.
+        if data.endswith(b'\n'):
+            record_parts.append(data[start:-1])
+            carry = b'\n'
+        else:
+            record_parts.append(data[start:])
+            carry = b''
+    if record_parts and record_parts[0].startswith(b'>'):
+        yield fasta_record_from_bytes(b''.join(record_parts))
+
+
+def fasta_record_from_bytes(record):
+    """
+    Takes a whole FASTA record (starting with '>') and returns its header and sequence as strings.
+    All whitespace (including line breaks) is removed from the sequence.
+    """
+    header, _, sequence = record.partition(b'\n')
+    sequence = sequence.replace(b'\n', b'')
+
+    # Other whitespace is rare, so we only pay for removing it when it's present.
+    if b'\r' in sequence or b' ' in sequence or b'\t' in sequence:
+        sequence = sequence.translate(None, b' \t\r')
+    return header[1:].strip().decode(), sequence.decode()
+
+
+def iterate_fastq(binary_file):
+    """
+    Yields a (header, sequence, qualities) tuple of strings for each record in a FASTQ file. The
+    header does not include the leading '@'. Empty lines and any lines before a header are skipped.
+    """
+    lines = iterate_lines(binary_file)
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] != 64:  # '@'
+            continue
+        header = line[1:].decode()
+        try:
+            sequence = next(lines).strip().decode()
+            next(lines)
+            qualities = next(lines).strip().decode()
+        except StopIteration:  # truncated final record
+            return
+        yield header, sequence, qualities
+
+
+def load_fasta_records(filename):
+    """
+    Returns a list of (header, sequence) tuples for each record in a (possibly gzipped) FASTA
+    file.
+    """
+    with open_binary(filename) as fasta_file:
+        return list(iterate_fasta(fasta_file))
+
+
+def load_fastq_records(filename):
+    """
+    Returns a list of (header, sequence, qualities) tuples for each record in a (possibly gzipped)
+    FASTQ file.
+    """
+    with open_binary(filename) as fastq_file:
+        return list(iterate_fastq(fastq_file))
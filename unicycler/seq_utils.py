@@ -0,0 +1,88 @@
+"""
+Copyright 2017 Ryan Wick (rrwick@gmail.com)
+https://github.com/rrwick/Unicycler
+
+This module contains simple functions for working with DNA sequences: complementing, reverse
+complementing, homopolymer detection and random sequence generation. Complementing is done with
+str.translate, which works on the whole sequence in C instead of looking up each base in Python.
+
+This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version. Unicycler is distributed in
+the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details. You should have received a copy of the GNU General Public License along with Unicycler. If
+not, see <http://www.gnu.org/licenses/>.
+"""
+
+import random
+
+REV_COMP_DICT = {'A': 'T', 'T': 'A', 'G': 'C', 'C': 'G',
+                 'a': 't', 't': 'a', 'g': 'c', 'c': 'g',
+                 'R': 'Y', 'Y': 'R', 'S': 'S', 'W': 'W',
+                 'K': 'M', 'M': 'K', 'B': 'V', 'V': 'B',
+                 'D': 'H', 'H': 'D', 'N': 'N',
+                 'r': 'y', 'y': 'r', 's': 's', 'w': 'w',
+                 'k': 'm', 'm': 'k', 'b': 'v', 'v': 'b',
+                 'd': 'h', 'h': 'd', 'n': 'n',
+                 '.': '.', '-': '-', '?': '?'}
+
+RANDOM_BASES = 'ACGT'
+
+
+class ComplementTable(dict):
+    """
+    A str.translate table for complementing bases. Any character which isn't in REV_COMP_DICT is
+    translated to 'N'.
+    """
+    def __missing__(self, key):
+        return 'N'
+
+
+COMPLEMENT_TABLE = ComplementTable(str.maketrans(REV_COMP_DICT))
+
+
+def complement(seq):
+    """
+    Given a DNA sequence, this function returns the complement sequence (not reversed).
+    """
+    return seq.translate(COMPLEMENT_TABLE)
+
+
+def reverse_complement(seq):
+    """
+    Given a DNA sequence, this function returns the reverse complement sequence.
+    """
+    return seq[::-1].translate(COMPLEMENT_TABLE)
+
+
+def complement_base(base):
+    """
+    Given a DNA base, this returns the complement.
+    """
+    return REV_COMP_DICT.get(base, 'N')
+
+
+def is_homopolymer(seq):
+    """
+    Returns True if the sequence is made up of only one base (ignoring case). An empty sequence is
+    not a homopolymer.
+    """
+    if not seq:
+        return False
+    seq = seq.lower()
+    return seq.count(seq[0]) == len(seq)
+
+
+def get_random_base():
+    """
+    Returns a random base with 25% probability of each.
+    """
+    return random.choice(RANDOM_BASES)
+
+
+def get_random_sequence(length):
+    """
+    Returns a random sequence of the given length.
+    """
+    return ''.join(random.choices(RANDOM_BASES, k=length))
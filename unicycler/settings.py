@@ -94,6 +94,16 @@ ALL_PATH_SEARCH_MAX_FINAL_PATHS = 500
 PROGRESSIVE_PATH_SEARCH_MAX_WORKING_PATHS = 100
 PROGRESSIVE_PATH_SEARCH_SCORE_FRACTION = 0.995
 
+# These settings are used when Unicycler aligns a long read bridge's consensus sequence directly to
+# the graph instead of aligning it to each candidate path in turn. The search keeps the
+# GRAPH_ALIGNMENT_MAX_PATHS best-scoring paths and computes GRAPH_ALIGNMENT_BAND_MARGIN diagonals
+# beyond those needed for the path length range. If it makes more than
+# GRAPH_ALIGNMENT_MAX_COLUMNS alignment columns, Unicycler falls back to the other path searches.
+GRAPH_ALIGNMENT_PATH_SEARCH = False
+GRAPH_ALIGNMENT_MAX_PATHS = 10
+GRAPH_ALIGNMENT_BAND_MARGIN = 200
+GRAPH_ALIGNMENT_MAX_COLUMNS = 5000
+
 # These settings are used for Unicycler's copy number determination - the process by which it
 # tries to figure out the depth of constituent components of each segment.
 #   * INITIAL_SINGLE_COPY_TOLERANCE controls how much excess depth is acceptable for the first
@@ -102,13 +112,16 @@ PROGRESSIVE_PATH_SEARCH_SCORE_FRACTION = 0.995
 #     depths from one segment to the next.
 #   * MIN_SINGLE_COPY_LENGTH is how short of a segment can be called single copy when adding
 #     additional single copy segments.
-#   * MAX_COPY_DEPTH_DISTRIBUTION_ARRANGEMENTS caps the number of possible ways to redistribute a
-#     segment's copy depths to its neighbours. If there are more possibilities than this,
+#   * MAX_COPY_DEPTH_DISTRIBUTION_ARRANGEMENTS and MAX_COPY_DEPTH_DISTRIBUTION_SEARCH_STEPS limit
+#     the search for the best way to redistribute a segment's copy depths to its neighbours. If
+#     there are more possible ways than MAX_COPY_DEPTH_DISTRIBUTION_ARRANGEMENTS, the search is
+#     limited to MAX_COPY_DEPTH_DISTRIBUTION_SEARCH_STEPS steps, and if it runs out of steps,
 #     Unicycler won't bother trying.
 INITIAL_SINGLE_COPY_TOLERANCE = 0.1
 COPY_PROPAGATION_TOLERANCE = 0.5
 MIN_SINGLE_COPY_LENGTH = 1000
 MAX_COPY_DEPTH_DISTRIBUTION_ARRANGEMENTS = 10000
+MAX_COPY_DEPTH_DISTRIBUTION_SEARCH_STEPS = 100000
 COPY_DEPTH_PROPAGATION_TABLE_ROW_WIDTH = 35
 
 # When Unicycler is cleaning up the graph after bridging, it can delete graph paths and graph
@@ -136,6 +149,12 @@ LOADING_REFERENCES_PROGRESS_STEP = 1.0
 LOADING_READS_PROGRESS_STEP = 1.0
 LOADING_ALIGNMENTS_PROGRESS_STEP = 1.0
 
+# When long reads have duplicate names, a renamed copy of the reads is saved for the external
+# tools. It's only read back by the same run, so a fast gzip level is used, and records are written
+# in batches of roughly this many bases.
+DUPLICATE_FREE_READS_COMPRESSION_LEVEL = 1
+DUPLICATE_FREE_READS_WRITE_BATCH_SIZE = 4000000
+
 # These settings control how willing Unicycler is to make bridges that don't have a graph path.
 # This depends on whether one or both of the segments being bridged ends in a dead end and
 # whether we have any expected linear sequences (i.e. whether real dead ends are expected).
@@ -172,6 +191,25 @@ MINIASM_BRIDGE_HALF_QUAL_LENGTH = 5000
 
 LONG_READ_BRIDGE_HALF_QUAL_LENGTH = 2000
 
+# Finalising a long read bridge in a very tangled part of the graph can take a long time, so each
+# bridge's path search can be given a time limit (in seconds). A bridge which reaches it uses the
+# best path found so far, and its quality is scaled by TIMED_OUT_BRIDGE_QUAL_FACTOR. Whether a
+# bridge times out depends on the machine's speed and load, so there is no limit by default (0) to
+# keep results reproducible.
+LONG_READ_BRIDGE_TIME_LIMIT = 0.0
+TIMED_OUT_BRIDGE_QUAL_FACTOR = 0.5
+
+# Long read bridges are finalised in order of their predicted finalisation time, slowest first.
+# These are the default coefficients for the consensus time (total read length squared and total
+# read length) and path search time (mean read length squared, mean read length and mean read
+# length times graph complexity). If a bridge time profile is given, the coefficients are refit to
+# its most recent BRIDGE_TIME_PROFILE_MAX_RECORDS records, but only if it has at least
+# BRIDGE_TIME_MODEL_MIN_RECORDS of them.
+DEFAULT_CONSENSUS_TIME_COEFFICIENTS = [1.34e-9, 2.76e-5]
+DEFAULT_PATH_TIME_COEFFICIENTS = [1.78e-7, 3.75e-3, 0.0]
+BRIDGE_TIME_MODEL_MIN_RECORDS = 20
+BRIDGE_TIME_PROFILE_MAX_RECORDS = 100000
+
 
 # If the miniasm assembly is too small, we won't even consider using for bridging in hybrid
 # assembly. This size is relative to the estimated genome size from the short read assembly.
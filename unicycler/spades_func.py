@@ -13,17 +13,26 @@ details. You should have received a copy of the GNU General Public License along
 not, see <http://www.gnu.org/licenses/>.
 """
 
+import collections
+import json
+import math
+import multiprocessing
 import os
 import subprocess
-import gzip
 import shutil
 import statistics
-from .misc import round_to_nearest_odd, get_compression_type, int_to_str, quit_with_error,\
-    strip_read_extensions, bold, dim, print_table, get_left_arrow, float_to_str
+from .misc import round_to_nearest_odd, int_to_str, quit_with_error, strip_read_extensions, bold, \
+    dim, print_table, get_left_arrow, float_to_str, remove_dupes_preserve_order
+from .seq_parse import open_binary, iterate_lines
 from .assembly_graph import AssemblyGraph
 from . import log
 
 
+# Short read stats (read count and length histogram) are cached in this file in the SPAdes
+# directory, so they needn't be recomputed when Unicycler is rerun on the same reads.
+READ_STATS_CACHE_FILENAME = 'read_stats.json'
+
+
 class BadFastq(Exception):
     pass
 
@@ -47,22 +56,16 @@ def get_best_spades_graph(short1, short2, short_unpaired, out_dir, read_depth_fi
     # Make sure that the FASTQ files look good.
     using_paired_reads = bool(short1) and bool(short2)
     using_unpaired_reads = bool(short_unpaired)
+    all_read_stats = get_all_read_stats([short1, short2, short_unpaired], spades_dir, threads)
     if using_paired_reads:
-        count_1, count_2 = 0, 0
-        try:
-            count_1 = get_read_count(short1)
-        except BadFastq:
+        if all_read_stats[short1] is None:
             quit_with_error('this read file is not a properly formatted FASTQ: ' + short1)
-        try:
-            count_2 = get_read_count(short2)
-        except BadFastq:
+        if all_read_stats[short2] is None:
             quit_with_error('this read file is not a properly formatted FASTQ: ' + short2)
-        if count_1 != count_2:
+        if all_read_stats[short1].read_count != all_read_stats[short2].read_count:
             quit_with_error('the paired read input files have an unequal number of reads')
     if using_unpaired_reads:
-        try:
-            get_read_count(short_unpaired)
-        except BadFastq:
+        if all_read_stats[short_unpaired] is None:
             quit_with_error('this read file is not properly formatted as FASTQ: ' + short_unpaired)
 
     if no_spades_correct:
@@ -73,7 +76,7 @@ def get_best_spades_graph(short1, short2, short_unpaired, out_dir, read_depth_fi
     if kmers is not None:
         kmer_range = kmers
     else:
-        kmer_range = get_kmer_range(short1, short2, short_unpaired, spades_dir, kmer_count,
+        kmer_range = get_kmer_range(list(all_read_stats.values()), spades_dir, kmer_count,
                                     min_k_frac, max_k_frac, spades_path)
     assem_dir = os.path.join(spades_dir, 'assembly')
 
@@ -95,7 +98,8 @@ def get_best_spades_graph(short1, short2, short_unpaired, out_dir, read_depth_fi
     best_graph_filename = ''
 
     graph_files, insert_size_mean, insert_size_deviation = \
-        spades_assembly(reads, assem_dir, kmer_range, threads, spades_path, spades_tmp_dir)
+        spades_assembly(reads, assem_dir, spades_dir, kmer_range, threads, spades_path,
+                        spades_tmp_dir)
 
     existing_graph_files = [x for x in graph_files if x is not None]
     if not existing_graph_files:
@@ -169,8 +173,8 @@ def get_best_spades_graph(short1, short2, short_unpaired, out_dir, read_depth_fi
     if best_kmer != kmer_range[-1]:
         new_kmer_range = [x for x in kmer_range if x <= best_kmer]
         graph_file, insert_size_mean, insert_size_deviation = \
-            spades_assembly(reads, assem_dir, new_kmer_range, threads, spades_path, spades_tmp_dir,
-                            just_last=True)
+            spades_assembly(reads, assem_dir, spades_dir, new_kmer_range, threads, spades_path,
+                            spades_tmp_dir, just_last=True)
         best_graph_filename = graph_file
     paths_file = os.path.join(assem_dir, 'contigs.paths')
     if os.path.isfile(paths_file):
@@ -347,10 +351,11 @@ def spades_read_correction(short1, short2, unpaired, spades_dir, threads, spades
     return corrected_1, corrected_2, corrected_u
 
 
-def spades_assembly(read_files, out_dir, kmers, threads, spades_path, spades_tmp_dir,
+def spades_assembly(read_files, out_dir, spades_dir, kmers, threads, spades_path, spades_tmp_dir,
                     just_last=False):
     """
-    This runs a SPAdes assembly, possibly continuing from a previous assembly.
+    This runs a SPAdes assembly in out_dir, possibly continuing from a previous assembly. Read
+    stats are cached in spades_dir, along with those from the rest of the SPAdes step.
     """
     short1 = read_files[0]
     short2 = read_files[1]
@@ -402,10 +407,10 @@ def spades_assembly(read_files, out_dir, kmers, threads, spades_path, spades_tmp
     # If we couldn't get the insert size from the SPAdes output (e.g. it was an unpaired-reads-only
     # assembly), we'll use the read length instead.
     if insert_size_mean is None or insert_size_deviation is None:
-        read_lengths = get_read_lengths(short1) + get_read_lengths(short2) + \
-                       get_read_lengths(unpaired)
-        insert_size_mean = statistics.mean(read_lengths)
-        insert_size_deviation = max(statistics.stdev(read_lengths), 1.0)
+        all_read_stats = get_all_read_stats([short1, short2, unpaired], spades_dir, threads)
+        insert_size_mean, insert_size_deviation = \
+            get_read_length_mean_and_stdev(all_read_stats.values())
+        insert_size_deviation = max(insert_size_deviation, 1.0)
 
     log.log('', 2)
     log.log('Insert size mean: ' + float_to_str(insert_size_mean, 1) + ' bp', 2)
@@ -453,10 +458,11 @@ def get_max_spades_kmer(spades_path):
         return 127
 
 
-def get_kmer_range(reads_1_filename, reads_2_filename, unpaired_reads_filename, spades_dir,
-                   kmer_count, min_kmer_frac, max_kmer_frac, spades_path):
+def get_kmer_range(all_read_stats, spades_dir, kmer_count, min_kmer_frac, max_kmer_frac,
+                   spades_path):
     """
-    Uses the read lengths to determine the k-mer range to be used in the SPAdes assembly.
+    Uses the read lengths (from the ReadFileStats of each read file) to determine the k-mer range
+    to be used in the SPAdes assembly.
     """
     log.log_section_header('Choosing k-mer range for assembly')
     log.log_explanation('Unicycler chooses a k-mer range for SPAdes based on the length of the '
@@ -486,10 +492,7 @@ def get_kmer_range(reads_1_filename, reads_2_filename, unpaired_reads_filename,
 
     # If the code got here, then the k-mer range doesn't already exist and we'll create one by
     # examining the read lengths.
-    read_lengths = get_read_lengths(reads_1_filename) + get_read_lengths(reads_2_filename) + \
-        get_read_lengths(unpaired_reads_filename)
-    read_lengths = sorted(read_lengths)
-    median_read_length = read_lengths[len(read_lengths) // 2 - 1]
+    median_read_length = get_median_read_length(all_read_stats)
     max_kmer = round_to_nearest_odd(max_kmer_frac * median_read_length)
     if max_kmer > max_spades_kmer:
         max_kmer = max_spades_kmer
@@ -527,18 +530,7 @@ def get_read_lengths(reads_filename):
     """
     if reads_filename is None:
         return []
-    if get_compression_type(reads_filename) == 'gz':
-        open_func = gzip.open
-    else:  # plain text
-        open_func = open
-    with open_func(reads_filename, 'rb') as reads:
-        read_lengths = []
-        i = 0
-        for line in reads:
-            if i % 4 == 1:
-                read_lengths.append(len(line.strip()))
-            i += 1
-    return read_lengths
+    return get_read_stats(reads_filename).get_read_lengths()
 
 
 def get_read_count(reads_filename):
@@ -547,22 +539,165 @@ def get_read_count(reads_filename):
     """
     if reads_filename is None:
         return 0
-    if get_compression_type(reads_filename) == 'gz':
-        open_func = gzip.open
-    else:  # plain text
-        open_func = open
-    with open_func(reads_filename, 'rb') as reads:
-        read_count = 0
+    return get_read_stats(reads_filename).read_count
+
+
+class ReadFileStats(object):
+    """
+    The read count and read length distribution of a short read FASTQ file, gathered in a single
+    pass. Lengths are stored as a histogram (length -> count) so this stays small even for very
+    large read sets.
+    """
+    def __init__(self, read_count, length_counts):
+        self.read_count = read_count
+        self.length_counts = length_counts
+
+    def get_read_lengths(self):
+        read_lengths = []
+        for length in sorted(self.length_counts):
+            read_lengths += [length] * self.length_counts[length]
+        return read_lengths
+
+    def to_dict(self):
+        return {'read_count': self.read_count,
+                'length_counts': [[length, count]
+                                  for length, count in sorted(self.length_counts.items())]}
+
+    @staticmethod
+    def from_dict(stats_dict):
+        return ReadFileStats(stats_dict['read_count'],
+                             {length: count for length, count in stats_dict['length_counts']})
+
+
+def get_read_stats(reads_filename):
+    """
+    Reads through the given FASTQ file once, checking its format and gathering its read count and
+    read length histogram. Raises BadFastq if the file doesn't look like FASTQ.
+    """
+    length_counts = collections.Counter()
+    read_count = 0
+    with open_binary(reads_filename) as reads:
         i = 0
-        for line in reads:
-            if i % 4 == 0:
-                try:
-                    assert line.startswith(b'@')
-                except AssertionError:
+        for line in iterate_lines(reads):
+            line_type = i % 4
+            if line_type == 0:
+                if not line.startswith(b'@'):
                     raise BadFastq
                 read_count += 1
+            elif line_type == 1:
+                length_counts[len(line.strip())] += 1
             i += 1
-    return read_count
+    return ReadFileStats(read_count, dict(length_counts))
+
+
+def get_read_stats_or_none(reads_filename):
+    """
+    A wrapper for get_read_stats (suitable for a process pool) that returns None for a bad FASTQ.
+    """
+    try:
+        return get_read_stats(reads_filename)
+    except BadFastq:
+        return None
+
+
+def get_all_read_stats(read_filenames, spades_dir, threads):
+    """
+    Returns a dictionary of ReadFileStats (or None for files which aren't valid FASTQ) for the given
+    read files. Files are scanned in parallel and the results are cached in the SPAdes directory,
+    keyed on each file's path, size and modification time, so a resumed run doesn't scan them again.
+    """
+    read_filenames = remove_dupes_preserve_order([x for x in read_filenames if x is not None])
+    cache_filename = os.path.join(spades_dir, READ_STATS_CACHE_FILENAME)
+    cache = load_read_stats_cache(cache_filename)
+
+    all_stats, cache_keys, filenames_to_scan = {}, {}, []
+    for filename in read_filenames:
+        cache_keys[filename] = get_read_stats_cache_key(filename)
+        if cache_keys[filename] in cache:
+            cached_stats = cache[cache_keys[filename]]
+            all_stats[filename] = None if cached_stats is None \
+                else ReadFileStats.from_dict(cached_stats)
+        else:
+            filenames_to_scan.append(filename)
+
+    if filenames_to_scan:
+        process_count = min(threads, len(filenames_to_scan))
+        if process_count > 1:
+            pool = multiprocessing.Pool(process_count)
+            scanned_stats = pool.map(get_read_stats_or_none, filenames_to_scan)
+            pool.close()
+            pool.join()
+        else:
+            scanned_stats = [get_read_stats_or_none(x) for x in filenames_to_scan]
+        for filename, stats in zip(filenames_to_scan, scanned_stats):
+            all_stats[filename] = stats
+            cache[cache_keys[filename]] = None if stats is None else stats.to_dict()
+        save_read_stats_cache(cache_filename, cache)
+    return all_stats
+
+
+def get_read_stats_cache_key(reads_filename):
+    file_stat = os.stat(reads_filename)
+    return '\t'.join([os.path.abspath(reads_filename), str(file_stat.st_size),
+                      str(file_stat.st_mtime_ns)])
+
+
+def load_read_stats_cache(cache_filename):
+    try:
+        with open(cache_filename, 'rt') as cache_file:
+            cache = json.load(cache_file)
+        if isinstance(cache, dict):
+            return cache
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def save_read_stats_cache(cache_filename, cache):
+    try:
+        with open(cache_filename, 'wt') as cache_file:
+            json.dump(cache, cache_file)
+    except OSError:
+        pass
+
+
+def get_median_read_length(all_read_stats):
+    """
+    Returns the median read length over all of the given ReadFileStats objects (the lower of the
+    two middle values for an even count, matching the original sorted-list approach).
+    """
+    length_counts = combine_length_counts(all_read_stats)
+    total_count = sum(length_counts.values())
+    target_index = total_count // 2 - 1
+    running_count = 0
+    for length in sorted(length_counts):
+        running_count += length_counts[length]
+        if running_count > target_index:
+            return length
+    return 0
+
+
+def get_read_length_mean_and_stdev(all_read_stats):
+    """
+    Returns the mean and sample standard deviation of read lengths over all of the given
+    ReadFileStats objects.
+    """
+    length_counts = combine_length_counts(all_read_stats)
+    total_count = sum(length_counts.values())
+    if total_count < 2:
+        raise statistics.StatisticsError('stdev requires at least two data points')
+    mean = sum(length * count for length, count in length_counts.items()) / total_count
+    variance = sum(count * (length - mean) ** 2
+                   for length, count in length_counts.items()) / (total_count - 1)
+    return mean, math.sqrt(variance)
+
+
+def combine_length_counts(all_read_stats):
+    length_counts = collections.Counter()
+    for stats in all_read_stats:
+        if stats is not None:
+            length_counts.update(stats.length_counts)
+    return length_counts
 
 
 def count_segments_in_spades_fastg(fastg_file):
@@ -0,0 +1,92 @@
+// Copyright 2017 Ryan Wick (rrwick@gmail.com)
+// https://github.com/rrwick/Unicycler
+
+// This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or
+// modify it under the terms of the GNU General Public License as published by the Free Software
+// Foundation, either version 3 of the License, or (at your option) any later version. Unicycler is
+// distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the
+// implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+// Public License for more details. You should have received a copy of the GNU General Public
+// License along with Unicycler. If not, see <http://www.gnu.org/licenses/>.
+
+// These functions align one sequence to many others in a single call, spread over threads. Only
+// the scores are returned (in arrays given by the caller), so there are no alignment strings to
+// build and parse. A failed alignment gets a scaled score of -1.
+
+#include "batch_align.h"
+
+#include <algorithm>
+#include <atomic>
+#include <thread>
+#include "path_align.h"
+#include "global_align.h"
+
+
+void pathAlignmentBatch(char * pathSeqs[], int pathCount, char * fullSeq,
+                        int matchScore, int mismatchScore, int gapOpenScore,
+                        int gapExtensionScore, bool useBanding, int bandSize, int threadCount,
+                        int rawScores[], double scaledScores[]) {
+    std::vector<std::string> s1s, s2s;
+    for (int i = 0; i < pathCount; ++i)
+        s1s.push_back(std::string(pathSeqs[i]));
+    s2s.push_back(std::string(fullSeq));
+    alignBatch(s1s, s2s, pathCount, pathAlignment, matchScore, mismatchScore, gapOpenScore,
+               gapExtensionScore, useBanding, bandSize, threadCount, rawScores, scaledScores);
+}
+
+
+void fullyGlobalAlignmentBatch(char * seq, char * otherSeqs[], int otherCount,
+                               int matchScore, int mismatchScore, int gapOpenScore,
+                               int gapExtensionScore, bool useBanding, int bandSize,
+                               int threadCount, int rawScores[], double scaledScores[]) {
+    std::vector<std::string> s1s, s2s;
+    s1s.push_back(std::string(seq));
+    for (int i = 0; i < otherCount; ++i)
+        s2s.push_back(std::string(otherSeqs[i]));
+    alignBatch(s1s, s2s, otherCount, fullyGlobalAlignment, matchScore, mismatchScore, gapOpenScore,
+               gapExtensionScore, useBanding, bandSize, threadCount, rawScores, scaledScores);
+}
+
+
+// One of s1s and s2s holds a single sequence which is aligned to each of the count sequences in the
+// other. The threads take alignments one at a time, so a few slow alignments don't hold up the
+// rest.
+void alignBatch(std::vector<std::string> & s1s, std::vector<std::string> & s2s, int count,
+                PairAlignmentFunction alignmentFunction,
+                int matchScore, int mismatchScore, int gapOpenScore, int gapExtensionScore,
+                bool useBanding, int bandSize, int threadCount,
+                int rawScores[], double scaledScores[]) {
+    std::atomic<int> nextIndex(0);
+    auto alignUntilDone = [&]() {
+        while (true) {
+            int i = nextIndex++;
+            if (i >= count)
+                break;
+            std::string & s1 = (s1s.size() == 1) ? s1s[0] : s1s[i];
+            std::string & s2 = (s2s.size() == 1) ? s2s[0] : s2s[i];
+            ScoredAlignment * alignment = alignmentFunction(s1, s2, matchScore, mismatchScore,
+                                                            gapOpenScore, gapExtensionScore,
+                                                            useBanding, bandSize);
+            if (alignment != 0) {
+                rawScores[i] = alignment->m_rawScore;
+                scaledScores[i] = alignment->m_scaledScore;
+                delete alignment;
+            }
+            else {
+                rawScores[i] = 0;
+                scaledScores[i] = -1.0;
+            }
+        }
+    };
+
+    threadCount = std::max(1, std::min(threadCount, count));
+    if (threadCount == 1) {
+        alignUntilDone();
+        return;
+    }
+    std::vector<std::thread> threads;
+    for (int i = 0; i < threadCount; ++i)
+        threads.push_back(std::thread(alignUntilDone));
+    for (auto & thread : threads)
+        thread.join();
+}
@@ -0,0 +1,174 @@
+// Copyright 2017 Ryan Wick (rrwick@gmail.com)
+// https://github.com/rrwick/Unicycler
+
+// This file is part of Unicycler. Unicycler is free software: you can redistribute it and/or
+// modify it under the terms of the GNU General Public License as published by the Free Software
+// Foundation, either version 3 of the License, or (at your option) any later version. Unicycler is
+// distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the
+// implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+// Public License for more details. You should have received a copy of the GNU General Public
+// License along with Unicycler. If not, see <http://www.gnu.org/licenses/>.
+
+// These functions align a consensus sequence to graph paths one segment at a time. The alignment
+// is global in both sequences with affine gaps (a gap of length n scores open + (n-1) * extension,
+// as in Seqan). Scores are kept for a band of diagonals, where diagonal d holds the cells for
+// consensus position i = path position + d.
+
+#include "graph_align.h"
+
+#include <algorithm>
+#include <climits>
+#include <cctype>
+
+
+// Low enough to never win, but with room to add scores without overflowing.
+#define GRAPH_ALIGN_MIN_SCORE (INT_MIN / 4)
+
+
+GraphAlignmentContext::GraphAlignmentContext(std::string consensus, int matchScore,
+                                             int mismatchScore, int gapOpenScore,
+                                             int gapExtensionScore, int minDiagonal,
+                                             int maxDiagonal) :
+    m_consensus(consensus), m_matchScore(matchScore), m_mismatchScore(mismatchScore),
+    m_gapOpenScore(gapOpenScore), m_gapExtensionScore(gapExtensionScore),
+    m_minDiagonal(minDiagonal), m_maxDiagonal(maxDiagonal) {
+    for (auto & base : m_consensus)
+        base = toupper(base);
+}
+
+
+// Makes the column for an empty path: the only way to align consensus bases is with a gap.
+GraphAlignmentColumn::GraphAlignmentColumn(std::shared_ptr<GraphAlignmentContext> context) :
+    m_context(context), m_pathLength(0) {
+    int bandSize = context->m_maxDiagonal - context->m_minDiagonal + 1;
+    int consensusLength = context->m_consensus.length();
+    m_h.assign(bandSize, GRAPH_ALIGN_MIN_SCORE);
+    m_e.assign(bandSize, GRAPH_ALIGN_MIN_SCORE);
+    for (int k = 0; k < bandSize; ++k) {
+        int i = context->m_minDiagonal + k;
+        if (i == 0)
+            m_h[k] = 0;
+        else if (i > 0 && i <= consensusLength)
+            m_h[k] = context->m_gapOpenScore + (i - 1) * context->m_gapExtensionScore;
+    }
+    setScoreAndBound();
+}
+
+
+// Makes the column for the parent's path extended by the given sequence.
+GraphAlignmentColumn::GraphAlignmentColumn(const GraphAlignmentColumn & parent,
+                                           std::string & sequence) :
+    m_context(parent.m_context), m_pathLength(parent.m_pathLength), m_h(parent.m_h),
+    m_e(parent.m_e) {
+    const GraphAlignmentContext & c = *m_context;
+    int bandSize = int(m_h.size());
+    int consensusLength = c.m_consensus.length();
+    std::vector<int> previousH, previousE;
+
+    for (size_t p = 0; p < sequence.length(); ++p) {
+        char pathBase = toupper(sequence[p]);
+        ++m_pathLength;
+        std::swap(m_h, previousH);
+        std::swap(m_e, previousE);
+        m_h.assign(bandSize, GRAPH_ALIGN_MIN_SCORE);
+        m_e.assign(bandSize, GRAPH_ALIGN_MIN_SCORE);
+
+        // Only the part of the band inside the alignment matrix needs computing.
+        int firstK = std::max(0, -m_pathLength - c.m_minDiagonal);
+        int lastK = std::min(bandSize - 1, consensusLength - m_pathLength - c.m_minDiagonal);
+        int f = GRAPH_ALIGN_MIN_SCORE;
+        for (int k = firstK; k <= lastK; ++k) {
+            int i = m_pathLength + c.m_minDiagonal + k;
+
+            // A gap in the consensus comes from the previous column on the next diagonal.
+            int e = GRAPH_ALIGN_MIN_SCORE;
+            if (k + 1 < bandSize)
+                e = std::max(previousH[k + 1] + c.m_gapOpenScore,
+                             previousE[k + 1] + c.m_gapExtensionScore);
+
+            // A match/mismatch comes from the previous column on the same diagonal.
+            int h = e;
+            if (i > 0) {
+                int s = (c.m_consensus[i - 1] == pathBase) ? c.m_matchScore : c.m_mismatchScore;
+                h = std::max(h, previousH[k] + s);
+            }
+
+            // A gap in the path comes from this column on the previous diagonal.
+            if (k > firstK) {
+                f = std::max(m_h[k - 1] + c.m_gapOpenScore, f + c.m_gapExtensionScore);
+                h = std::max(h, f);
+            }
+            m_h[k] = std::max(h, GRAPH_ALIGN_MIN_SCORE);
+            m_e[k] = std::max(e, GRAPH_ALIGN_MIN_SCORE);
+        }
+    }
+    setScoreAndBound();
+}
+
+
+// The bound assumes every remaining consensus base could be a match, which no extension can beat
+// as long as mismatches and gaps don't score more than matches.
+void GraphAlignmentColumn::setScoreAndBound() {
+    const GraphAlignmentContext & c = *m_context;
+    int consensusLength = c.m_consensus.length();
+    m_score = GRAPH_ALIGN_MIN_SCORE;
+    m_bound = GRAPH_ALIGN_MIN_SCORE;
+    for (int k = 0; k < int(m_h.size()); ++k) {
+        int i = m_pathLength + c.m_minDiagonal + k;
+        if (i < 0 || i > consensusLength || m_h[k] <= GRAPH_ALIGN_MIN_SCORE)
+            continue;
+        m_bound = std::max(m_bound, m_h[k] + (consensusLength - i) * c.m_matchScore);
+        if (i == consensusLength)
+            m_score = m_h[k];
+    }
+}
+
+
+// A column dominates another (for a path of the same length) if none of its cells are worse. Then
+// any extension of the other path scores no better than the same extension of this one.
+bool GraphAlignmentColumn::dominates(const GraphAlignmentColumn & other) const {
+    if (m_pathLength != other.m_pathLength)
+        return false;
+    for (size_t k = 0; k < m_h.size(); ++k) {
+        if (m_h[k] < other.m_h[k] || m_e[k] < other.m_e[k])
+            return false;
+    }
+    return true;
+}
+
+
+GraphAlignmentColumn * startGraphAlignment(char * consensus, int matchScore, int mismatchScore,
+                                           int gapOpenScore, int gapExtensionScore,
+                                           int minDiagonal, int maxDiagonal) {
+    auto context = std::make_shared<GraphAlignmentContext>(std::string(consensus), matchScore,
+                                                           mismatchScore, gapOpenScore,
+                                                           gapExtensionScore, minDiagonal,
+                                                           maxDiagonal);
+    return new GraphAlignmentColumn(context);
+}
+
+
+GraphAlignmentColumn * extendGraphAlignment(GraphAlignmentColumn * column, char * sequence) {
+    std::string sequenceString(sequence);
+    return new GraphAlignmentColumn(*column, sequenceString);
+}
+
+
+int getGraphAlignmentScore(GraphAlignmentColumn * column) {
+    return column->m_score;
+}
+
+
+int getGraphAlignmentBound(GraphAlignmentColumn * column) {
+    return column->m_bound;
+}
+
+
+bool graphAlignmentDominates(GraphAlignmentColumn * column, GraphAlignmentColumn * other) {
+    return column->dominates(*other);
+}
+
+
+void deleteGraphAlignmentColumn(GraphAlignmentColumn * column) {
+    delete column;
+}
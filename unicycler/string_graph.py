@@ -17,8 +17,9 @@ not, see <http://www.gnu.org/licenses/>.
 import sys
 import re
 from collections import deque, defaultdict
-from .misc import reverse_complement, add_line_breaks_to_sequence, get_right_arrow, bold, \
-    load_fasta, load_fasta_with_full_header, get_first_character_of_file
+from .misc import add_line_breaks_to_sequence, get_right_arrow, bold, load_fasta, \
+    load_fasta_with_full_header, get_first_character_of_file
+from .seq_utils import reverse_complement
 from .assembly_graph import build_reverse_links
 from . import settings
 from . import log
@@ -37,6 +37,7 @@ from .misc import int_to_str, float_to_str, quit_with_error, get_percentile, bol
     samtools_path_and_version, java_path_and_version, pilon_path_and_version, \
     racon_path_and_version, bcftools_path_and_version, gfa_path, red
 from .spades_func import get_best_spades_graph
+from .graph_snapshot import save_checkpoint, load_graph_snapshot, snapshot_path, BadSnapshot
 from .blast_func import find_start_gene, CannotFindStart
 from .unicycler_align import add_aligning_arguments, fix_up_arguments, AlignmentScoringScheme, \
     semi_global_align_long_reads, load_references, load_long_reads, load_sam_alignments, \
@@ -75,27 +76,44 @@ def main():
 
         # Produce a SPAdes assembly graph with a k-mer that balances contig length and connectivity.
         best_spades_graph = gfa_path(args.out, next(counter), 'best_spades_graph')
-        if os.path.isfile(best_spades_graph):
-            log.log('\nSPAdes graph already exists. Will use this graph instead of running '
-                    'SPAdes:\n  ' + best_spades_graph)
-            graph = AssemblyGraph(best_spades_graph, None)
-        else:
-            graph = get_best_spades_graph(args.short1, args.short2, args.unpaired, args.out,
-                                          args.depth_filter, args.verbosity,
-                                          args.spades_path, args.threads, args.keep,
-                                          args.kmer_count, args.min_kmer_frac, args.max_kmer_frac,
-                                          args.kmers, args.no_correct, args.linear_seqs,
-                                          args.spades_tmp_dir, args.largest_component)
-        determine_copy_depth(graph)
-        if args.keep > 0 and not os.path.isfile(best_spades_graph):
-            graph.save_to_gfa(best_spades_graph, save_copy_depth_info=True, newline=True,
-                              include_insert_size=True)
-
-        clean_up_spades_graph(graph)
-        if args.keep > 0:
-            overlap_removed_graph_filename = gfa_path(args.out, next(counter), 'overlaps_removed')
-            graph.save_to_gfa(overlap_removed_graph_filename, save_copy_depth_info=True,
-                              newline=True, include_insert_size=True)
+        overlaps_removed_num = next(counter) if args.keep > 0 else None
+
+        # If a previous run got past overlap removal, we can resume from its snapshot.
+        graph = None
+        if overlaps_removed_num is not None and os.path.isfile(best_spades_graph):
+            overlaps_removed_snapshot = snapshot_path(args.out, overlaps_removed_num,
+                                                      'overlaps_removed')
+            if os.path.isfile(overlaps_removed_snapshot):
+                try:
+                    graph = load_graph_snapshot(overlaps_removed_snapshot)
+                    log.log('\nOverlap-free graph snapshot already exists. Will use this graph '
+                            'instead of running SPAdes and cleaning:\n  ' +
+                            overlaps_removed_snapshot)
+                except BadSnapshot as e:
+                    log.log('\nUnable to use existing snapshot: ' + str(e))
+
+        if graph is None:
+            if os.path.isfile(best_spades_graph):
+                log.log('\nSPAdes graph already exists. Will use this graph instead of running '
+                        'SPAdes:\n  ' + best_spades_graph)
+                graph = AssemblyGraph(best_spades_graph, None, use_cache=True)
+            else:
+                graph = get_best_spades_graph(args.short1, args.short2, args.unpaired, args.out,
+                                              args.depth_filter, args.verbosity,
+                                              args.spades_path, args.threads, args.keep,
+                                              args.kmer_count, args.min_kmer_frac,
+                                              args.max_kmer_frac, args.kmers, args.no_correct,
+                                              args.linear_seqs, args.spades_tmp_dir,
+                                              args.largest_component)
+            determine_copy_depth(graph)
+            if args.keep > 0 and not os.path.isfile(best_spades_graph):
+                graph.save_to_gfa(best_spades_graph, save_copy_depth_info=True, newline=True,
+                                  include_insert_size=True)
+
+            clean_up_spades_graph(graph)
+            if args.keep > 0:
+                save_checkpoint(graph, args, overlaps_removed_num, 'overlaps_removed',
+                                newline=True, save_copy_depth_info=True, include_insert_size=True)
 
         anchor_segments = get_anchor_segments(graph, args.min_anchor_seg_len)
 
@@ -157,7 +175,8 @@ def main():
     if short_reads_available and long_reads_available:
         if string_graph is not None and not args.no_miniasm:
             bridges += create_miniasm_bridges(graph, string_graph, anchor_segments,
-                                              scoring_scheme, args.verbosity, args.min_bridge_qual)
+                                              scoring_scheme, args.verbosity, args.min_bridge_qual,
+                                              args.threads)
 
         bridges += create_simple_long_read_bridges(graph, args.out, args.keep, args.threads,
                                                    read_dict, long_read_filename, scoring_scheme,
@@ -168,28 +187,32 @@ def main():
                                                    read_dict, read_names, long_read_filename)
 
             expected_linear_seqs = args.linear_seqs > 0
+            bridge_cache = os.path.join(args.out, 'long_read_bridges.cache') \
+                if args.keep > 0 else None
             bridges += create_long_read_bridges(graph, read_dict, read_names, anchor_segments,
                                                 args.verbosity, min_scaled_score, args.threads,
                                                 scoring_scheme, min_alignment_length,
-                                                expected_linear_seqs, args.min_bridge_qual)
+                                                expected_linear_seqs, args.min_bridge_qual,
+                                                args.bridge_time_limit, args.bridge_processes,
+                                                args.bridge_time_profile, bridge_cache)
 
     if short_reads_available:
         seg_nums_used_in_bridges = graph.apply_bridges(bridges, args.verbosity,
                                                        args.min_bridge_qual)
         if args.keep > 0:
-            graph.save_to_gfa(gfa_path(args.out, next(counter), 'bridges_applied'),
-                              save_seg_type_info=True, save_copy_depth_info=True, newline=True)
+            save_checkpoint(graph, args, next(counter), 'bridges_applied', newline=True,
+                            save_seg_type_info=True, save_copy_depth_info=True)
 
         graph.clean_up_after_bridging_1(anchor_segments, seg_nums_used_in_bridges)
         graph.clean_up_after_bridging_2(seg_nums_used_in_bridges, args.min_component_size,
                                         args.min_dead_end_size, graph, anchor_segments)
         if args.keep > 2:
             log.log('', 2)
-            graph.save_to_gfa(gfa_path(args.out, next(counter), 'cleaned'),
-                              save_seg_type_info=True, save_copy_depth_info=True)
+            save_checkpoint(graph, args, next(counter), 'cleaned',
+                            save_seg_type_info=True, save_copy_depth_info=True)
         graph.merge_all_possible(anchor_segments, args.mode)
         if args.keep > 2:
-            graph.save_to_gfa(gfa_path(args.out, next(counter), 'merged'))
+            save_checkpoint(graph, args, next(counter), 'merged')
 
         # Perform some final cleaning on the graph.
         log.log_section_header('Bridged assembly graph')
@@ -200,7 +223,7 @@ def main():
                             verbosity=1)
         graph.final_clean()
         if args.keep > 0:
-            graph.save_to_gfa(gfa_path(args.out, next(counter), 'final_clean'))
+            save_checkpoint(graph, args, next(counter), 'final_clean')
         log.log('')
         graph.print_component_table()
 
@@ -285,9 +308,13 @@ def get_arguments():
     output_group.add_argument('--keep', type=int, default=1,
                               help='R|Level of file retention (default: 1)\n  '
                                    '0 = only keep final files: assembly (FASTA, GFA and log), '
-                                   '1 = also save graphs at main checkpoints, '
+                                   '1 = also save graphs at main checkpoints and long read '
+                                   'bridge results, '
                                    '2 = also keep SAM (enables fast rerun in different mode), '
                                    '3 = keep all temp files and save all graphs (for debugging)')
+    output_group.add_argument('--gfa_checkpoints', action='store_true',
+                              help='Save intermediate graphs in GFA format (default: save them as '
+                                   'binary snapshots, which are much faster to write)')
 
     other_group = parser.add_argument_group('Other')
     other_group.add_argument('-t', '--threads', type=int, required=False,
@@ -307,6 +334,22 @@ def get_arguments():
                                   '  bold mode default: ' +
                                   str(settings.BOLD_MIN_BRIDGE_QUAL)
                                   if show_all_args else argparse.SUPPRESS)
+    other_group.add_argument('--bridge_time_limit', type=float,
+                             default=settings.LONG_READ_BRIDGE_TIME_LIMIT,
+                             help='Time limit in seconds for finding each long read bridge\'s '
+                                  'graph path, after which the best path found so far is used '
+                                  'with a lower quality (0 = no limit, default: ' +
+                                  str(int(settings.LONG_READ_BRIDGE_TIME_LIMIT)) + ')'
+                             if show_all_args else argparse.SUPPRESS)
+    other_group.add_argument('--bridge_processes', action='store_true',
+                             help='Finalise long read bridges in separate processes instead of '
+                                  'threads (faster with many threads, but uses more memory)'
+                             if show_all_args else argparse.SUPPRESS)
+    other_group.add_argument('--bridge_time_profile', type=str, default=None,
+                             help='File of recorded long read bridge finalisation times, used to '
+                                  'predict which bridges are slowest and updated with this run\'s '
+                                  'times (default: do not use)'
+                             if show_all_args else argparse.SUPPRESS)
     other_group.add_argument('--linear_seqs', type=int, required=False, default=0,
                              help='The expected number of linear (i.e. non-circular) sequences in '
                                   'the underlying sequence')
@@ -504,6 +547,9 @@ def get_arguments():
     if args.kmer_count < 1:
         quit_with_error('--kmer_count must be at least 1')
 
+    if args.bridge_time_limit < 0.0:
+        quit_with_error('--bridge_time_limit cannot be negative')
+
     if args.kmers is not None:
         args.kmers = args.kmers.split(',')
         try:
@@ -546,6 +592,8 @@ def get_arguments():
         args.long = os.path.abspath(args.long)
     if args.spades_tmp_dir:
         args.spades_tmp_dir = os.path.abspath(args.spades_tmp_dir)
+    if args.bridge_time_profile:
+        args.bridge_time_profile = os.path.abspath(args.bridge_time_profile)
 
     if args.vcf and args.no_pilon:
         quit_with_error('cannot use --no_pilon with --vcf')
@@ -964,7 +1012,7 @@ def rotate_completed_replicons(graph, args, counter):
         print_table(rotation_result_table, alignments='RRRLRLRR', indent=0,
                     sub_colour={'none found': 'red'})
         if rotation_count and args.keep > 0:
-            graph.save_to_gfa(gfa_path(args.out, next(counter), 'rotated'), newline=True)
+            save_checkpoint(graph, args, next(counter), 'rotated', newline=True)
         if args.keep < 3 and os.path.exists(blast_dir):
             shutil.rmtree(blast_dir, ignore_errors=True)
 
@@ -983,7 +1031,7 @@ def final_polish(graph, args, counter, do_pilon_reassembly):
         log.log('Unable to polish assembly using Pilon: ' + e.message)
     else:
         if args.keep > 0:
-            graph.save_to_gfa(gfa_path(args.out, next(counter), 'polished'))
+            save_checkpoint(graph, args, next(counter), 'polished')
 
     return insert_size_1st, insert_size_99th
 
@@ -28,7 +28,8 @@ import argparse
 import random
 import shutil
 from .misc import int_to_str, float_to_str, check_file_exists, quit_with_error, \
-    reverse_complement, MyHelpFormatter, get_default_thread_count
+    MyHelpFormatter, get_default_thread_count
+from .seq_utils import reverse_complement
 from .read_ref import load_references, load_long_reads
 from .alignment import AlignmentScoringScheme
 from .unicycler_align import semi_global_align_long_reads, add_aligning_arguments, \